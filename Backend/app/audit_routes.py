@@ -0,0 +1,104 @@
+"""
+Rutas de Consulta de Auditoría
+Solo accesibles por administradores
+"""
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.dependencies import get_db, get_current_admin_user
+from app.model import User, ActionType
+from app.schemas import AuditLogResponse
+from app.services.activity_rollup import activity_summary
+from app.services.audit_query import AuditFilters, InvalidCursor, fetch_page, filtered_query, iter_csv
+from app.services.pagination import count_rows
+
+router = APIRouter(prefix="/admin/audit", tags=["Audit"])
+
+# Tamaño máximo de página del listado de auditoría
+MAX_PAGE_SIZE = 500
+
+
+def get_audit_filters(
+    start: Optional[datetime] = Query(None, description="Desde (inclusive)"),
+    end: Optional[datetime] = Query(None, description="Hasta (exclusivo)"),
+    user_id: Optional[int] = None,
+    action_type: Optional[ActionType] = None
+) -> AuditFilters:
+    if start and end and start >= end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start must be earlier than end"
+        )
+    return AuditFilters(start=start, end=end, user_id=user_id, action_type=action_type)
+
+
+@router.get("", response_model=List[AuditLogResponse], status_code=status.HTTP_200_OK)
+async def list_audit_logs(
+    response: Response,
+    filters: AuditFilters = Depends(get_audit_filters),
+    after: Optional[str] = Query(None, description="Cursor: encabezado X-Next-Cursor de la página anterior"),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    count: Optional[str] = Query(None, pattern="^(exact|estimated)$"),
+    current_user: User = Depends(get_current_admin_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Consultar registros de auditoría, del más reciente al más antiguo
+    Solo administradores
+    
+    - **start** / **end**: Rango de created_at [start, end)
+    - **user_id** / **action_type**: Filtros exactos
+    - **after**: Cursor de paginación
+    - **count**: `exact` o `estimated` para recibir el total en `X-Total-Count`
+    """
+    query = filtered_query(db, filters)
+    try:
+        entries, next_cursor = fetch_page(query, after, limit)
+    except InvalidCursor:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    total = count_rows(db, query, count, "audit_logs", filters.filtered)
+    if total is not None:
+        response.headers["X-Total-Count"] = str(total)
+    return [AuditLogResponse.from_orm(entry) for entry in entries]
+
+
+@router.get("/activity", response_model=List[Dict], status_code=status.HTTP_200_OK)
+async def get_user_activity(
+    start: Optional[date] = Query(None, description="Primer día (UTC, inclusive)"),
+    end: Optional[date] = Query(None, description="Último día (UTC, inclusive)"),
+    current_user: User = Depends(get_current_admin_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Logins, cargas y exportaciones por usuario en el rango de días
+    Lee el resumen diario user_activity_daily (no agrega audit_logs)
+    Solo administradores
+    """
+    return activity_summary(db, start, end)
+
+
+@router.get("/export.csv")
+async def export_audit_logs_csv(
+    filters: AuditFilters = Depends(get_audit_filters),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    Exportar a CSV los registros de auditoría del rango (en streaming, por bloques)
+    Solo administradores
+    """
+    filename = f"auditoria_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    return StreamingResponse(
+        iter_csv(filters),
+        media_type="text/csv; charset=utf-8",
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
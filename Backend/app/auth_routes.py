@@ -15,11 +15,12 @@ from app.schemas import (
     PasswordResetValidate,
     PasswordResetConfirm
 )
-from app.dependencies import get_db, get_current_active_user, get_client_ip, get_user_agent
+from app.dependencies import get_db, get_current_active_user, get_current_admin_user, get_client_ip, get_user_agent
 from app.auth_service import AuthService, ACCESS_TOKEN_EXPIRE_MINUTES
 from app.models import User, ActionType, PasswordResetToken
 from app.schemas import LoginResponse, UserResponse
-from app.email_service import EmailService
+from app.email_service import EmailService, email_queue
+from app.services.password_hasher import password_hash_pool
 
 router = APIRouter(prefix="/api/auth", tags=["Authentication"])
 
@@ -30,7 +31,8 @@ async def login(
     db: Session = Depends(get_db)
 ):
     """Login de usuario"""
-    user = AuthService.authenticate_user(db, login_data.username, login_data.password)
+    # PasswordPoolFull -> 503 con Retry-After (manejador en main.py)
+    user = await AuthService.authenticate_user_async(db, login_data.username, login_data.password)
     
     if not user:
         AuthService.create_audit_log(
@@ -54,25 +56,15 @@ async def login(
         expires_delta=access_token_expires
     )
     
-    AuthService.create_user_session(
+    # ✅ Sesión + last_login en un solo commit (la auditoría va al escritor por lotes)
+    AuthService.record_login(
         db=db,
-        user_id=user.id,
+        user=user,
         token=access_token,
         ip_address=get_client_ip(request),
         user_agent=get_user_agent(request)
     )
     
-    AuthService.update_last_login(db, user.id)
-    
-    AuthService.create_audit_log(
-        db=db,
-        user_id=user.id,
-        action_type=ActionType.LOGIN,
-        description=f"Successful login for user: {user.username}",
-        ip_address=get_client_ip(request),
-        user_agent=get_user_agent(request)
-    )
-    
     return LoginResponse(
         access_token=access_token,
         token_type="bearer",
@@ -126,20 +118,23 @@ async def change_password(
     db: Session = Depends(get_db)
 ):
     """Cambiar contraseña del usuario actual"""
-    if not AuthService.verify_password(password_data.current_password, current_user.password_hash):
+    if not await AuthService.verify_password_async(password_data.current_password, current_user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Current password is incorrect"
         )
     
-    if AuthService.verify_password(password_data.new_password, current_user.password_hash):
+    if await AuthService.verify_password_async(password_data.new_password, current_user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="New password must be different from current password"
         )
     
-    current_user.password_hash = AuthService.get_password_hash(password_data.new_password)
+    # current_user puede ser una copia en caché: actualizar la fila de la sesión actual
+    user = db.query(User).filter(User.id == current_user.id).first()
+    user.password_hash = await AuthService.get_password_hash_async(password_data.new_password)
     db.commit()
+    AuthService.invalidate_cached_user(user.id)
     
     AuthService.create_audit_log(
         db=db,
@@ -155,6 +150,20 @@ async def change_password(
         detail="Your password has been updated"
     )
 
+@router.get("/hash-pool/stats", status_code=status.HTTP_200_OK)
+async def get_hash_pool_stats(
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Métricas del pool de hashing de contraseñas (solo administradores)"""
+    return password_hash_pool.stats()
+
+@router.get("/email-queue/stats", status_code=status.HTTP_200_OK)
+async def get_email_queue_stats(
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Métricas de la cola de envío de correos (solo administradores)"""
+    return email_queue.stats()
+
 @router.post("/validate-token", response_model=MessageResponse, status_code=status.HTTP_200_OK)
 async def validate_token(
     current_user: User = Depends(get_current_active_user)
@@ -248,7 +257,7 @@ async def reset_password(
     db: Session = Depends(get_db)
 ):
     """Restablecer contraseña usando token válido"""
-    success = AuthService.reset_password_with_token(
+    success = await AuthService.reset_password_with_token(
         db, 
         reset_data.token, 
         reset_data.new_password
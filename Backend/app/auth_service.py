@@ -3,14 +3,18 @@ Servicio de Autenticación y Autorización
 Maneja login, tokens JWT, reset de contraseña y validación de usuarios
 """
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Dict, Optional, Set, Tuple
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
-from app.models import User, Session as UserSession, AuditLog, UserRole, ActionType, PasswordResetToken
+from app.models import User, Session as UserSession, UserRole, ActionType, PasswordResetToken
+from app.services.password_hasher import pwd_context, password_hash_pool
+from app.services.audit_writer import audit_writer
+import hashlib
 import secrets
 import os
+import threading
+import time
 
 # Configuración
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
@@ -19,8 +23,88 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 60
 REFRESH_TOKEN_EXPIRE_DAYS = 7
 RESET_TOKEN_EXPIRE_HOURS = 1
 
-# Contexto de hashing de contraseñas
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Caché de tokens validados (segundos de vida y máximo de entradas)
+TOKEN_CACHE_TTL_SECONDS = int(os.getenv("TOKEN_CACHE_TTL_SECONDS", "30"))
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", "10000"))
+
+
+class TokenCache:
+    """
+    Caché en proceso de token JWT validado -> valores del usuario
+    Evita la consulta a la base de datos en cada petición autenticada.
+    Guarda una tupla inmutable y cada acierto arma un User nuevo: un handler que
+    modifique current_user no afecta a otras peticiones.
+    La invalidación solo alcanza a este proceso: con varios workers de uvicorn, otro
+    worker puede seguir aceptando a un usuario desactivado hasta TOKEN_CACHE_TTL_SECONDS.
+    """
+
+    def __init__(self, ttl_seconds: int = TOKEN_CACHE_TTL_SECONDS, max_entries: int = TOKEN_CACHE_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        # token -> (expira, user_id, ((columna, valor), ...))
+        self._entries: Dict[str, Tuple[float, int, Tuple[Tuple[str, Any], ...]]] = {}
+        self._tokens_by_user: Dict[int, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> Optional[User]:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                self._remove(token)
+                return None
+            snapshot = entry[2]
+        return User(**dict(snapshot))
+
+    def put(self, token: str, user: User, token_exp: Optional[float] = None) -> None:
+        """Guarda los valores de las columnas (sin la sesión); nunca vive más que el propio token"""
+        if self.ttl_seconds <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl_seconds
+        if token_exp is not None:
+            expires_at = min(expires_at, time.monotonic() + (token_exp - time.time()))
+
+        snapshot = tuple((column.key, getattr(user, column.key)) for column in User.__table__.columns)
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._purge_expired()
+                if len(self._entries) >= self.max_entries:
+                    self._remove(next(iter(self._entries)))
+            self._entries[token] = (expires_at, user.id, snapshot)
+            self._tokens_by_user.setdefault(user.id, set()).add(token)
+
+    def invalidate_token(self, token: str) -> None:
+        with self._lock:
+            self._remove(token)
+
+    def invalidate_user(self, user_id: int) -> None:
+        with self._lock:
+            for token in list(self._tokens_by_user.get(user_id, ())):
+                self._remove(token)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._tokens_by_user.clear()
+
+    def _remove(self, token: str) -> None:
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+        tokens = self._tokens_by_user.get(entry[1])
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[entry[1]]
+
+    def _purge_expired(self) -> None:
+        now = time.monotonic()
+        for token in [t for t, (expires_at, _, _) in self._entries.items() if expires_at <= now]:
+            self._remove(token)
+
+
+token_cache = TokenCache()
 
 class AuthService:
     """Servicio de autenticación"""
@@ -35,6 +119,16 @@ class AuthService:
         """Generar hash de contraseña"""
         return pwd_context.hash(password)
 
+    @staticmethod
+    async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+        """Verificar contraseña en el pool de hashing (no bloquea el event loop)"""
+        return await password_hash_pool.verify(plain_password, hashed_password)
+
+    @staticmethod
+    async def get_password_hash_async(password: str) -> str:
+        """Generar hash de contraseña en el pool de hashing"""
+        return await password_hash_pool.hash(password)
+
     @staticmethod
     def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
         """Crear token JWT"""
@@ -44,10 +138,16 @@ class AuthService:
         else:
             expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
         
-        to_encode.update({"exp": expire, "iat": datetime.utcnow()})
+        # jti: dos logins del mismo usuario en el mismo segundo generan tokens distintos
+        to_encode.update({"exp": expire, "iat": datetime.utcnow(), "jti": secrets.token_hex(8)})
         encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
         return encoded_jwt
 
+    @staticmethod
+    def hash_token(token: str) -> str:
+        """Digest de tamaño fijo con el que se indexa la sesión de un token"""
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
     @staticmethod
     def decode_token(token: str) -> dict:
         """Decodificar y validar token JWT"""
@@ -73,6 +173,64 @@ class AuthService:
             return None
         return user
 
+    @staticmethod
+    async def authenticate_user_async(db: Session, username: str, password: str) -> Optional[User]:
+        """
+        Autenticar usuario verificando la contraseña en el pool de hashing
+        Si el costo de bcrypt cambió, deja el hash recalculado pendiente en la sesión
+        (se guarda con el commit de record_login)
+        """
+        user = db.query(User).filter(User.username == username).first()
+        if not user:
+            return None
+        valid, new_hash = await password_hash_pool.verify_and_update(password, user.password_hash)
+        if not valid:
+            return None
+        if not user.is_active:
+            return None
+        if new_hash:
+            user.password_hash = new_hash
+        return user
+
+    @staticmethod
+    def record_login(
+        db: Session,
+        user: User,
+        token: str,
+        ip_address: str = None,
+        user_agent: str = None
+    ) -> None:
+        """
+        Registrar un login exitoso en una sola transacción:
+        crea la sesión y actualiza last_login (y el hash rehecho, si lo hay) con un único commit
+        """
+        db.add(UserSession(
+            user_id=user.id,
+            token_hash=AuthService.hash_token(token),
+            expires_at=datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES),
+            ip_address=ip_address,
+            user_agent=user_agent,
+            is_active=True
+        ))
+        user.last_login = datetime.utcnow()
+
+        # El usuario se usa después para la respuesta: no expirarlo evita otro SELECT
+        expire_on_commit = db.expire_on_commit
+        db.expire_on_commit = False
+        try:
+            db.commit()
+        finally:
+            db.expire_on_commit = expire_on_commit
+
+        AuthService.create_audit_log(
+            db=db,
+            user_id=user.id,
+            action_type=ActionType.LOGIN,
+            description=f"Successful login for user: {user.username}",
+            ip_address=ip_address,
+            user_agent=user_agent
+        )
+
     @staticmethod
     def create_user_session(
         db: Session, 
@@ -86,7 +244,7 @@ class AuthService:
         
         session = UserSession(
             user_id=user_id,
-            session_token=token,
+            token_hash=AuthService.hash_token(token),
             expires_at=expires_at,
             ip_address=ip_address,
             user_agent=user_agent,
@@ -101,10 +259,11 @@ class AuthService:
     def invalidate_session(db: Session, token: str) -> bool:
         """Invalidar sesión (logout)"""
         session = db.query(UserSession).filter(
-            UserSession.session_token == token,
+            UserSession.token_hash == AuthService.hash_token(token),
             UserSession.is_active == True
         ).first()
         
+        token_cache.invalidate_token(token)
         if session:
             session.is_active = False
             db.commit()
@@ -119,19 +278,19 @@ class AuthService:
         description: str = None,
         ip_address: str = None,
         user_agent: str = None
-    ) -> AuditLog:
-        """Crear registro de auditoría"""
-        audit_log = AuditLog(
+    ) -> None:
+        """
+        Crear registro de auditoría
+        Se encola en audit_writer y se inserta en bloque en segundo plano
+        (`db` se mantiene por compatibilidad; no se hace commit en la sesión de la petición)
+        """
+        audit_writer.log(
             user_id=user_id,
             action_type=action_type,
             description=description,
             ip_address=ip_address,
             user_agent=user_agent
         )
-        db.add(audit_log)
-        db.commit()
-        db.refresh(audit_log)
-        return audit_log
 
     @staticmethod
     def update_last_login(db: Session, user_id: int) -> None:
@@ -141,9 +300,22 @@ class AuthService:
             user.last_login = datetime.utcnow()
             db.commit()
 
+    @staticmethod
+    def invalidate_cached_user(user_id: int) -> None:
+        """Descartar los tokens en caché de un usuario (al modificarlo o eliminarlo)"""
+        token_cache.invalidate_user(user_id)
+
     @staticmethod
     def get_current_user_from_token(db: Session, token: str) -> User:
-        """Obtener usuario actual desde token"""
+        """
+        Obtener usuario actual desde token
+        El resultado se guarda unos segundos en token_cache; es una copia fuera de la
+        sesión de base de datos, para modificar al usuario hay que volver a consultarlo
+        """
+        cached_user = token_cache.get(token)
+        if cached_user is not None:
+            return cached_user
+
         try:
             payload = AuthService.decode_token(token)
             user_id: int = payload.get("sub")
@@ -171,6 +343,7 @@ class AuthService:
                 detail="Inactive user"
             )
 
+        token_cache.put(token, user, payload.get("exp"))
         return user
 
     @staticmethod
@@ -235,10 +408,10 @@ class AuthService:
         return reset_token
 
     @staticmethod
-    def reset_password_with_token(db: Session, token: str, new_password: str) -> bool:
+    async def reset_password_with_token(db: Session, token: str, new_password: str) -> bool:
         """
         Resetear contraseña usando token válido
-        Marca el token como usado
+        Marca el token como usado; el hash se calcula en el pool de bcrypt
         """
         reset_token = AuthService.verify_reset_token(db, token)
         
@@ -251,13 +424,15 @@ class AuthService:
             return False
         
         # Actualizar contraseña
-        user.password_hash = AuthService.get_password_hash(new_password)
+        user.password_hash = await AuthService.get_password_hash_async(new_password)
         
         # Marcar token como usado
         reset_token.used = True
         reset_token.used_at = datetime.utcnow()
         
         db.commit()
+        # Después del commit: antes, otra petición podría volver a llenar la caché con la fila anterior
+        token_cache.invalidate_user(user.id)
         
         return True
 
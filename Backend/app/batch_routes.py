@@ -0,0 +1,92 @@
+"""
+Rutas de Análisis por Lotes
+Analiza varios archivos Excel (o todas las hojas de uno) en una sola petición
+"""
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query
+from typing import List
+
+from starlette.concurrency import run_in_threadpool
+
+from app.dependencies import get_current_active_user
+from app.model import User
+from app.services.analysis_executor import AnalysisQueueFull
+from app.services.batch_service import BatchService, BATCH_MAX_FILES
+from app.services.excel_service import ExcelService
+
+router = APIRouter(prefix="/upload", tags=["batch"])
+batch_service = BatchService()
+excel_service = ExcelService()
+
+
+@router.post("/batch")
+async def upload_batch(
+    files: List[UploadFile] = File(...),
+    all_sheets: bool = Query(False, description="Analizar todas las hojas de cada libro"),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Analizar un portafolio de archivos Excel - REQUIERE AUTENTICACIÓN
+
+    - **files**: Libros Excel a analizar (máximo BATCH_MAX_FILES)
+    - **all_sheets**: Si es verdadero, cada hoja de cada libro se analiza por separado
+
+    Retorna resultados por archivo/hoja y un resumen consolidado del portafolio
+    """
+    if len(files) > BATCH_MAX_FILES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Máximo {BATCH_MAX_FILES} archivos por lote"
+        )
+
+    print(f"📦 Lote de {len(files)} archivos recibido de {current_user.username}")
+
+    spooled_paths = []
+    try:
+        jobs = []
+        for file in files:
+            if not file.filename.endswith(('.xlsx', '.xls')):
+                jobs.append({"filename": file.filename, "error": "Solo se permiten archivos Excel"})
+                continue
+
+            path = await excel_service.spool_upload(file)
+            spooled_paths.append(path)
+
+            if not all_sheets:
+                jobs.append({"filename": file.filename, "path": path, "sheet": None})
+                continue
+
+            try:
+                # Abrir el libro es bloqueante: fuera del event loop
+                sheet_names = await run_in_threadpool(excel_service.list_sheet_names, path)
+            except Exception as excel_err:
+                jobs.append({
+                    "filename": file.filename,
+                    "error": f"Error al leer el archivo Excel: {str(excel_err)}"
+                })
+                continue
+
+            for sheet_name in sheet_names:
+                jobs.append({"filename": file.filename, "path": path, "sheet": sheet_name})
+
+        try:
+            result = await batch_service.analyze_batch(jobs)
+        except AnalysisQueueFull:
+            raise HTTPException(
+                status_code=429,
+                detail="El servidor está procesando demasiados archivos. Intenta de nuevo en unos segundos.",
+                headers={"Retry-After": "5"}
+            )
+        summary = result["summary"]
+        print(f"✅ Lote completado: {summary['successful']} exitosos, {summary['failed']} con error")
+        return result
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"\n❌ ERROR en lote: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Error procesando lote: {str(e)}")
+    finally:
+        for path in spooled_paths:
+            excel_service.remove_spooled_file(path)
@@ -2,13 +2,14 @@
 Dependencias de FastAPI
 Gestión de base de datos, autenticación y autorización
 """
-from fastapi import Depends, HTTPException, status, Request
+from fastapi import Depends, HTTPException, status, Request, Query
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
-from typing import Generator
+from typing import Dict, Generator, Optional
 from app.database import SessionLocal
 from app.auth_service import AuthService
-from app.model import User, UserRole, AuditLog
+from app.model import User, UserRole, AuditLog, ActionType
+from app.services.analysis_store import analysis_store
 
 # Seguridad HTTP Bearer
 security = HTTPBearer()
@@ -75,6 +76,17 @@ async def get_current_admin_user(
         )
     return current_user
 
+def get_current_analysis(
+    analysis_id: Optional[int] = Query(None, description="ID del análisis (por defecto el último del usuario)"),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+) -> Optional[Dict]:
+    """
+    Dependency para obtener el análisis solicitado del usuario actual
+    Retorna None si el usuario no tiene análisis (cada ruta define su mensaje)
+    """
+    return analysis_store.get(db, current_user.id, analysis_id)
+
 def get_client_ip(request: Request) -> str:
     """
     Obtener IP del cliente
@@ -94,6 +106,24 @@ def get_user_agent(request: Request) -> str:
     """Obtener User-Agent del cliente"""
     return request.headers.get("User-Agent", "unknown")
 
+async def record_export(
+    request: Request,
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Dependency que audita una exportación o reporte descargado
+    Se registra al terminar la ruta; si esta lanza una excepción no se audita
+    """
+    yield
+    AuthService.create_audit_log(
+        db=None,
+        user_id=current_user.id,
+        action_type=ActionType.EXPORT_REPORT,
+        description=f"Export: {request.url.path}",
+        ip_address=get_client_ip(request),
+        user_agent=get_user_agent(request)
+    )
+
 def require_admin(current_user: User = Depends(get_current_active_user)) -> User:
     """
     Verificar que el usuario actual sea administrador
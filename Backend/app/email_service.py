@@ -1,12 +1,23 @@
 """
 Servicio de envío de emails
 Maneja el envío de correos para reset de contraseña
+
+Los correos se encolan y un hilo de fondo los envía reutilizando una sola
+conexión SMTP autenticada, con reintentos y espera exponencial.
+Para probar con un servidor SMTP local de depuración:
+    python -m aiosmtpd -n -l localhost:1025
+    SMTP_SERVER=localhost SMTP_PORT=1025 SMTP_STARTTLS=false SMTP_AUTH=false
 """
+import heapq
+import itertools
 import os
+import queue
 import smtplib
+import threading
+import time
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
@@ -16,9 +27,226 @@ SMTP_SERVER = os.getenv("SMTP_SERVER", "smtp.gmail.com")
 SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
 SMTP_USERNAME = os.getenv("SMTP_USERNAME", "")
 SMTP_PASSWORD = os.getenv("SMTP_PASSWORD", "")
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "true").lower() == "true"
+SMTP_AUTH = os.getenv("SMTP_AUTH", "true").lower() == "true"
+SMTP_TIMEOUT_SECONDS = float(os.getenv("SMTP_TIMEOUT_SECONDS", "10"))
+SMTP_IDLE_CLOSE_SECONDS = float(os.getenv("SMTP_IDLE_CLOSE_SECONDS", "60"))
 FROM_EMAIL = os.getenv("FROM_EMAIL", SMTP_USERNAME)
 FRONTEND_URL = os.getenv("FRONTEND_URL", "https://financial-analysis-system-two.vercel.app")
 
+# Cola de salida
+EMAIL_QUEUE_MAX = int(os.getenv("EMAIL_QUEUE_MAX", "1000"))
+EMAIL_MAX_RETRIES = int(os.getenv("EMAIL_MAX_RETRIES", "5"))
+EMAIL_RETRY_BACKOFF_SECONDS = float(os.getenv("EMAIL_RETRY_BACKOFF_SECONDS", "2"))
+EMAIL_RETRY_MAX_DELAY_SECONDS = float(os.getenv("EMAIL_RETRY_MAX_DELAY_SECONDS", "300"))
+
+
+def email_configured() -> bool:
+    """Hay servidor SMTP utilizable (con credenciales, o sin autenticación si SMTP_AUTH=false)"""
+    if not SMTP_AUTH:
+        return bool(SMTP_SERVER)
+    return bool(SMTP_USERNAME and SMTP_PASSWORD)
+
+
+class OutgoingEmail:
+    """Mensaje ya construido, pendiente de envío"""
+
+    def __init__(self, from_email: str, to_email: str, message: str):
+        self.from_email = from_email
+        self.to_email = to_email
+        self.message = message
+        self.attempts = 0
+
+
+class EmailQueue:
+    """
+    Cola de correos con un hilo de envío
+    Mantiene abierta una conexión SMTP (STARTTLS + login una sola vez) y la cierra
+    tras SMTP_IDLE_CLOSE_SECONDS sin uso; los fallos temporales se reintentan
+    """
+
+    def __init__(
+        self,
+        host: str = SMTP_SERVER,
+        port: int = SMTP_PORT,
+        username: str = SMTP_USERNAME,
+        password: str = SMTP_PASSWORD,
+        starttls: bool = SMTP_STARTTLS,
+        auth: bool = SMTP_AUTH,
+        timeout: float = SMTP_TIMEOUT_SECONDS,
+        idle_close: float = SMTP_IDLE_CLOSE_SECONDS,
+        max_queue: int = EMAIL_QUEUE_MAX,
+        max_retries: int = EMAIL_MAX_RETRIES,
+        backoff: float = EMAIL_RETRY_BACKOFF_SECONDS,
+        max_delay: float = EMAIL_RETRY_MAX_DELAY_SECONDS
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.auth = auth
+        self.timeout = timeout
+        self.idle_close = idle_close
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_delay = max_delay
+
+        self._queue: "queue.Queue[OutgoingEmail]" = queue.Queue(maxsize=max_queue)
+        self._retries: List[Tuple[float, int, OutgoingEmail]] = []
+        self._sequence = itertools.count()
+        self._smtp: Optional[smtplib.SMTP] = None
+        self._last_used = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        # Métricas
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.rejected = 0
+        self.connections = 0
+
+    def submit(self, email: OutgoingEmail) -> bool:
+        """
+        Encolar un correo; retorna False si la cola está llena
+        Sin hilo de fondo (scripts, pruebas) se envía de inmediato, un solo intento
+        """
+        if self._thread is None:
+            try:
+                self._send(email)
+                self.sent += 1
+                return True
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Error sending email to {email.to_email}: {str(e)}")
+                print(f"❌ Error enviando email: {str(e)}")
+                return False
+            finally:
+                self._disconnect()
+
+        try:
+            self._queue.put_nowait(email)
+            return True
+        except queue.Full:
+            self.rejected += 1
+            logger.error(f"Email queue full. Email to {email.to_email} discarded")
+            print(f"❌ Cola de emails llena, no se envió a: {email.to_email}")
+            return False
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="email-sender", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Detener el hilo tras enviar lo ya encolado (los reintentos pendientes se descartan)"""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def stats(self) -> Dict:
+        return {
+            "pending": self._queue.qsize(),
+            "retrying": len(self._retries),
+            "sent": self.sent,
+            "failed": self.failed,
+            "retried": self.retried,
+            "rejected": self.rejected,
+            "connections": self.connections,
+        }
+
+    def _connection(self) -> smtplib.SMTP:
+        if self._smtp is None:
+            smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            try:
+                if self.starttls:
+                    smtp.starttls()
+                if self.auth:
+                    smtp.login(self.username, self.password)
+            except Exception:
+                smtp.close()
+                raise
+            self._smtp = smtp
+            self._last_used = time.monotonic()
+            self.connections += 1
+        return self._smtp
+
+    def _disconnect(self) -> None:
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except Exception:
+                self._smtp.close()
+            self._smtp = None
+
+    def _send(self, email: OutgoingEmail) -> None:
+        try:
+            self._connection().sendmail(email.from_email, [email.to_email], email.message)
+        except smtplib.SMTPServerDisconnected:
+            # El servidor cerró la conexión reutilizada: cerrar el socket y reconectar una vez
+            self._disconnect()
+            self._connection().sendmail(email.from_email, [email.to_email], email.message)
+        self._last_used = time.monotonic()
+
+    def _attempt(self, email: OutgoingEmail) -> None:
+        email.attempts += 1
+        try:
+            self._send(email)
+        except Exception as e:
+            rejected = isinstance(e, (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused))
+            if not rejected:
+                # Error de red: la conexión ya no es confiable
+                self._disconnect()
+            permanent = isinstance(e, smtplib.SMTPRecipientsRefused) or (
+                isinstance(e, smtplib.SMTPResponseException) and 500 <= e.smtp_code < 600
+            )
+            if permanent or email.attempts > self.max_retries:
+                self.failed += 1
+                logger.error(f"Error sending email to {email.to_email}: {str(e)}")
+                print(f"❌ Error enviando email a {email.to_email} ({email.attempts} intentos): {str(e)}")
+                return
+            delay = min(self.backoff * 2 ** (email.attempts - 1), self.max_delay)
+            heapq.heappush(self._retries, (time.monotonic() + delay, next(self._sequence), email))
+            self.retried += 1
+            print(f"⚠️ Email a {email.to_email} falló, reintento en {delay:.0f}s: {str(e)}")
+            return
+
+        self.sent += 1
+        logger.info(f"Email sent successfully to {email.to_email}")
+        print(f"✅ Email enviado a: {email.to_email}")
+
+    def _run(self) -> None:
+        while True:
+            now = time.monotonic()
+            while self._retries and self._retries[0][0] <= now:
+                self._attempt(heapq.heappop(self._retries)[2])
+
+            if self._stop.is_set() and self._queue.empty():
+                break
+
+            wait = 1.0
+            if self._retries:
+                wait = max(0.0, min(wait, self._retries[0][0] - now))
+            try:
+                self._attempt(self._queue.get(timeout=wait))
+            except queue.Empty:
+                pass
+
+            if self._smtp is not None and time.monotonic() - self._last_used > self.idle_close:
+                self._disconnect()
+
+        if self._retries:
+            print(f"⚠️ {len(self._retries)} emails pendientes de reintento descartados al detener")
+        self._disconnect()
+
+
+# Instancia compartida; main.py la inicia y la detiene con la aplicación
+email_queue = EmailQueue()
+
 class EmailService:
     """Servicio para enviar emails"""
 
@@ -31,43 +259,31 @@ class EmailService:
     ) -> bool:
         """
         Enviar email usando SMTP
+        Retorna True si el correo quedó encolado (o enviado, sin hilo de fondo)
         """
         # Verificar si el servicio de email está configurado
-        if not SMTP_USERNAME or not SMTP_PASSWORD:
+        if not email_configured():
             logger.warning("SMTP credentials not configured. Email not sent.")
             print(f"⚠️ Email no configurado. Token para {to_email}:")
             print(f"🔗 Link de reset: {html_content}")
             return False
 
-        try:
-            # Crear mensaje
-            message = MIMEMultipart("alternative")
-            message["Subject"] = subject
-            message["From"] = FROM_EMAIL
-            message["To"] = to_email
-
-            # Agregar contenido
-            if text_content:
-                part1 = MIMEText(text_content, "plain")
-                message.attach(part1)
-
-            part2 = MIMEText(html_content, "html")
-            message.attach(part2)
-
-            # Conectar y enviar
-            with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as server:
-                server.starttls()
-                server.login(SMTP_USERNAME, SMTP_PASSWORD)
-                server.sendmail(FROM_EMAIL, to_email, message.as_string())
-
-            logger.info(f"Email sent successfully to {to_email}")
-            print(f"✅ Email enviado a: {to_email}")
-            return True
+        # Crear mensaje
+        message = MIMEMultipart("alternative")
+        message["Subject"] = subject
+        message["From"] = FROM_EMAIL
+        message["To"] = to_email
 
-        except Exception as e:
-            logger.error(f"Error sending email to {to_email}: {str(e)}")
-            print(f"❌ Error enviando email: {str(e)}")
-            return False
+        # Agregar contenido
+        if text_content:
+            part1 = MIMEText(text_content, "plain")
+            message.attach(part1)
+
+        part2 = MIMEText(html_content, "html")
+        message.attach(part2)
+
+        # Encolar: el hilo de envío se encarga de la conexión y los reintentos
+        return email_queue.submit(OutgoingEmail(FROM_EMAIL, to_email, message.as_string()))
 
     @staticmethod
     def send_password_reset_email(
@@ -1,38 +1,27 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import StreamingResponse
-from typing import Optional
+from typing import Dict, Optional
 from datetime import datetime
 
-from app.dependencies import get_current_active_user
+from app.dependencies import get_current_active_user, get_current_analysis, record_export
 from app.model import User
+from app.services.chat_context import without_chat_context
 from app.services.export_service import ExportService
+from app.services.report_cache import report_cache
 
 router = APIRouter(prefix="/export", tags=["export"])
 export_service = ExportService()
 
-# Variable global para almacenar el último análisis
-_last_analysis = None
 
-def set_last_analysis(data):
-    """Actualiza el último análisis desde main.py"""
-    global _last_analysis
-    _last_analysis = data
-
-def get_last_analysis():
-    """Obtiene el último análisis disponible"""
-    return _last_analysis
-
-
-@router.get("/excel/complete")
+@router.get("/excel/complete", dependencies=[Depends(record_export)])
 async def export_complete_excel(
+    analysis_data: Optional[Dict] = Depends(get_current_analysis),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Exportar análisis completo a Excel
     Incluye: Portada, Resumen, Indicadores, Análisis H/V, Datos Crudos
     """
-    analysis_data = get_last_analysis()
-    
     if not analysis_data:
         raise HTTPException(
             status_code=400, 
@@ -40,9 +29,9 @@ async def export_complete_excel(
         )
     
     try:
-        excel_file = export_service.create_excel_report(
-            analysis_data, 
-            report_type="complete"
+        excel_file = report_cache.get_or_render(
+            current_user.id, analysis_data, "export:complete",
+            lambda: export_service.create_excel_report(analysis_data, report_type="complete")
         )
         
         filename = f"analisis_completo_{current_user.username}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
@@ -63,16 +52,15 @@ async def export_complete_excel(
         )
 
 
-@router.get("/excel/summary")
+@router.get("/excel/summary", dependencies=[Depends(record_export)])
 async def export_summary_excel(
+    analysis_data: Optional[Dict] = Depends(get_current_analysis),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Exportar resumen ejecutivo a Excel
     Incluye: Portada y Resumen Ejecutivo
     """
-    analysis_data = get_last_analysis()
-    
     if not analysis_data:
         raise HTTPException(
             status_code=400, 
@@ -80,9 +68,9 @@ async def export_summary_excel(
         )
     
     try:
-        excel_file = export_service.create_excel_report(
-            analysis_data, 
-            report_type="summary"
+        excel_file = report_cache.get_or_render(
+            current_user.id, analysis_data, "export:summary",
+            lambda: export_service.create_excel_report(analysis_data, report_type="summary")
         )
         
         filename = f"resumen_ejecutivo_{current_user.username}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
@@ -101,16 +89,15 @@ async def export_summary_excel(
         )
 
 
-@router.get("/excel/indicators")
+@router.get("/excel/indicators", dependencies=[Depends(record_export)])
 async def export_indicators_excel(
+    analysis_data: Optional[Dict] = Depends(get_current_analysis),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Exportar solo indicadores a Excel
     Incluye: Liquidez, Rentabilidad, Endeudamiento, Rotación, Quiebra
     """
-    analysis_data = get_last_analysis()
-    
     if not analysis_data:
         raise HTTPException(
             status_code=400, 
@@ -118,9 +105,9 @@ async def export_indicators_excel(
         )
     
     try:
-        excel_file = export_service.create_excel_report(
-            analysis_data, 
-            report_type="indicators"
+        excel_file = report_cache.get_or_render(
+            current_user.id, analysis_data, "export:indicators",
+            lambda: export_service.create_excel_report(analysis_data, report_type="indicators")
         )
         
         filename = f"indicadores_{current_user.username}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
@@ -139,15 +126,14 @@ async def export_indicators_excel(
         )
 
 
-@router.get("/excel/analysis")
+@router.get("/excel/analysis", dependencies=[Depends(record_export)])
 async def export_analysis_excel(
+    analysis_data: Optional[Dict] = Depends(get_current_analysis),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Exportar análisis horizontal y vertical a Excel
     """
-    analysis_data = get_last_analysis()
-    
     if not analysis_data:
         raise HTTPException(
             status_code=400, 
@@ -161,9 +147,9 @@ async def export_analysis_excel(
         )
     
     try:
-        excel_file = export_service.create_excel_report(
-            analysis_data, 
-            report_type="analysis"
+        excel_file = report_cache.get_or_render(
+            current_user.id, analysis_data, "export:analysis",
+            lambda: export_service.create_excel_report(analysis_data, report_type="analysis")
         )
         
         filename = f"analisis_h_v_{current_user.username}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
@@ -182,15 +168,14 @@ async def export_analysis_excel(
         )
 
 
-@router.get("/excel/comparative")
+@router.get("/excel/comparative", dependencies=[Depends(record_export)])
 async def export_comparative_excel(
+    analysis_data: Optional[Dict] = Depends(get_current_analysis),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Exportar análisis comparativo multianual a Excel
     """
-    analysis_data = get_last_analysis()
-    
     if not analysis_data:
         raise HTTPException(
             status_code=400, 
@@ -198,9 +183,9 @@ async def export_comparative_excel(
         )
     
     try:
-        excel_file = export_service.create_excel_report(
-            analysis_data, 
-            report_type="comparative"
+        excel_file = report_cache.get_or_render(
+            current_user.id, analysis_data, "export:comparative",
+            lambda: export_service.create_excel_report(analysis_data, report_type="comparative")
         )
         
         filename = f"comparativo_{current_user.username}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
@@ -219,9 +204,10 @@ async def export_comparative_excel(
         )
 
 
-@router.get("/csv")
+@router.get("/csv", dependencies=[Depends(record_export)])
 async def export_to_csv(
     category: Optional[str] = Query(None, description="Categoría específica a exportar"),
+    analysis_data: Optional[Dict] = Depends(get_current_analysis),
     current_user: User = Depends(get_current_active_user)
 ):
     """
@@ -230,8 +216,6 @@ async def export_to_csv(
     Args:
         category: liquidez, rentabilidad, endeudamiento, rotacion, quiebra (opcional)
     """
-    analysis_data = get_last_analysis()
-    
     if not analysis_data:
         raise HTTPException(
             status_code=400, 
@@ -258,15 +242,14 @@ async def export_to_csv(
         )
 
 
-@router.get("/json")
+@router.get("/json", dependencies=[Depends(record_export)])
 async def export_to_json(
+    analysis_data: Optional[Dict] = Depends(get_current_analysis),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Exportar datos a formato JSON
     """
-    analysis_data = get_last_analysis()
-    
     if not analysis_data:
         raise HTTPException(
             status_code=400, 
@@ -274,7 +257,7 @@ async def export_to_json(
         )
     
     try:
-        json_data = export_service.export_to_json(analysis_data)
+        json_data = export_service.export_to_json(without_chat_context(analysis_data))
         
         filename = f"datos_{current_user.username}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
         
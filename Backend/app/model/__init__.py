@@ -1,3 +1,3 @@
-from app.models import User, Session, AuditLog, UserRole, ActionType, PasswordResetToken
+from app.models import User, Session, AuditLog, UserRole, ActionType, PasswordResetToken, AnalysisResult, UserActivityDaily
 
-__all__ = ['User', 'Session', 'AuditLog', 'UserRole', 'ActionType', 'PasswordResetToken']
+__all__ = ['User', 'Session', 'AuditLog', 'UserRole', 'ActionType', 'PasswordResetToken', 'AnalysisResult', 'UserActivityDaily']
@@ -2,7 +2,7 @@
 Modelos de Base de Datos - Sistema de Autenticación
 SQLAlchemy Models para PostgreSQL
 """
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Enum as SQLEnum, Text
+from sqlalchemy import Column, Integer, String, Boolean, Date, DateTime, ForeignKey, Enum as SQLEnum, Text, JSON, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -45,10 +45,25 @@ class User(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     last_login = Column(DateTime(timezone=True), nullable=True)
 
+    __table_args__ = (
+        # Búsqueda por prefijo sin distinguir mayúsculas: lower(columna) LIKE 'term%'
+        Index(
+            "idx_users_username_lower_pattern",
+            func.lower(username).label("username_lower"),
+            postgresql_ops={"username_lower": "text_pattern_ops"},
+        ),
+        Index(
+            "idx_users_email_lower_pattern",
+            func.lower(email).label("email_lower"),
+            postgresql_ops={"email_lower": "text_pattern_ops"},
+        ),
+    )
+
     # Relaciones
     sessions = relationship("Session", back_populates="user", cascade="all, delete-orphan")
     audit_logs = relationship("AuditLog", back_populates="user", cascade="all, delete-orphan")
     password_reset_tokens = relationship("PasswordResetToken", back_populates="user", cascade="all, delete-orphan")
+    analysis_results = relationship("AnalysisResult", back_populates="user", cascade="all, delete-orphan")
 
     def __repr__(self):
         return f"<User(id={self.id}, username='{self.username}', role='{self.role}')>"
@@ -59,7 +74,8 @@ class Session(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
-    session_token = Column(String(500), unique=True, nullable=False, index=True)
+    # SHA-256 (hex) del JWT: índice de tamaño fijo; el token completo no se guarda
+    token_hash = Column(String(64), unique=True, nullable=False, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     expires_at = Column(DateTime(timezone=True), nullable=False)
     ip_address = Column(String(45), nullable=True)
@@ -75,6 +91,11 @@ class Session(Base):
 class AuditLog(Base):
     """Modelo de Auditoría de Acciones"""
     __tablename__ = "audit_logs"
+    # Consultas por usuario o por acción dentro de un rango de tiempo (/admin/audit)
+    __table_args__ = (
+        Index("idx_audit_logs_user_id_created_at", "user_id", "created_at"),
+        Index("idx_audit_logs_action_type_created_at", "action_type", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
@@ -107,4 +128,35 @@ class PasswordResetToken(Base):
 
     def __repr__(self):
         return f"<PasswordResetToken(id={self.id}, user_id={self.user_id}, used={self.used})>"
-    
+
+class AnalysisResult(Base):
+    """Modelo de Resultado de Análisis Financiero"""
+    __tablename__ = "analysis_results"
+    __table_args__ = (
+        Index("idx_analysis_results_user_id_id", "user_id", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    filename = Column(String(255), nullable=True)
+    data = Column(JSON, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Relación
+    user = relationship("User", back_populates="analysis_results")
+
+    def __repr__(self):
+        return f"<AnalysisResult(id={self.id}, user_id={self.user_id}, filename='{self.filename}')>"
+
+class UserActivityDaily(Base):
+    """Resumen diario de actividad por usuario (mantenido por audit_writer)"""
+    __tablename__ = "user_activity_daily"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)  # día UTC
+    logins = Column(Integer, default=0, nullable=False)
+    uploads = Column(Integer, default=0, nullable=False)
+    exports = Column(Integer, default=0, nullable=False)
+
+    def __repr__(self):
+        return f"<UserActivityDaily(user_id={self.user_id}, day={self.day}, logins={self.logins})>"
@@ -1,40 +1,28 @@
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.responses import StreamingResponse
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, List, Optional
 
-from app.dependencies import get_current_active_user
+from app.dependencies import get_current_active_user, get_current_analysis, record_export
 from app.model import User
 from app.services.export_service import ExportService
 from app.services.report_service import ReportService
+from app.services.report_cache import report_cache
 
 router = APIRouter(prefix="/reports", tags=["reports"])
 export_service = ExportService()
 report_service = ReportService()
 
-# Variable global para almacenar el último análisis
-_last_analysis = None
 
-def set_last_analysis(data):
-    """Actualiza el último análisis"""
-    global _last_analysis
-    _last_analysis = data
-
-def get_last_analysis():
-    """Obtiene el último análisis"""
-    return _last_analysis
-
-
-@router.get("/liquidez")
+@router.get("/liquidez", dependencies=[Depends(record_export)])
 async def generate_liquidity_report(
+    analysis_data: Optional[Dict] = Depends(get_current_analysis),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     📊 Reporte de Liquidez
     Análisis detallado de la capacidad de pago a corto plazo
     """
-    analysis_data = get_last_analysis()
-    
     if not analysis_data:
         raise HTTPException(
             status_code=400,
@@ -42,7 +30,10 @@ async def generate_liquidity_report(
         )
     
     try:
-        excel_file = report_service.create_liquidity_report(analysis_data)
+        excel_file = report_cache.get_or_render(
+            current_user.id, analysis_data, "report:liquidez",
+            lambda: report_service.create_liquidity_report(analysis_data)
+        )
         filename = f"reporte_liquidez_{current_user.username}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
         
         return StreamingResponse(
@@ -55,16 +46,15 @@ async def generate_liquidity_report(
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
 
-@router.get("/rentabilidad")
+@router.get("/rentabilidad", dependencies=[Depends(record_export)])
 async def generate_profitability_report(
+    analysis_data: Optional[Dict] = Depends(get_current_analysis),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     💰 Reporte de Rentabilidad
     Análisis de márgenes, ROE, ROA y capacidad de generar utilidades
     """
-    analysis_data = get_last_analysis()
-    
     if not analysis_data:
         raise HTTPException(
             status_code=400,
@@ -72,7 +62,10 @@ async def generate_profitability_report(
         )
     
     try:
-        excel_file = report_service.create_profitability_report(analysis_data)
+        excel_file = report_cache.get_or_render(
+            current_user.id, analysis_data, "report:rentabilidad",
+            lambda: report_service.create_profitability_report(analysis_data)
+        )
         filename = f"reporte_rentabilidad_{current_user.username}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
         
         return StreamingResponse(
@@ -85,16 +78,15 @@ async def generate_profitability_report(
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
 
-@router.get("/endeudamiento")
+@router.get("/endeudamiento", dependencies=[Depends(record_export)])
 async def generate_debt_report(
+    analysis_data: Optional[Dict] = Depends(get_current_analysis),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     📉 Reporte de Endeudamiento
     Análisis de estructura de deuda y capacidad de pago
     """
-    analysis_data = get_last_analysis()
-    
     if not analysis_data:
         raise HTTPException(
             status_code=400,
@@ -102,7 +94,10 @@ async def generate_debt_report(
         )
     
     try:
-        excel_file = report_service.create_debt_report(analysis_data)
+        excel_file = report_cache.get_or_render(
+            current_user.id, analysis_data, "report:endeudamiento",
+            lambda: report_service.create_debt_report(analysis_data)
+        )
         filename = f"reporte_endeudamiento_{current_user.username}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
         
         return StreamingResponse(
@@ -115,16 +110,15 @@ async def generate_debt_report(
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
 
-@router.get("/eficiencia")
+@router.get("/eficiencia", dependencies=[Depends(record_export)])
 async def generate_efficiency_report(
+    analysis_data: Optional[Dict] = Depends(get_current_analysis),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     🔄 Reporte de Eficiencia Operativa
     Análisis de rotación de inventarios, cartera y activos
     """
-    analysis_data = get_last_analysis()
-    
     if not analysis_data:
         raise HTTPException(
             status_code=400,
@@ -132,7 +126,10 @@ async def generate_efficiency_report(
         )
     
     try:
-        excel_file = report_service.create_efficiency_report(analysis_data)
+        excel_file = report_cache.get_or_render(
+            current_user.id, analysis_data, "report:eficiencia",
+            lambda: report_service.create_efficiency_report(analysis_data)
+        )
         filename = f"reporte_eficiencia_{current_user.username}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
         
         return StreamingResponse(
@@ -145,16 +142,15 @@ async def generate_efficiency_report(
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
 
-@router.get("/riesgo")
+@router.get("/riesgo", dependencies=[Depends(record_export)])
 async def generate_risk_report(
+    analysis_data: Optional[Dict] = Depends(get_current_analysis),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     ⚠️ Reporte de Análisis de Riesgo
     Z-Score, probabilidad de quiebra y alertas financieras
     """
-    analysis_data = get_last_analysis()
-    
     if not analysis_data:
         raise HTTPException(
             status_code=400,
@@ -162,7 +158,10 @@ async def generate_risk_report(
         )
     
     try:
-        excel_file = report_service.create_risk_report(analysis_data)
+        excel_file = report_cache.get_or_render(
+            current_user.id, analysis_data, "report:riesgo",
+            lambda: report_service.create_risk_report(analysis_data)
+        )
         filename = f"reporte_riesgo_{current_user.username}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
         
         return StreamingResponse(
@@ -175,16 +174,15 @@ async def generate_risk_report(
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
 
-@router.get("/ejecutivo")
+@router.get("/ejecutivo", dependencies=[Depends(record_export)])
 async def generate_executive_report(
+    analysis_data: Optional[Dict] = Depends(get_current_analysis),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     📋 Reporte Ejecutivo
     Resumen de alto nivel para directivos y toma de decisiones
     """
-    analysis_data = get_last_analysis()
-    
     if not analysis_data:
         raise HTTPException(
             status_code=400,
@@ -192,7 +190,10 @@ async def generate_executive_report(
         )
     
     try:
-        excel_file = report_service.create_executive_report(analysis_data)
+        excel_file = report_cache.get_or_render(
+            current_user.id, analysis_data, "report:ejecutivo",
+            lambda: report_service.create_executive_report(analysis_data)
+        )
         filename = f"reporte_ejecutivo_{current_user.username}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
         
         return StreamingResponse(
@@ -205,16 +206,15 @@ async def generate_executive_report(
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
 
-@router.get("/completo")
+@router.get("/completo", dependencies=[Depends(record_export)])
 async def generate_complete_report(
+    analysis_data: Optional[Dict] = Depends(get_current_analysis),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     📊 Reporte Completo
     Análisis integral con todas las secciones y recomendaciones
     """
-    analysis_data = get_last_analysis()
-    
     if not analysis_data:
         raise HTTPException(
             status_code=400,
@@ -222,7 +222,10 @@ async def generate_complete_report(
         )
     
     try:
-        excel_file = report_service.create_complete_report(analysis_data)
+        excel_file = report_cache.get_or_render(
+            current_user.id, analysis_data, "report:completo",
+            lambda: report_service.create_complete_report(analysis_data)
+        )
         filename = f"reporte_completo_{current_user.username}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
         
         return StreamingResponse(
@@ -235,16 +238,15 @@ async def generate_complete_report(
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
 
-@router.get("/comparativo-sectorial")
+@router.get("/comparativo-sectorial", dependencies=[Depends(record_export)])
 async def generate_sector_comparison_report(
+    analysis_data: Optional[Dict] = Depends(get_current_analysis),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     📈 Reporte Comparativo Sectorial
     Benchmarking con promedios de la industria
     """
-    analysis_data = get_last_analysis()
-    
     if not analysis_data:
         raise HTTPException(
             status_code=400,
@@ -252,7 +254,10 @@ async def generate_sector_comparison_report(
         )
     
     try:
-        excel_file = report_service.create_sector_comparison_report(analysis_data)
+        excel_file = report_cache.get_or_render(
+            current_user.id, analysis_data, "report:comparativo_sectorial",
+            lambda: report_service.create_sector_comparison_report(analysis_data)
+        )
         filename = f"reporte_comparativo_sectorial_{current_user.username}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
         
         return StreamingResponse(
@@ -165,4 +165,18 @@ class PasswordResetConfirm(BaseModel):
     def validate_password(cls, v):
         if len(v) < 6:
             raise ValueError('Password must be at least 6 characters long')
-        return v
\ No newline at end of file
+        return v
+# ============ SCHEMAS DE AUDITORÍA ============
+
+class AuditLogResponse(BaseModel):
+    """Schema de respuesta de registro de auditoría"""
+    id: int
+    user_id: Optional[int]
+    action_type: str
+    description: Optional[str]
+    ip_address: Optional[str]
+    user_agent: Optional[str]
+    created_at: Optional[datetime]
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,101 @@
+"""
+Resumen diario de actividad por usuario (tabla user_activity_daily)
+Se actualiza de forma incremental en la misma transacción en que audit_writer
+inserta los registros de auditoría, en lugar de agregar audit_logs al leer
+"""
+from collections import defaultdict
+from datetime import date, datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, insert, select, update
+
+from app.models import ActionType, UserActivityDaily
+
+# Acción de auditoría -> columna del resumen
+ROLLUP_COLUMNS = {
+    ActionType.LOGIN: "logins",
+    ActionType.UPLOAD_FILE: "uploads",
+    ActionType.EXPORT_REPORT: "exports",
+}
+
+
+def aggregate(rows: Iterable[Dict]) -> Dict[Tuple[int, date], Dict[str, int]]:
+    """Contar eventos por (usuario, día UTC); se ignoran los que no tienen usuario"""
+    counts: Dict[Tuple[int, date], Dict[str, int]] = defaultdict(lambda: dict.fromkeys(ROLLUP_COLUMNS.values(), 0))
+    for row in rows:
+        column = ROLLUP_COLUMNS.get(row["action_type"])
+        if column is None or row["user_id"] is None:
+            continue
+        created_at = row.get("created_at") or datetime.now(timezone.utc)
+        counts[(row["user_id"], created_at.astimezone(timezone.utc).date())][column] += 1
+    return counts
+
+
+def apply_rollup(db, rows: Iterable[Dict]) -> int:
+    """
+    Sumar los eventos al resumen (sin commit: va en la transacción de la auditoría)
+    Retorna cuántas filas (usuario, día) se tocaron
+    """
+    counts = aggregate(rows)
+    if not counts:
+        return 0
+
+    dialect = db.bind.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as upsert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as upsert
+        values = [
+            {"user_id": user_id, "day": day, **columns}
+            for (user_id, day), columns in counts.items()
+        ]
+        statement = upsert(UserActivityDaily)
+        db.execute(
+            statement.on_conflict_do_update(
+                index_elements=["user_id", "day"],
+                set_={
+                    column: getattr(UserActivityDaily, column) + getattr(statement.excluded, column)
+                    for column in ROLLUP_COLUMNS.values()
+                }
+            ),
+            values
+        )
+        return len(values)
+
+    # Otros motores: actualizar y, si la fila no existía, insertarla
+    for (user_id, day), columns in counts.items():
+        result = db.execute(
+            update(UserActivityDaily)
+            .where(UserActivityDaily.user_id == user_id, UserActivityDaily.day == day)
+            .values({column: getattr(UserActivityDaily, column) + amount for column, amount in columns.items()})
+        )
+        if result.rowcount == 0:
+            db.execute(insert(UserActivityDaily).values(user_id=user_id, day=day, **columns))
+    return len(counts)
+
+
+def activity_summary(db, start: Optional[date] = None, end: Optional[date] = None) -> List[Dict]:
+    """Totales por usuario en el rango de días [start, end] leyendo solo el resumen"""
+    query = select(
+        UserActivityDaily.user_id,
+        func.sum(UserActivityDaily.logins).label("logins"),
+        func.sum(UserActivityDaily.uploads).label("uploads"),
+        func.sum(UserActivityDaily.exports).label("exports"),
+        func.max(UserActivityDaily.day).label("last_active_day"),
+    ).group_by(UserActivityDaily.user_id).order_by(UserActivityDaily.user_id)
+    if start is not None:
+        query = query.where(UserActivityDaily.day >= start)
+    if end is not None:
+        query = query.where(UserActivityDaily.day <= end)
+
+    return [
+        {
+            "user_id": row.user_id,
+            "logins": int(row.logins or 0),
+            "uploads": int(row.uploads or 0),
+            "exports": int(row.exports or 0),
+            "last_active_day": row.last_active_day.isoformat() if row.last_active_day else None,
+        }
+        for row in db.execute(query)
+    ]
@@ -0,0 +1,76 @@
+"""
+Caché de análisis direccionada por contenido
+Un mismo archivo (mismo hash SHA-256 y misma versión del parser) no se vuelve a leer ni analizar
+"""
+import copy
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from app.services.analysis_service import PARSER_VERSION
+
+# Configuración
+ANALYSIS_RESULT_CACHE_SIZE = int(os.getenv("ANALYSIS_RESULT_CACHE_SIZE", "64"))
+
+
+class AnalysisCache:
+    """LRU acotada de resultados de analyze_financial_data por hash de archivo"""
+
+    def __init__(self, max_entries: int = ANALYSIS_RESULT_CACHE_SIZE, parser_version: str = PARSER_VERSION):
+        self.max_entries = max_entries
+        self.parser_version = parser_version
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def make_key(self, file_digest: str, sheet_name: Optional[str] = None) -> str:
+        """Clave: versión del parser + hash del archivo (+ hoja, si no es la primera)"""
+        return f"{self.parser_version}:{file_digest}:{sheet_name or ''}"
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Copia del resultado en caché (quien llama puede modificarla) o None"""
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return copy.deepcopy(result)
+
+    def put(self, key: str, result: Dict) -> None:
+        """Guardar una copia del resultado sin metadatos de la subida"""
+        if self.max_entries <= 0:
+            return
+        result = copy.deepcopy(result)
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        """Contadores de aciertos/fallos y ocupación"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "parser_version": self.parser_version,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+# Instancia compartida por las rutas de carga
+analysis_cache = AnalysisCache()
@@ -0,0 +1,114 @@
+"""
+Ejecución del análisis fuera del event loop
+Pool de procesos (o hilos) configurable con cola acotada y métricas, compartido
+por /upload, /upload/batch y /upload/jobs: todos respetan el mismo límite
+"""
+import multiprocessing
+import os
+import queue
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.services.analysis_service import AnalysisService
+from app.services.bounded_executor import BoundedExecutor, QueueFull
+from app.services.excel_service import ExcelService
+
+# Configuración
+ANALYSIS_EXECUTOR = os.getenv("ANALYSIS_EXECUTOR", "process")  # "process" o "thread"
+ANALYSIS_MAX_WORKERS = int(os.getenv("ANALYSIS_MAX_WORKERS", str(min(4, os.cpu_count() or 2))))
+ANALYSIS_MAX_QUEUE = int(os.getenv("ANALYSIS_MAX_QUEUE", "16"))
+
+# Servicios por proceso/hilo del pool (cada worker de procesos crea los suyos)
+_worker_excel_service = None
+
+
+class AnalysisQueueFull(QueueFull):
+    """No hay espacio en la cola de análisis"""
+
+
+class ExcelReadError(Exception):
+    """El archivo no se pudo leer como libro Excel"""
+
+
+def read_and_analyze(
+    path: str,
+    sheet_name: Optional[str] = None,
+    progress: Optional[Callable[[str, str], None]] = None
+) -> Dict:
+    """
+    Lee la hoja en modo streaming y ejecuta AnalysisService (se ejecuta dentro del pool)
+    Con el pool de procesos `progress` debe ser un QueueProgress (un callable común no se envía a otro proceso)
+    """
+    global _worker_excel_service
+    if _worker_excel_service is None:
+        _worker_excel_service = ExcelService(AnalysisService())
+
+    try:
+        df = _worker_excel_service.read_financial_sheet(path, sheet_name)
+    except Exception as excel_err:
+        raise ExcelReadError(str(excel_err)) from excel_err
+
+    print(f"📊 Dimensiones del DataFrame: {df.shape}")
+    print(f"📋 Primeras columnas: {df.columns.tolist()[:5]}")
+    if progress:
+        progress("file_read", f"Archivo leído: {df.shape[0]} filas")
+    # El lector ya quitó las columnas vacías considerando la hoja completa
+    return _worker_excel_service.analysis_service.analyze_financial_data(df, progress, drop_empty_columns=False)
+
+
+class QueueProgress:
+    """
+    Callback de progreso que cruza al pool de procesos: cada (etapa, mensaje)
+    va a una cola de multiprocessing.Manager que se vacía con drain_progress
+    """
+
+    def __init__(self, progress_queue):
+        self.queue = progress_queue
+
+    def __call__(self, stage: str, message: str) -> None:
+        self.queue.put((stage, message))
+
+
+def drain_progress(progress_queue) -> List[Tuple[str, str]]:
+    """Eventos pendientes de la cola sin esperar (bloquea lo que tarda la consulta al Manager)"""
+    events = []
+    while True:
+        try:
+            events.append(progress_queue.get_nowait())
+        except queue.Empty:
+            return events
+
+
+class AnalysisExecutor(BoundedExecutor):
+    """Ejecuta trabajos de análisis en un pool con backpressure"""
+
+    full_error = AnalysisQueueFull
+    thread_name_prefix = "analysis"
+
+    def __init__(
+        self,
+        kind: str = ANALYSIS_EXECUTOR,
+        max_workers: int = ANALYSIS_MAX_WORKERS,
+        max_queue: int = ANALYSIS_MAX_QUEUE
+    ):
+        super().__init__(kind, max_workers, max_queue)
+        self._manager = None
+        self._manager_lock = threading.Lock()
+
+    def progress_queue(self):
+        """Cola para QueueProgress (el proceso Manager se inicia con la primera que se pide)"""
+        with self._manager_lock:
+            if self._manager is None:
+                self._manager = multiprocessing.Manager()
+            return self._manager.Queue()
+
+    def shutdown(self) -> None:
+        super().shutdown()
+        with self._manager_lock:
+            if self._manager is not None:
+                self._manager.shutdown()
+                self._manager = None
+
+
+# Instancia compartida por todas las rutas de carga del proceso
+analysis_executor = AnalysisExecutor()
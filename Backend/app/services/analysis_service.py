@@ -1,18 +1,98 @@
 import pandas as pd
-from typing import Dict, List
+from typing import Callable, Dict, List, Optional, Tuple
 import numpy as np
 import re
 
+from app.services.indicator_engine import IndicatorEngine
+
+# Versión del lector/analizador: cambiarla invalida los resultados en caché
+PARSER_VERSION = "2"
+
+# Patrones de fecha para detectar la fila de años: (regex, grupo que contiene el año)
+YEAR_ROW_PATTERNS = [
+    (re.compile(r'A\s+\w+\s+\d+\s+de\s+(20[0-2][0-9])'), 0),  # "A Julio 31 de 2016"
+    (re.compile(r'\b(20[0-2][0-9])\b'), 0),                      # "2016"
+    (re.compile(r'(\d{2})/(\d{2})/(20[0-2][0-9])'), 2),         # "31/07/2016"
+    (re.compile(r'(20[0-2][0-9])-\d{2}-\d{2}'), 0),             # "2016-07-31"
+]
+
+# Filas evaluadas por bloque al buscar la fila de años
+YEAR_ROW_BLOCK_SIZE = 256
+
+# ✅ TÉRMINOS ADAPTADOS A TU EXCEL EXACTO
+CONCEPT_SEARCH_TERMS = {
+    'activo_corriente': [
+        'activo corriente', 'ACTIVO CORRIENTE'
+    ],
+    'pasivo_corriente': [
+        'pasivo corriente', 'Pasivo corriente', 'PASIVO CORRIENTE'
+    ],
+    'inventario': [
+        'INVENTARIOS', 'inventarios', 'MERCANC', 'mercanc'
+    ],
+    'utilidad_neta': [
+        'UTILIDAD NETA', 'utilidad neta', 'UTILIDAD O PÉRDIDA DEL EJERCICIO',
+        'utilidad del ejercicio'
+    ],
+    'patrimonio': [
+        'PATRIMONIO', 'patrimonio', 'CAPITAL SOCIAL', 'capital social'
+    ],
+    'activo_total': [
+        'ACTIVO', 'activo'  # ← Primera línea del balance
+    ],
+    'pasivo_total': [
+        'PASIVO', 'pasivo'  # ← No "total" porque aparece así
+    ],
+    'utilidad_bruta': [
+        'UTILIDAD BRUTA', 'utilidad bruta'
+    ],
+    'ingresos': [
+        'INGRESOS OPERACIONALES', 'ingresos operacionales'
+    ],
+    'ventas': [
+        'COMERCIO AL POR MAYOR', 'comercio', 'ventas'
+    ],
+    'costo_ventas': [
+        'COSTO DE VENTAS Y DE PRESTACIÓN', 'COSTO DE VENTAS',
+        'costo de ventas'
+    ],
+    'cuentas_por_cobrar': [
+        'CLIENTES', 'clientes', 'DEUDORES', 'deudores'  # ← CLAVE
+    ],
+    'gastos_intereses': [
+        'Intereses', 'intereses', 'FINANCIEROS', 'Gastos bancarios'
+    ],
+    'utilidad_operacional': [
+        'UTILIDAD OPERACIONAL', 'utilidad operacional'
+    ],
+}
+
+# Columnas (desde la izquierda) donde se buscan las etiquetas de los conceptos
+LABEL_SEARCH_COLUMNS = 10
+
 class AnalysisService:
-    def analyze_financial_data(self, df: pd.DataFrame) -> Dict:
-        """Analiza datos financieros con detección AUTOMÁTICA de estructura"""
+    def __init__(self):
+        self.indicator_engine = IndicatorEngine()
+    
+    def analyze_financial_data(
+        self,
+        df: pd.DataFrame,
+        progress: Optional[Callable[[str, str], None]] = None,
+        drop_empty_columns: bool = True
+    ) -> Dict:
+        """
+        Analiza datos financieros con detección AUTOMÁTICA de estructura
+        `progress(etapa, mensaje)` se invoca al completar cada etapa (trabajos de carga asíncronos)
+        `drop_empty_columns=False` cuando el lector ya quitó las columnas vacías de la hoja
+        completa (ExcelService.read_financial_sheet lee solo parte de las filas)
+        """
         
         print(f"\n{'='*60}")
         print(f"🔍 Iniciando análisis con {len(df.columns)} columnas y {len(df)} filas")
         print(f"{'='*60}\n")
         
-        df_clean = self._clean_dataframe(df)
-        analysis_result = self._analyze_data_structure(df_clean)
+        df_clean = self._clean_dataframe(df, drop_empty_columns)
+        analysis_result = self._analyze_data_structure(df_clean, progress)
         
         if not analysis_result['success']:
             print(f"❌ Error en análisis: {analysis_result.get('error', 'Desconocido')}")
@@ -21,13 +101,16 @@ class AnalysisService:
         print(f"✅ Estructura detectada exitosamente")
         return analysis_result['data']
     
-    def _clean_dataframe(self, df: pd.DataFrame) -> pd.DataFrame:
+    def _clean_dataframe(self, df: pd.DataFrame, drop_empty_columns: bool = True) -> pd.DataFrame:
         """Limpia el DataFrame SIN eliminar filas vacías iniciales"""
         print(f"\n🧹 LIMPIANDO DATAFRAME...")
         print(f"   Dimensiones iniciales: {df.shape}")
         
         # ✅ Solo eliminar columnas completamente vacías
-        df = df.dropna(axis=1, how='all')
+        if drop_empty_columns:
+            df = df.dropna(axis=1, how='all')
+        else:
+            df = df.copy()
         
         # ✅ Resetear índice pero NO eliminar filas vacías
         df = df.reset_index(drop=True)
@@ -41,50 +124,56 @@ class AnalysisService:
     
     def _find_year_row(self, df: pd.DataFrame) -> int:
         """Encuentra la fila de años SIN importar filas vacías iniciales"""
-        print("\n🔎 BUSCANDO FILA DE AÑOS (Detección Inteligente)...")
+        print("\n🔎 BUSCANDO FILA DE AÑOS (Detección Vectorizada)...")
         
-        # ✅ Buscar en TODAS las filas, no solo desde cierto punto
-        for idx, row in df.iterrows():
-            year_count = 0
-            years_found = []
-            
-            for col_idx, cell in enumerate(row):
-                if pd.isna(cell):
-                    continue
-                
-                cell_str = str(cell).strip()
-                
-                # ✅ BUSCAR PATRONES DE FECHA
-                # Patrón: "A Julio 31 de 2016", "31/07/2016", "2016", etc.
-                year_patterns = [
-                    r'A\s+\w+\s+\d+\s+de\s+(20[0-2][0-9])',  # "A Julio 31 de 2016"
-                    r'\b(20[0-2][0-9])\b',                      # "2016"
-                    r'(\d{2})/(\d{2})/(20[0-2][0-9])',         # "31/07/2016"
-                    r'(20[0-2][0-9])-\d{2}-\d{2}',             # "2016-07-31"
-                ]
-                
-                for pattern in year_patterns:
-                    matches = re.findall(pattern, cell_str)
-                    if matches:
-                        # Extraer solo el año
-                        if isinstance(matches[0], tuple):
-                            year = matches[0][-1]  # Último elemento si es tupla
-                        else:
-                            year = matches[0]
-                        
-                        if year not in years_found:
-                            year_count += 1
-                            years_found.append(year)
-                            print(f"   Fila {idx}, Columna {col_idx}: Año detectado → {year}")
-            
-            # ✅ Si encontramos 2 o más años en la misma fila, ¡es la fila correcta!
-            if year_count >= 2:
-                print(f"✅ Fila {idx} contiene {year_count} años: {years_found}")
+        values = df.to_numpy(dtype=object)
+        
+        # ✅ Recorrer el DataFrame por bloques y detenernos en el primero que contenga la fila
+        for start in range(0, len(values), YEAR_ROW_BLOCK_SIZE):
+            found = self._find_year_row_in_block(values[start:start + YEAR_ROW_BLOCK_SIZE])
+            if found is not None:
+                row, years_found = found
+                idx = df.index[start + row]
+                print(f"✅ Fila {idx} contiene {len(years_found)} años: {years_found}")
                 return idx
         
         print("❌ No se encontró ninguna fila con años")
         return None
     
+    def _find_year_row_in_block(self, block: np.ndarray):
+        """
+        Busca la primera fila con 2 o más años en un bloque de celdas (2D, object)
+        
+        Todas las celdas del bloque se evalúan a la vez con operaciones de pandas.
+        Retorna (posición de la fila en el bloque, años encontrados) o None.
+        """
+        row_pos, col_pos = np.nonzero(~pd.isna(block))
+        if len(row_pos) == 0:
+            return None
+        
+        cells = pd.Series(block[row_pos, col_pos]).astype(str).str.strip()
+        
+        # Primer año que detecta cada patrón en cada celda
+        detected = []
+        for pattern, year_group in YEAR_ROW_PATTERNS:
+            years = cells.str.extract(pattern, expand=True)[year_group]
+            found = years.notna().to_numpy()
+            detected.append(pd.DataFrame({
+                'row': row_pos[found],
+                'year': years[found].to_numpy()
+            }))
+        
+        detected = pd.concat(detected, ignore_index=True).drop_duplicates()
+        year_count = detected.groupby('row')['year'].nunique()
+        
+        # ✅ Si encontramos 2 o más años en la misma fila, ¡es la fila correcta!
+        candidates = year_count[year_count >= 2]
+        if candidates.empty:
+            return None
+        
+        row = int(candidates.index.min())
+        return row, detected.loc[detected['row'] == row, 'year'].tolist()
+    
     def _extract_years_from_row(self, df: pd.DataFrame, row_idx: int) -> List[int]:
         """Extrae años de una fila específica"""
         years = []
@@ -117,8 +206,9 @@ class AnalysisService:
         print(f"✅ Años extraídos: {years}")
         return years
     
-    def _analyze_data_structure(self, df: pd.DataFrame) -> Dict:
+    def _analyze_data_structure(self, df: pd.DataFrame, progress: Optional[Callable[[str, str], None]] = None) -> Dict:
         """Analiza la estructura del DataFrame y extrae datos"""
+        progress = progress or (lambda stage, message: None)
         try:
             year_row_idx = self._find_year_row(df)
             if year_row_idx is None:
@@ -130,8 +220,10 @@ class AnalysisService:
             
             print(f"\n📊 AÑOS DETECTADOS: {years}")
             print(f"📍 FILA DE AÑOS: {year_row_idx}")
+            progress("year_row_found", f"Fila de años encontrada: {years}")
             
             financial_values = self._extract_financial_values(df, years, year_row_idx)
+            progress("values_extracted", "Valores financieros extraídos")
             
             # ✅ VALIDAR que se encontraron datos
             has_data = any(
@@ -142,13 +234,12 @@ class AnalysisService:
             if not has_data:
                 print("⚠️ ADVERTENCIA: No se encontraron valores financieros significativos")
             
-            indicators_by_year = {}
-            for year in years:
-                indicators_by_year[year] = self._calculate_all_indicators(financial_values, year, years)
+            indicators_by_year = self._calculate_all_indicators(financial_values, years)
             
             # Calcular análisis horizontal y vertical
             horizontal_analysis = self._calculate_horizontal_analysis(financial_values, years)
             vertical_analysis = self._calculate_vertical_analysis(financial_values, years)
+            progress("indicators_computed", "Indicadores y análisis H/V calculados")
             
             return {
                 'success': True,
@@ -191,68 +282,45 @@ class AnalysisService:
             'amortizacion': {}
         }
         
-        # ✅ TÉRMINOS ADAPTADOS A TU EXCEL EXACTO
-        search_terms = {
-            'activo_corriente': [
-                'activo corriente', 'ACTIVO CORRIENTE'
-            ],
-            'pasivo_corriente': [
-                'pasivo corriente', 'Pasivo corriente', 'PASIVO CORRIENTE'
-            ],
-            'inventario': [
-                'INVENTARIOS', 'inventarios', 'MERCANC', 'mercanc'
-            ],
-            'utilidad_neta': [
-                'UTILIDAD NETA', 'utilidad neta', 'UTILIDAD O PÉRDIDA DEL EJERCICIO',
-                'utilidad del ejercicio'
-            ],
-            'patrimonio': [
-                'PATRIMONIO', 'patrimonio', 'CAPITAL SOCIAL', 'capital social'
-            ],
-            'activo_total': [
-                'ACTIVO', 'activo'  # ← Primera línea del balance
-            ],
-            'pasivo_total': [
-                'PASIVO', 'pasivo'  # ← No "total" porque aparece así
-            ],
-            'utilidad_bruta': [
-                'UTILIDAD BRUTA', 'utilidad bruta'
-            ],
-            'ingresos': [
-                'INGRESOS OPERACIONALES', 'ingresos operacionales'
-            ],
-            'ventas': [
-                'COMERCIO AL POR MAYOR', 'comercio', 'ventas'
-            ],
-            'costo_ventas': [
-                'COSTO DE VENTAS Y DE PRESTACIÓN', 'COSTO DE VENTAS',
-                'costo de ventas'
-            ],
-            'cuentas_por_cobrar': [
-                'CLIENTES', 'clientes', 'DEUDORES', 'deudores'  # ← CLAVE
-            ],
-            'gastos_intereses': [
-                'Intereses', 'intereses', 'FINANCIEROS', 'Gastos bancarios'
-            ],
-            'utilidad_operacional': [
-                'UTILIDAD OPERACIONAL', 'utilidad operacional'
-            ],
-        }
-        
         print(f"\n🔍 EXTRAYENDO VALORES FINANCIEROS...")
         print(f"   Buscando desde fila {year_row_idx + 1} en adelante")
         
+        # ✅ Índice de etiquetas construido una sola vez para todos los años
+        label_index = self._build_label_index(df, year_row_idx)
+        concept_rows = {
+            concept: self._find_concept_row(label_index, terms)
+            for concept, terms in CONCEPT_SEARCH_TERMS.items()
+        }
+        first_data_row = year_row_idx + 1
+        
         for year in years:
             year_col_idx = self._find_year_column(df, year, year_row_idx)
             if year_col_idx is not None:
                 print(f"\n   📅 Año {year} → Columna {year_col_idx}")
-                for concept, terms in search_terms.items():
-                    value = self._find_concept_value(df, terms, year_col_idx, year_row_idx)
+                
+                # ✅ Convertir la columna completa del año en una sola pasada
+                column_values, parse_failed = self._parse_values(
+                    df.iloc[first_data_row:, year_col_idx].to_numpy(dtype=object)
+                )
+                
+                unparsed = []
+                for concept, terms in CONCEPT_SEARCH_TERMS.items():
+                    row_idx = concept_rows[concept]
+                    if row_idx is None:
+                        value = 0.0
+                    else:
+                        value = float(column_values[row_idx - first_data_row])
+                        if parse_failed[row_idx - first_data_row]:
+                            unparsed.append(concept)
+                    
                     financial_data[concept][year] = value
                     if value != 0:
                         print(f"      ✓ {concept}: ${value:,.2f}")
                     else:
                         print(f"      ⚠️ {concept}: NO ENCONTRADO (buscando: {terms[0]})")
+                
+                if unparsed:
+                    print(f"      ⚠️ Valores no numéricos (se usó 0): {', '.join(unparsed)}")
         
         return financial_data
     
@@ -267,300 +335,143 @@ class AnalysisService:
                 return col_idx
         return None
     
-    def _find_concept_value(self, df: pd.DataFrame, search_terms: List[str], year_col: int, year_row: int) -> float:
+    def _build_label_index(self, df: pd.DataFrame, year_row: int, search_terms: List[str] = None) -> Dict[str, int]:
+        """
+        Indexa las etiquetas de las primeras columnas debajo de la fila de años
+        
+        Mapea cada prefijo normalizado (MAYÚSCULAS, sin espacios) con la longitud de
+        algún término de búsqueda a la primera fila donde aparece, recorriendo fila por
+        fila y columna por columna igual que la búsqueda secuencial.
+        """
+        if search_terms is None:
+            search_terms = [term for terms in CONCEPT_SEARCH_TERMS.values() for term in terms]
+        
+        block = df.iloc[year_row + 1:, :LABEL_SEARCH_COLUMNS].to_numpy(dtype=object)
+        row_pos, col_pos = np.nonzero(~pd.isna(block))
+        if len(row_pos) == 0:
+            return {}
+        
+        labels = pd.Series(block[row_pos, col_pos]).astype(str).str.strip().str.upper()
+        label_lengths = labels.str.len().to_numpy()
+        rows = row_pos + year_row + 1
+        
+        label_index = {}
+        for length in sorted({len(term.upper()) for term in search_terms}):
+            fits = label_lengths >= length
+            prefixes = pd.DataFrame({
+                'prefix': labels[fits].str[:length].to_numpy(),
+                'row': rows[fits]
+            }).drop_duplicates('prefix')
+            label_index.update(zip(prefixes['prefix'].tolist(), prefixes['row'].tolist()))
+        
+        return label_index
+    
+    def _find_concept_row(self, label_index: Dict[str, int], search_terms: List[str]) -> int:
+        """Primera fila cuya etiqueta es igual o empieza con alguno de los términos"""
+        rows = [label_index[term.upper()] for term in search_terms if term.upper() in label_index]
+        return min(rows) if rows else None
+    
+    def _find_concept_value(self, df: pd.DataFrame, search_terms: List[str], year_col: int, year_row: int,
+                            label_index: Dict[str, int] = None) -> float:
         """Encuentra el valor de un concepto financiero CON BÚSQUEDA INTELIGENTE"""
         
-        # ✅ BUSCAR DESDE LA FILA SIGUIENTE A LOS AÑOS
-        for idx in range(year_row + 1, len(df)):
-            row = df.iloc[idx]
-            
-            # ✅ Buscar en las primeras 10 columnas (ampliado)
-            search_range = min(10, len(row))
-            
-            for col_idx in range(search_range):
-                if col_idx >= len(row):
-                    break
-                
-                cell = row.iloc[col_idx]
-                if pd.isna(cell):
-                    continue
-                
-                cell_str = str(cell).strip().upper()  # ← MAYÚSCULAS para comparación
-                
-                # ✅ Buscar cada término
-                for term in search_terms:
-                    term_upper = term.upper()
-                    
-                    # ✅ COINCIDENCIA EXACTA o que EMPIECE con el término
-                    if cell_str == term_upper or cell_str.startswith(term_upper):
-                        # ✅ ENCONTRADO - Extraer valor de la columna del año
-                        if year_col >= len(row):
-                            return 0.0
-                        
-                        value = row.iloc[year_col]
-                        return self._parse_value(value)
+        # ✅ BUSCAR DESDE LA FILA SIGUIENTE A LOS AÑOS usando el índice de etiquetas
+        if label_index is None:
+            label_index = self._build_label_index(df, year_row, search_terms)
         
-        # No encontrado
-        return 0.0
-    
-    def _parse_value(self, value) -> float:
-        """Convierte cualquier formato de número a float"""
-        try:
-            if pd.isna(value):
-                return 0.0
-            
-            if isinstance(value, (int, float)):
-                return float(value)
-            
-            if isinstance(value, str):
-                # Limpiar el valor
-                value_clean = value.replace('$', '').replace(' ', '').strip()
-                
-                # Manejar valores negativos entre paréntesis: (1.000) → -1000
-                if '(' in value_clean and ')' in value_clean:
-                    value_clean = '-' + value_clean.replace('(', '').replace(')', '')
-                
-                # Remover puntos de miles y reemplazar coma decimal por punto
-                # Ej: "1.229.499.222,08" → "1229499222.08"
-                if ',' in value_clean:
-                    value_clean = value_clean.replace('.', '').replace(',', '.')
-                else:
-                    # Si no hay coma, solo quitar puntos de miles
-                    value_clean = value_clean.replace(',', '')
-                
-                if value_clean and value_clean not in ['-', '', '.']:
-                    return float(value_clean)
-                
+        row_idx = self._find_concept_row(label_index, search_terms)
+        if row_idx is None or year_col >= len(df.columns):
+            # No encontrado
             return 0.0
-            
-        except (ValueError, TypeError) as e:
-            print(f"   ⚠️ Error parseando valor '{value}': {e}")
-            return 0.0
-    
-    def _safe_float(self, value):
-        """Convierte valores a float de forma segura"""
-        return self._parse_value(value)
+        
+        return self._parse_value(df.iat[row_idx, year_col])
     
-    def _calculate_all_indicators(self, financial_data: Dict, year: int, years: List[int]) -> Dict:
-        """Calcula todos los indicadores para un año específico"""
-        try:
-            years_sorted = sorted(years)
-            year_index = years_sorted.index(year)
-            
-            # ✅ CALCULAR PROMEDIOS SI HAY AÑO ANTERIOR
-            if year_index > 0:
-                previous_year = years_sorted[year_index - 1]
-                
-                # Promedio de Patrimonio
-                patrimonio_actual = self._safe_float(financial_data['patrimonio'].get(year, 0))
-                patrimonio_anterior = self._safe_float(financial_data['patrimonio'].get(previous_year, 0))
-                patrimonio_promedio = (patrimonio_actual + patrimonio_anterior) / 2 if patrimonio_anterior > 0 else patrimonio_actual
-                
-                # Promedio de Activo Total
-                activo_actual = self._safe_float(financial_data['activo_total'].get(year, 0))
-                activo_anterior = self._safe_float(financial_data['activo_total'].get(previous_year, 0))
-                activo_promedio = (activo_actual + activo_anterior) / 2 if activo_anterior > 0 else activo_actual
-                
-                # Promedio de Inventario
-                inventario_actual = self._safe_float(financial_data['inventario'].get(year, 0))
-                inventario_anterior = self._safe_float(financial_data['inventario'].get(previous_year, 0))
-                inventario_promedio = (inventario_actual + inventario_anterior) / 2 if inventario_anterior > 0 else inventario_actual
-                
-                # Promedio de Cuentas por Cobrar
-                cxc_actual = self._safe_float(financial_data['cuentas_por_cobrar'].get(year, 0))
-                cxc_anterior = self._safe_float(financial_data['cuentas_por_cobrar'].get(previous_year, 0))
-                cxc_promedio = (cxc_actual + cxc_anterior) / 2 if cxc_anterior > 0 else cxc_actual
-            else:
-                patrimonio_promedio = self._safe_float(financial_data['patrimonio'].get(year, 0))
-                activo_promedio = self._safe_float(financial_data['activo_total'].get(year, 0))
-                inventario_promedio = self._safe_float(financial_data['inventario'].get(year, 0))
-                cxc_promedio = self._safe_float(financial_data['cuentas_por_cobrar'].get(year, 0))
-            
-            # Variables del año actual
-            activo_corriente = self._safe_float(financial_data['activo_corriente'].get(year, 0))
-            pasivo_corriente = self._safe_float(financial_data['pasivo_corriente'].get(year, 0))
-            inventario = self._safe_float(financial_data['inventario'].get(year, 0))
-            utilidad_neta = self._safe_float(financial_data['utilidad_neta'].get(year, 0))
-            activo_total = self._safe_float(financial_data['activo_total'].get(year, 0))
-            pasivo_total = self._safe_float(financial_data['pasivo_total'].get(year, 0))
-            patrimonio = self._safe_float(financial_data['patrimonio'].get(year, 0))
-            utilidad_bruta = self._safe_float(financial_data['utilidad_bruta'].get(year, 0))
-            ingresos = self._safe_float(financial_data['ingresos'].get(year, 0)) or self._safe_float(financial_data['ventas'].get(year, 0))
-            costo_ventas = self._safe_float(financial_data['costo_ventas'].get(year, 0))
-            cuentas_por_cobrar = self._safe_float(financial_data['cuentas_por_cobrar'].get(year, 0))
-            gastos_intereses = self._safe_float(financial_data['gastos_intereses'].get(year, 0))
-            utilidad_operacional = self._safe_float(financial_data['utilidad_operacional'].get(year, 0))
-            capital_trabajo = activo_corriente - pasivo_corriente
-            
-            print(f"\n📊 CALCULANDO INDICADORES PARA {year}:")
-            print(f"   Activo Total (promedio): ${activo_promedio:,.2f}")
-            print(f"   Ingresos: ${ingresos:,.2f}")
-            print(f"   CxC (promedio): ${cxc_promedio:,.2f}")
-            print(f"   Inventario (promedio): ${inventario_promedio:,.2f}")
+    def _parse_values(self, values) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Convierte una columna completa (cualquier formato de número) a float64
+        
+        Retorna (valores, fallidos): los valores vacíos o no numéricos quedan en 0.0
+        y la máscara `fallidos` marca los textos que no se pudieron convertir.
+        """
+        cells = np.asarray(values, dtype=object)
+        parsed = np.zeros(len(cells), dtype=np.float64)
+        failed = np.zeros(len(cells), dtype=bool)
+        
+        missing = pd.isna(cells)
+        is_number = np.fromiter(
+            (isinstance(cell, (int, float, np.integer, np.floating)) for cell in cells),
+            dtype=bool, count=len(cells)
+        ) & ~missing
+        is_text = np.fromiter(
+            (isinstance(cell, str) for cell in cells),
+            dtype=bool, count=len(cells)
+        )
+        
+        parsed[is_number] = cells[is_number].astype(np.float64)
+        
+        if is_text.any():
+            text = pd.Series(cells[is_text], dtype=object)
+            
+            # Limpiar el valor
+            text = text.str.replace('$', '', regex=False).str.replace(' ', '', regex=False).str.strip()
+            
+            # Manejar valores negativos entre paréntesis: (1.000) → -1000
+            negative = text.str.contains('(', regex=False) & text.str.contains(')', regex=False)
+            text = text.where(
+                ~negative,
+                '-' + text.str.replace('(', '', regex=False).str.replace(')', '', regex=False)
+            )
             
-            return {
-                "liquidez": self._calculate_liquidity_indicators(
-                    activo_corriente, pasivo_corriente, inventario, capital_trabajo
-                ),
-                "rentabilidad": self._calculate_profitability_indicators(
-                    utilidad_neta, patrimonio_promedio, activo_promedio, utilidad_bruta, ingresos
-                ),
-                "endeudamiento": self._calculate_debt_indicators(
-                    pasivo_total, activo_total, patrimonio, utilidad_operacional, gastos_intereses
-                ),
-                "rotacion": self._calculate_rotation_indicators(
-                    ingresos, costo_ventas, inventario_promedio, cxc_promedio, activo_promedio
-                ),
-                "quiebra": self._calculate_bankruptcy_indicators(
-                    capital_trabajo, utilidad_operacional, utilidad_neta, 
-                    activo_total, pasivo_total, patrimonio, ingresos
-                )
-            }
+            # Remover puntos de miles y reemplazar coma decimal por punto
+            # Ej: "1.229.499.222,08" → "1229499222.08"
+            has_comma = text.str.contains(',', regex=False)
+            text = text.where(
+                ~has_comma,
+                text.str.replace('.', '', regex=False).str.replace(',', '.', regex=False)
+            )
             
-        except Exception as e:
-            print(f"❌ Error calculando indicadores para {year}: {e}")
-            import traceback
-            traceback.print_exc()
-            return self._get_default_indicators()
+            filled = ~text.isin(['-', '', '.']).to_numpy()
+            candidates = text.to_numpy(dtype=object)[filled]
+            text_values = np.zeros(len(text), dtype=np.float64)
+            text_failed = np.zeros(len(text), dtype=bool)
+            
+            try:
+                text_values[filled] = candidates.astype(np.float64)
+            except (ValueError, TypeError):
+                # Al menos un texto no es numérico: convertir uno a uno para ubicarlo
+                converted = np.zeros(len(candidates), dtype=np.float64)
+                bad = np.zeros(len(candidates), dtype=bool)
+                for i, candidate in enumerate(candidates):
+                    try:
+                        converted[i] = float(candidate)
+                    except (ValueError, TypeError):
+                        bad[i] = True
+                text_values[filled] = converted
+                text_failed[filled] = bad
+            
+            parsed[is_text] = text_values
+            failed[is_text] = text_failed
+        
+        return parsed, failed
     
-    def _calculate_liquidity_indicators(self, activo_corriente, pasivo_corriente, inventario, capital_trabajo):
-        razon_corriente = self._safe_divide(activo_corriente, pasivo_corriente)
-        prueba_acida = self._safe_divide(activo_corriente - inventario, pasivo_corriente)
-        
-        clasificacion = "Crítico"
-        if razon_corriente >= 1.5:
-            clasificacion = "Sano"
-        elif razon_corriente >= 1.0:
-            clasificacion = "Regular"
-        
-        return {
-            "razon_corriente": round(float(razon_corriente), 4),
-            "prueba_acida": round(float(prueba_acida), 4),
-            "capital_trabajo": round(float(capital_trabajo), 2),
-            "clasificacion_liquidez": clasificacion
-        }
-    
-    def _calculate_profitability_indicators(self, utilidad_neta, patrimonio_promedio, activo_promedio, utilidad_bruta, ingresos):
-        return {
-            "roe": round(float(self._safe_divide(utilidad_neta, patrimonio_promedio)), 4),
-            "roa": round(float(self._safe_divide(utilidad_neta, activo_promedio)), 4),
-            "margen_bruto": round(float(self._safe_divide(utilidad_bruta, ingresos)), 4),
-            "margen_neto": round(float(self._safe_divide(utilidad_neta, ingresos)), 4)
-        }
-    
-    def _calculate_debt_indicators(self, pasivo_total, activo_total, patrimonio, utilidad_operacional, gastos_intereses):
-        endeudamiento_total = self._safe_divide(pasivo_total, activo_total)
-        deuda_patrimonio = self._safe_divide(pasivo_total, patrimonio)
-        cobertura_intereses = self._safe_divide(utilidad_operacional, gastos_intereses)
-        
-        clasificacion_riesgo = "Bajo"
-        if endeudamiento_total > 0.6:
-            clasificacion_riesgo = "Alto"
-        elif endeudamiento_total > 0.4:
-            clasificacion_riesgo = "Medio"
-        
-        return {
-            "endeudamiento_total": round(float(endeudamiento_total), 4),
-            "deuda_patrimonio": round(float(deuda_patrimonio), 4),
-            "cobertura_intereses": round(float(cobertura_intereses), 4),
-            "clasificacion_riesgo": clasificacion_riesgo
-        }
+    def _parse_value(self, value) -> float:
+        """Convierte cualquier formato de número a float"""
+        parsed, _ = self._parse_values([value])
+        return float(parsed[0])
     
-    def _calculate_rotation_indicators(self, ingresos, costo_ventas, inventario_promedio, cuentas_por_cobrar_promedio, activo_total_promedio):
-        """Calcula indicadores de rotación con validaciones ULTRA ROBUSTAS"""
-        
-        print(f"\n🔄 CALCULANDO INDICADORES DE ROTACIÓN...")
-        print(f"   Ingresos: ${ingresos:,.2f}")
-        print(f"   Costo Ventas: ${costo_ventas:,.2f}")
-        print(f"   Inventario Promedio: ${inventario_promedio:,.2f}")
-        print(f"   CxC Promedio: ${cuentas_por_cobrar_promedio:,.2f}")
-        print(f"   Activo Total Promedio: ${activo_total_promedio:,.2f}")
-        
-        # Rotación de Inventarios
-        if inventario_promedio > 1 and costo_ventas > 0:
-            rotacion_inventarios = costo_ventas / inventario_promedio
-            dias_inventario = 365 / rotacion_inventarios
-            print(f"   ✅ Rotación Inventarios: {rotacion_inventarios:.2f} veces/año")
-            print(f"   ✅ Días Inventario: {dias_inventario:.2f} días")
-        else:
-            rotacion_inventarios = 0.0
-            dias_inventario = 0.0
-            print(f"   ⚠️ Rotación Inventarios: NO calculable (Inventario = ${inventario_promedio:,.2f})")
-        
-        # Rotación de Cartera
-        if cuentas_por_cobrar_promedio > 1 and ingresos > 0:
-            rotacion_cartera = ingresos / cuentas_por_cobrar_promedio
-            dias_cartera = 365 / rotacion_cartera
-            print(f"   ✅ Rotación Cartera: {rotacion_cartera:.2f} veces/año")
-            print(f"   ✅ Días Cartera: {dias_cartera:.2f} días")
-        else:
-            rotacion_cartera = 0.0
-            dias_cartera = 0.0
-            print(f"   ⚠️ Rotación Cartera: NO calculable (CxC = ${cuentas_por_cobrar_promedio:,.2f})")
-        
-        # Rotación de Activos
-        if activo_total_promedio > 1 and ingresos > 0:
-            rotacion_activos = ingresos / activo_total_promedio
-            print(f"   ✅ Rotación Activos: {rotacion_activos:.2f} veces/año")
-        else:
-            rotacion_activos = 0.0
-            print(f"   ⚠️ Rotación Activos: NO calculable")
-        
-        # ✅ VALIDAR QUE LOS VALORES SEAN RAZONABLES
-        if dias_inventario > 3650:  # Más de 10 años
-            print(f"   ❌ ERROR: Días inventario anormales ({dias_inventario:.0f}), ajustando a 0")
-            dias_inventario = 0.0
-            rotacion_inventarios = 0.0
-        
-        if dias_cartera > 3650:  # Más de 10 años
-            print(f"   ❌ ERROR: Días cartera anormales ({dias_cartera:.0f}), ajustando a 0")
-            dias_cartera = 0.0
-            rotacion_cartera = 0.0
+    def _calculate_all_indicators(self, financial_data: Dict, years: List[int]) -> Dict:
+        """Calcula todos los indicadores de todos los años con el motor columnar"""
+        years_sorted = sorted(years)
         
-        if rotacion_activos > 100:
-            print(f"   ⚠️ ADVERTENCIA: Rotación activos muy alta ({rotacion_activos:.2f})")
-        
-        return {
-            "rotacion_inventarios": round(float(rotacion_inventarios), 4),
-            "rotacion_cartera": round(float(rotacion_cartera), 4),
-            "rotacion_activos": round(float(rotacion_activos), 4),
-            "dias_inventario": round(float(dias_inventario), 2),
-            "dias_cartera": round(float(dias_cartera), 2)
-        }
-    
-    def _calculate_bankruptcy_indicators(self, capital_trabajo, utilidad_operacional, utilidad_neta, 
-                                        activo_total, pasivo_total, patrimonio, ingresos):
-        if activo_total == 0:
-            return {
-                "z_score": 0.0,
-                "clasificacion_z": "Sin datos",
-                "probabilidad_quiebra": "Indeterminada"
-            }
+        print(f"\n📊 CALCULANDO INDICADORES PARA {years_sorted}...")
+        matrix = self.indicator_engine.build_matrix(financial_data, years_sorted)
+        result = self.indicator_engine.compute(matrix)
         
-        # ✅ FÓRMULA CORRECTA DEL Z-SCORE DE ALTMAN
-        x1 = self._safe_divide(capital_trabajo, activo_total)
-        x2 = self._safe_divide(utilidad_neta, activo_total)
-        x3 = self._safe_divide(utilidad_operacional, activo_total)  # EBIT
-        x4 = self._safe_divide(patrimonio, pasivo_total)
-        x5 = self._safe_divide(ingresos, activo_total)
-        
-        z_score = (1.2 * x1) + (1.4 * x2) + (3.3 * x3) + (0.6 * x4) + (1.0 * x5)
-        
-        if z_score > 2.99:
-            clasificacion = "Zona Segura"
-            probabilidad = "Baja"
-        elif z_score >= 1.81:
-            clasificacion = "Zona Gris"
-            probabilidad = "Media"
-        else:
-            clasificacion = "Zona de Peligro"
-            probabilidad = "Alta"
+        for year, valid in zip(years_sorted, result['valid'].tolist()):
+            if not valid:
+                print(f"❌ Error calculando indicadores para {year}: rotación no calculable, se usan valores por defecto")
         
-        return {
-            "z_score": round(float(z_score), 4),
-            "clasificacion_z": clasificacion,
-            "probabilidad_quiebra": probabilidad
-        }
+        return self.indicator_engine.to_year_dicts(result, years_sorted, self._get_default_indicators)
     
     def _calculate_horizontal_analysis(self, financial_values: Dict, years: List[int]) -> Dict:
         """Calcula análisis horizontal (variaciones entre períodos)"""
@@ -686,24 +597,6 @@ class AnalysisService:
         
         return vertical
     
-    def _safe_divide(self, numerator, denominator):
-        """División segura"""
-        try:
-            numerator = float(numerator) if numerator else 0.0
-            denominator = float(denominator) if denominator else 0.0
-            
-            if denominator == 0:
-                return 0.0
-            
-            result = numerator / denominator
-            
-            if abs(result) > 1e10:
-                return 0.0
-            
-            return result
-        except:
-            return 0.0
-    
     def _get_default_indicators(self):
         return {
             "liquidez": {"razon_corriente": 0.0, "prueba_acida": 0.0, "capital_trabajo": 0.0, "clasificacion_liquidez": "Sin datos"},
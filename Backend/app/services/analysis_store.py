@@ -0,0 +1,98 @@
+"""
+Almacén de análisis por usuario
+PostgreSQL es la fuente de verdad; una caché LRU acotada evita releer el JSON
+"""
+import copy
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models import AnalysisResult
+from app.services.chat_context import attach_chat_context, stored_chat_context
+
+# Configuración
+ANALYSIS_CACHE_SIZE = int(os.getenv("ANALYSIS_CACHE_SIZE", "128"))
+
+
+class AnalysisStore:
+    """Guarda y recupera resultados de análisis por (usuario, id de análisis)"""
+
+    def __init__(self, max_entries: int = ANALYSIS_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[Tuple[int, int], Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def save(self, db: Session, user_id: int, data: Dict, filename: Optional[str] = None) -> int:
+        """
+        Guardar un análisis para el usuario y retornar el id asignado
+        `data` no se modifica: el id y el contexto del chat van en la copia guardada
+        """
+        record = AnalysisResult(user_id=user_id, filename=filename, data={})
+        db.add(record)
+        db.flush()
+
+        # Contexto del chat calculado una sola vez por análisis (interno, no se responde al cliente)
+        stored = attach_chat_context({**data, "analysis_id": record.id})
+        record.data = stored
+        db.commit()
+
+        self._cache_put((user_id, record.id), stored)
+        return record.id
+
+    def get(self, db: Session, user_id: int, analysis_id: Optional[int] = None) -> Optional[Dict]:
+        """
+        Obtener un análisis del usuario
+        Sin analysis_id retorna el más reciente; None si no existe o es de otro usuario
+        """
+        if analysis_id is None:
+            analysis_id = self.get_latest_id(db, user_id)
+            if analysis_id is None:
+                return None
+
+        cached = self._cache_get((user_id, analysis_id))
+        if cached is not None:
+            return cached
+
+        record = db.query(AnalysisResult).filter(
+            AnalysisResult.id == analysis_id,
+            AnalysisResult.user_id == user_id
+        ).first()
+        if not record:
+            return None
+
+        self._cache_put((user_id, analysis_id), record.data)
+        return record.data
+
+    def get_chat_context(self, db: Session, user_id: int, analysis_id: Optional[int] = None) -> Dict:
+        """Contexto compacto del chat ({"text", "values"}) para un análisis del usuario (vacío si no existe)"""
+        return stored_chat_context(self.get(db, user_id, analysis_id))
+
+    def get_latest_id(self, db: Session, user_id: int) -> Optional[int]:
+        """Id del último análisis del usuario (consulta indexada por user_id, id)"""
+        return db.query(AnalysisResult.id).filter(
+            AnalysisResult.user_id == user_id
+        ).order_by(AnalysisResult.id.desc()).limit(1).scalar()
+
+    def _cache_get(self, key: Tuple[int, int]) -> Optional[Dict]:
+        """Copia del análisis en caché (quien llama puede modificarla) o None"""
+        with self._lock:
+            data = self._cache.get(key)
+            if data is None:
+                return None
+            self._cache.move_to_end(key)
+        return copy.deepcopy(data)
+
+    def _cache_put(self, key: Tuple[int, int], data: Dict) -> None:
+        data = copy.deepcopy(data)
+        with self._lock:
+            self._cache[key] = data
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+
+# Instancia compartida por todas las rutas del proceso
+analysis_store = AnalysisStore()
@@ -0,0 +1,143 @@
+"""
+Consultas sobre audit_logs
+Filtros por rango de tiempo, usuario y acción servidos por los índices compuestos
+(user_id, created_at) y (action_type, created_at), con paginación por cursor
+sobre (created_at, id) y exportación CSV por bloques
+"""
+import base64
+import csv
+import io
+from datetime import datetime
+from typing import Iterator, List, Optional, Tuple
+
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query
+
+from app.database import SessionLocal
+from app.models import ActionType, AuditLog
+
+# Filas por consulta al exportar a CSV
+AUDIT_EXPORT_CHUNK_SIZE = 2000
+
+CSV_COLUMNS = ["id", "created_at", "user_id", "action_type", "description", "ip_address", "user_agent"]
+
+# Primeros caracteres que Excel/LibreOffice interpretan como fórmula
+CSV_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+class InvalidCursor(ValueError):
+    """El cursor de paginación no tiene el formato esperado"""
+
+
+class AuditFilters:
+    """Filtros de una consulta de auditoría"""
+
+    def __init__(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        user_id: Optional[int] = None,
+        action_type: Optional[ActionType] = None
+    ):
+        self.start = start
+        self.end = end
+        self.user_id = user_id
+        self.action_type = action_type
+
+    def apply(self, query: Query) -> Query:
+        """Rango semiabierto [start, end) sobre created_at"""
+        if self.user_id is not None:
+            query = query.filter(AuditLog.user_id == self.user_id)
+        if self.action_type is not None:
+            query = query.filter(AuditLog.action_type == self.action_type)
+        if self.start is not None:
+            query = query.filter(AuditLog.created_at >= self.start)
+        if self.end is not None:
+            query = query.filter(AuditLog.created_at < self.end)
+        return query
+
+    @property
+    def filtered(self) -> bool:
+        return any(value is not None for value in (self.start, self.end, self.user_id, self.action_type))
+
+
+def csv_safe(value: Optional[str]) -> str:
+    """
+    Texto de una celda sin riesgo de inyección de fórmulas: description, ip_address
+    y user_agent vienen del cliente (p. ej. el username de un login fallido)
+    """
+    if not value:
+        return ""
+    return f"'{value}" if value.startswith(CSV_FORMULA_PREFIXES) else value
+
+
+def encode_cursor(entry: AuditLog) -> str:
+    """Cursor opaco con la posición (created_at, id) del último registro de la página"""
+    raw = f"{entry.created_at.isoformat()}|{entry.id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        created_at, entry_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(entry_id)
+    except (ValueError, UnicodeError) as e:
+        raise InvalidCursor(str(e))
+
+
+def filtered_query(db, filters: AuditFilters) -> Query:
+    return filters.apply(db.query(AuditLog))
+
+
+def fetch_page(query: Query, after: Optional[str], limit: int) -> Tuple[List[AuditLog], Optional[str]]:
+    """
+    Página de registros del más reciente al más antiguo
+    Retorna (registros, cursor de la página siguiente o None)
+    """
+    if after:
+        created_at, entry_id = decode_cursor(after)
+        query = query.filter(tuple_(AuditLog.created_at, AuditLog.id) < tuple_(created_at, entry_id))
+
+    # Un registro extra indica si hay página siguiente sin otra consulta
+    entries = query.order_by(AuditLog.created_at.desc(), AuditLog.id.desc()).limit(limit + 1).all()
+    if len(entries) > limit:
+        entries = entries[:limit]
+        return entries, encode_cursor(entries[-1])
+    return entries, None
+
+
+def iter_csv(filters: AuditFilters, chunk_size: int = AUDIT_EXPORT_CHUNK_SIZE) -> Iterator[str]:
+    """
+    Generar el CSV por bloques de chunk_size filas (una consulta por cursor cada vez),
+    con su propia sesión: la memoria no crece con el tamaño del rango exportado
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(CSV_COLUMNS)
+    yield buffer.getvalue()
+
+    db = SessionLocal()
+    try:
+        cursor = None
+        while True:
+            entries, cursor = fetch_page(filtered_query(db, filters), cursor, chunk_size)
+            buffer.seek(0)
+            buffer.truncate()
+            for entry in entries:
+                writer.writerow([
+                    entry.id,
+                    entry.created_at.isoformat() if entry.created_at else "",
+                    entry.user_id if entry.user_id is not None else "",
+                    entry.action_type.value,
+                    csv_safe(entry.description),
+                    csv_safe(entry.ip_address),
+                    csv_safe(entry.user_agent),
+                ])
+            # Liberar objetos y conexión entre bloques: el cliente puede tardar en leer
+            db.close()
+            yield buffer.getvalue()
+            if cursor is None:
+                break
+    finally:
+        db.close()
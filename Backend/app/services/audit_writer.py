@@ -0,0 +1,168 @@
+"""
+Escritor de auditoría por lotes
+Acumula registros de AuditLog en memoria y los inserta en bloque desde un hilo
+de fondo (por tamaño o por tiempo), fuera de la ruta de la petición.
+En la misma transacción actualiza el resumen diario user_activity_daily
+"""
+import os
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from typing import Deque, Dict, List, Optional
+
+from sqlalchemy import insert
+
+from app.database import SessionLocal
+from app.models import ActionType, AuditLog
+from app.services.activity_rollup import apply_rollup
+
+# Configuración
+AUDIT_FLUSH_SIZE = int(os.getenv("AUDIT_FLUSH_SIZE", "100"))
+AUDIT_FLUSH_INTERVAL_SECONDS = float(os.getenv("AUDIT_FLUSH_INTERVAL_SECONDS", "2"))
+AUDIT_MAX_BUFFER = int(os.getenv("AUDIT_MAX_BUFFER", "10000"))
+
+
+class AuditLogWriter:
+    """Buffer de auditoría con vaciado en bloque"""
+
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        flush_size: int = AUDIT_FLUSH_SIZE,
+        flush_interval: float = AUDIT_FLUSH_INTERVAL_SECONDS,
+        max_buffer: int = AUDIT_MAX_BUFFER
+    ):
+        self.session_factory = session_factory
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self._buffer: Deque[Dict] = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        # Métricas
+        self.written = 0
+        self.dropped = 0
+        self.flushes = 0
+
+    def log(
+        self,
+        user_id: Optional[int],
+        action_type: ActionType,
+        description: str = None,
+        ip_address: str = None,
+        user_agent: str = None
+    ) -> None:
+        """Encolar un registro de auditoría (con la hora del evento, no la del vaciado)"""
+        row = {
+            "user_id": user_id,
+            "action_type": action_type,
+            "description": description,
+            "ip_address": ip_address,
+            "user_agent": user_agent,
+            "created_at": datetime.now(timezone.utc),
+        }
+        with self._lock:
+            if len(self._buffer) >= self.max_buffer:
+                self._buffer.popleft()
+                self.dropped += 1
+            self._buffer.append(row)
+            pending = len(self._buffer)
+
+        if self._thread is None:
+            # Sin hilo de fondo (scripts, pruebas): escribir de inmediato
+            self.flush()
+        elif pending >= self.flush_size:
+            self._wake.set()
+
+    def start(self) -> None:
+        """Iniciar el hilo de vaciado periódico"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Detener el hilo y vaciar lo pendiente"""
+        if self._thread is not None:
+            self._stop.set()
+            self._wake.set()
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def flush(self) -> int:
+        """Insertar en bloque los registros pendientes; retorna cuántos se escribieron"""
+        with self._flush_lock:
+            with self._lock:
+                rows = list(self._buffer)
+                self._buffer.clear()
+            if not rows:
+                return 0
+
+            db = self.session_factory()
+            try:
+                db.execute(insert(AuditLog), rows)
+                apply_rollup(db, rows)
+                db.commit()
+                written = len(rows)
+            except Exception as e:
+                db.rollback()
+                print(f"⚠️ Error insertando auditoría en bloque ({len(rows)} registros): {e}")
+                written = self._insert_one_by_one(db, rows)
+            finally:
+                db.close()
+
+            with self._lock:
+                self.written += written
+                self.flushes += 1
+            return written
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "pending": len(self._buffer),
+                "written": self.written,
+                "dropped": self.dropped,
+                "flushes": self.flushes,
+                "flush_size": self.flush_size,
+                "flush_interval_seconds": self.flush_interval,
+            }
+
+    def _insert_one_by_one(self, db, rows: List[Dict]) -> int:
+        """
+        Respaldo si el bloque falla: fila por fila, y sin usuario si este ya no existe
+        (p. ej. el usuario se eliminó antes del vaciado)
+        """
+        written = 0
+        for row in rows:
+            for candidate in (row, {**row, "user_id": None}):
+                try:
+                    db.execute(insert(AuditLog), [candidate])
+                    apply_rollup(db, [candidate])
+                    db.commit()
+                    written += 1
+                    break
+                except Exception:
+                    db.rollback()
+            else:
+                with self._lock:
+                    self.dropped += 1
+        return written
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"⚠️ Error vaciando auditoría: {e}")
+
+
+# Instancia compartida; main.py la inicia y la detiene con la aplicación
+audit_writer = AuditLogWriter()
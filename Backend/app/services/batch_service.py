@@ -0,0 +1,127 @@
+"""
+Servicio de análisis por lotes
+Analiza varios libros (o todas las hojas de un libro) en el pool de análisis
+compartido, sin exceder sus límites de cola
+"""
+import asyncio
+import os
+from typing import Dict, List
+
+from app.services.analysis_executor import AnalysisExecutor, analysis_executor, read_and_analyze
+
+# Configuración
+BATCH_MAX_FILES = int(os.getenv("BATCH_MAX_FILES", "200"))
+
+# Indicadores del último año que se incluyen en el resumen consolidado
+SUMMARY_INDICATORS = {
+    "liquidez": ["razon_corriente", "prueba_acida"],
+    "rentabilidad": ["roe", "roa", "margen_neto"],
+    "endeudamiento": ["endeudamiento_total", "deuda_patrimonio"],
+    "quiebra": ["z_score"],
+}
+
+
+class BatchService:
+    """Ejecuta AnalysisService sobre muchos libros/hojas en el pool compartido"""
+
+    def __init__(self, executor: AnalysisExecutor = analysis_executor):
+        self.executor = executor
+
+    async def analyze_batch(self, jobs: List[Dict]) -> Dict:
+        """
+        Analiza una lista de trabajos en el pool de análisis
+
+        Cada trabajo es {"filename", "path", "sheet"}; los que traen "error"
+        (p. ej. extensión no válida) se reportan sin ejecutarse.
+        El lote reserva a lo sumo max_workers lugares del pool y los reutiliza hoja
+        por hoja: lanza AnalysisQueueFull si el pool no tiene espacio.
+        Retorna resultados por archivo/hoja y un resumen consolidado.
+        """
+        pending = [i for i, job in enumerate(jobs) if not job.get("error")]
+        outcomes: Dict[int, object] = {}
+
+        window = min(self.executor.max_workers, len(pending))
+        if window:
+            self.executor.reserve(window)
+            try:
+                remaining = iter(pending)
+
+                async def analyze_remaining():
+                    for i in remaining:
+                        try:
+                            outcomes[i] = await self.executor.run(
+                                read_and_analyze, jobs[i]["path"], jobs[i].get("sheet"), reserved=True
+                            )
+                        except Exception as e:
+                            outcomes[i] = e
+
+                await asyncio.gather(*(analyze_remaining() for _ in range(window)))
+            finally:
+                self.executor.release(window)
+
+        results = []
+        for i, job in enumerate(jobs):
+            entry = {"filename": job["filename"], "sheet": job.get("sheet")}
+            outcome = outcomes.get(i)
+
+            if job.get("error"):
+                entry.update(status="error", error=job["error"])
+            elif isinstance(outcome, BaseException):
+                entry.update(status="error", error=f"Error procesando archivo: {str(outcome)}")
+            elif not outcome or not outcome.get("available_years"):
+                entry.update(
+                    status="error",
+                    error="No se pudieron extraer datos del archivo. Verifica que el formato sea correcto."
+                )
+            else:
+                entry.update(status="success", analysis=outcome)
+
+            results.append(entry)
+
+        return {
+            "results": results,
+            "summary": self.build_summary(results)
+        }
+
+    def build_summary(self, results: List[Dict]) -> Dict:
+        """Resumen consolidado: indicadores del último año por empresa y promedios del portafolio"""
+        companies = []
+        z_distribution = {}
+
+        for entry in results:
+            if entry["status"] != "success":
+                continue
+
+            analysis = entry["analysis"]
+            latest_year = str(max(analysis["available_years"]))
+            indicators = analysis.get("indicators", {})
+
+            company = {
+                "filename": entry["filename"],
+                "sheet": entry["sheet"],
+                "latest_year": int(latest_year),
+            }
+            for category, names in SUMMARY_INDICATORS.items():
+                for name in names:
+                    company[name] = indicators.get(category, {}).get(name, {}).get(latest_year)
+
+            clasificacion = indicators.get("quiebra", {}).get("clasificacion_z", {}).get(latest_year, "Sin datos")
+            company["clasificacion_z"] = clasificacion
+            z_distribution[clasificacion] = z_distribution.get(clasificacion, 0) + 1
+
+            companies.append(company)
+
+        averages = {}
+        for names in SUMMARY_INDICATORS.values():
+            for name in names:
+                values = [c[name] for c in companies if isinstance(c[name], (int, float))]
+                averages[name] = round(sum(values) / len(values), 4) if values else None
+
+        return {
+            "total": len(results),
+            "successful": len(companies),
+            "failed": len(results) - len(companies),
+            "companies": companies,
+            "averages": averages,
+            "z_score_distribution": z_distribution,
+        }
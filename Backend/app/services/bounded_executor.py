@@ -0,0 +1,227 @@
+"""
+Pool acotado de procesos o hilos
+Límite de trabajos en curso (workers + cola), rechazo inmediato cuando se llena
+y métricas de espera/ejecución. Base del pool de análisis y del de contraseñas.
+La cola se mantiene aquí (no en el pool): un trabajo se envía al pool solo cuando
+hay un worker libre, así on_start marca el inicio real de la ejecución.
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Deque, Dict, Optional
+
+
+class QueueFull(Exception):
+    """No hay espacio en la cola del pool"""
+
+
+def _timed_call(fn: Callable, *args):
+    """Ejecuta fn y retorna (resultado, segundos de ejecución dentro del worker)"""
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+class BoundedExecutor:
+    """Ejecuta funciones en un pool con backpressure"""
+
+    # Excepción que se lanza con el pool lleno (las subclases usan la suya)
+    full_error = QueueFull
+    thread_name_prefix = "worker"
+
+    def __init__(self, kind: str, max_workers: int, max_queue: int):
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor: Optional[Executor] = None
+
+        # Métricas: se cierran desde el hilo que termina el trabajo, de ahí el lock
+        self._lock = threading.Lock()
+        self._running = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self.in_flight = 0
+        self.max_queue_depth = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.total_exec_seconds = 0.0
+        self.max_exec_seconds = 0.0
+        self.total_wait_seconds = 0.0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "thread":
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=self.thread_name_prefix)
+            else:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def shutdown(self) -> None:
+        """Cerrar el pool"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def _discard_broken_executor(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    @property
+    def queue_depth(self) -> int:
+        """Trabajos esperando un worker libre"""
+        return max(0, self.in_flight - self.max_workers)
+
+    def reserve(self, count: int = 1) -> None:
+        """
+        Reservar count lugares de forma atómica (lanza full_error si no caben)
+        Los trabajos con reserved=True los usan; el llamador los libera con release()
+        """
+        with self._lock:
+            if self.in_flight + count > self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise self.full_error()
+            self.in_flight += count
+            self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+
+    def release(self, count: int = 1) -> None:
+        with self._lock:
+            self.in_flight -= count
+
+    async def _acquire_worker(self) -> None:
+        """Esperar un worker libre (en orden de llegada)"""
+        with self._lock:
+            if self._running < self.max_workers and not self._waiters:
+                self._running += 1
+                return
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                    handed_over = False
+                else:
+                    # Si el worker ya se entregó (o se entregará en _wake), devolverlo
+                    handed_over = not waiter.cancelled()
+            if handed_over:
+                self._release_worker()
+            raise
+
+    def _release_worker(self) -> None:
+        """Pasar el worker al siguiente en espera o dejarlo libre (desde cualquier hilo)"""
+        while True:
+            with self._lock:
+                if not self._waiters:
+                    self._running -= 1
+                    return
+                waiter = self._waiters.popleft()
+            try:
+                waiter.get_loop().call_soon_threadsafe(self._wake, waiter)
+                return
+            except RuntimeError:
+                # El event loop de ese waiter ya se cerró: probar con el siguiente
+                continue
+
+    def _wake(self, waiter: asyncio.Future) -> None:
+        if waiter.done():
+            # Se canceló mientras tanto: el worker pasa al siguiente
+            self._release_worker()
+        else:
+            waiter.set_result(None)
+
+    async def run(
+        self,
+        fn: Callable,
+        *args,
+        reserved: bool = False,
+        on_start: Optional[Callable[[], None]] = None
+    ):
+        """
+        Ejecuta fn(*args) en el pool sin bloquear el event loop
+        Lanza full_error si ya hay max_workers + max_queue trabajos en curso,
+        salvo que el lugar se haya tomado antes con reserve() (reserved=True).
+        on_start se llama en el event loop cuando un worker toma el trabajo
+        """
+        if not reserved:
+            self.reserve()
+
+        start = time.perf_counter()
+        try:
+            await self._acquire_worker()
+        except BaseException:
+            if not reserved:
+                self.release()
+            raise
+
+        try:
+            if on_start is not None:
+                on_start()
+            future = self._get_executor().submit(_timed_call, fn, *args)
+        except BaseException as e:
+            if isinstance(e, BrokenProcessPool):
+                self._discard_broken_executor()
+            self._release_worker()
+            if not reserved:
+                self.release()
+            raise
+        # El lugar se libera cuando el pool termina el trabajo, no cuando la petición
+        # deja de esperarlo: si el cliente se desconecta el trabajo sigue ocupando un worker
+        state = {"release": not reserved, "finished": False}
+        future.add_done_callback(lambda done: self._finished(done, start, state))
+
+        try:
+            result, _exec_seconds = await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            with self._lock:
+                if not state["release"] and not state["finished"]:
+                    # El llamador soltará su reserva al cancelarse: el trabajo que sigue
+                    # en el pool toma un lugar propio hasta terminar
+                    state["release"] = True
+                    self.in_flight += 1
+            raise
+        except BrokenProcessPool:
+            # Un worker murió: cerrar y descartar el pool para que el próximo trabajo cree uno nuevo
+            self._discard_broken_executor()
+            raise
+        return result
+
+    def _finished(self, future: Future, start: float, state: Dict) -> None:
+        """Callback del pool (hilo del worker o de gestión del pool de procesos)"""
+        self._release_worker()
+        with self._lock:
+            state["finished"] = True
+            if state["release"]:
+                self.in_flight -= 1
+            if future.cancelled() or future.exception() is not None:
+                self.failed += 1
+                return
+            _result, exec_seconds = future.result()
+            self.completed += 1
+            self.total_exec_seconds += exec_seconds
+            self.max_exec_seconds = max(self.max_exec_seconds, exec_seconds)
+            self.total_wait_seconds += max(0.0, time.perf_counter() - start - exec_seconds)
+
+    def stats(self) -> Dict:
+        """Profundidad de cola y tiempos de ejecución"""
+        with self._lock:
+            return {
+                "executor": self.kind,
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "in_flight": self.in_flight,
+                "running": self._running,
+                "queue_depth": self.queue_depth,
+                "max_queue_depth": self.max_queue_depth,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "avg_exec_seconds": round(self.total_exec_seconds / self.completed, 4) if self.completed else 0.0,
+                "max_exec_seconds": round(self.max_exec_seconds, 4),
+                "avg_wait_seconds": round(self.total_wait_seconds / self.completed, 4) if self.completed else 0.0,
+            }
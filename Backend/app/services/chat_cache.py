@@ -0,0 +1,107 @@
+"""
+Caché de respuestas del chat
+Clave: pregunta normalizada (sin mayúsculas, tildes, signos ni palabras vacías)
++ hash del contexto de indicadores enviado al modelo; con TTL y expulsión LRU
+"""
+import hashlib
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+# Configuración
+CHAT_CACHE_SIZE = int(os.getenv("CHAT_CACHE_SIZE", "1024"))
+CHAT_CACHE_TTL_SECONDS = int(os.getenv("CHAT_CACHE_TTL_SECONDS", "3600"))
+
+# Palabras que no cambian el sentido de la pregunta. Los posesivos (mi, su) y los
+# interrogativos cual/como se conservan: "¿cuál es mi liquidez?" pide el valor del
+# usuario y "¿qué es la liquidez?" la definición, no deben compartir respuesta
+STOPWORDS = {
+    "a", "al", "con", "de", "del", "dime", "el", "en", "es", "esta",
+    "explica", "explicame", "la", "las", "lo", "los", "me", "para", "por", "favor",
+    "que", "se", "significa", "sobre", "un", "una", "y",
+}
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*")
+
+
+def normalize_question(question: str) -> str:
+    """
+    '¿Qué es el Z-Score?' y 'explica z-score' -> 'z-score'
+    Se conserva el orden de las palabras: 'ROE mayor que ROA' no equivale a 'ROA mayor que ROE'
+    """
+    text = unicodedata.normalize("NFKD", question.lower())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    tokens = _TOKEN_PATTERN.findall(text)
+    meaningful = [token for token in tokens if token not in STOPWORDS]
+    return " ".join(meaningful or tokens)
+
+
+class ChatCache:
+    """LRU acotada con vencimiento de respuestas del modelo"""
+
+    def __init__(self, max_entries: int = CHAT_CACHE_SIZE, ttl_seconds: int = CHAT_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def make_key(self, question: str, context: str, model: str = "") -> str:
+        """Clave: modelo + pregunta normalizada + hash del contexto de indicadores"""
+        context_digest = hashlib.sha256(context.encode("utf-8")).hexdigest()[:16]
+        return f"{model}:{normalize_question(question)}:{context_digest}"
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(entry[1])
+
+    def put(self, key: str, response: Dict) -> None:
+        if self.max_entries <= 0 or self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, dict(response))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        """Contadores de aciertos/fallos y ocupación"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+# Instancia compartida por el servicio de chat
+chat_cache = ChatCache()
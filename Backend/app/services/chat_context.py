@@ -0,0 +1,179 @@
+"""
+Contexto compacto para el chat
+Resume un análisis (último año, tendencia frente al año anterior y alertas) en un
+texto corto con presupuesto de tokens; se calcula una vez al guardar el análisis
+junto con los valores formateados que citan las respuestas locales (chat_fallback)
+"""
+import os
+from typing import Dict, List, Optional, Tuple
+
+# Versión del formato: los contextos guardados con otra versión se recalculan
+CHAT_CONTEXT_VERSION = "2"
+CHAT_CONTEXT_TOKEN_BUDGET = int(os.getenv("CHAT_CONTEXT_TOKEN_BUDGET", "180"))
+
+# Aproximación suficiente para texto en español con cifras
+CHARS_PER_TOKEN = 4
+
+# (categoría, indicador, etiqueta, formato) en orden de prioridad
+KEY_INDICATORS = [
+    ("liquidez", "razon_corriente", "Razón corriente", "ratio"),
+    ("endeudamiento", "endeudamiento_total", "Endeudamiento", "pct"),
+    ("quiebra", "z_score", "Z-Score", "ratio"),
+    ("rentabilidad", "roe", "ROE", "pct"),
+    ("rentabilidad", "roa", "ROA", "pct"),
+    ("rentabilidad", "margen_neto", "Margen neto", "pct"),
+    ("liquidez", "prueba_acida", "Prueba ácida", "ratio"),
+    ("endeudamiento", "deuda_patrimonio", "Deuda/Patrimonio", "ratio"),
+    ("rentabilidad", "margen_bruto", "Margen bruto", "pct"),
+    ("rotacion", "dias_cartera", "Días de cartera", "days"),
+    ("rotacion", "dias_inventario", "Días de inventario", "days"),
+    ("endeudamiento", "cobertura_intereses", "Cobertura de intereses", "ratio"),
+]
+
+CLASSIFICATIONS = [
+    ("liquidez", "clasificacion_liquidez", "Liquidez"),
+    ("endeudamiento", "clasificacion_riesgo", "Riesgo"),
+    ("quiebra", "clasificacion_z", "Quiebra"),
+]
+
+
+def _value(indicators: Dict, category: str, name: str, year: str):
+    return indicators.get(category, {}).get(name, {}).get(year)
+
+
+def _format(value: float, kind: str) -> str:
+    if kind == "pct":
+        return f"{value * 100:.1f}%"
+    if kind == "days":
+        return f"{value:.0f} días"
+    return f"{value:.2f}"
+
+
+def _trend(current: float, previous: Optional[float], kind: str) -> str:
+    if not isinstance(previous, (int, float)) or previous == current:
+        return ""
+    if kind == "pct":
+        return f" ({'+' if current > previous else ''}{(current - previous) * 100:.1f} pp)"
+    if previous == 0:
+        return " (↑)" if current > previous else " (↓)"
+    return f" ({(current - previous) / abs(previous) * 100:+.0f}%)"
+
+
+def _flags(indicators: Dict, year: str) -> List[str]:
+    """Alertas con los mismos umbrales que el motor de indicadores"""
+    flags = []
+    razon_corriente = _value(indicators, "liquidez", "razon_corriente", year)
+    endeudamiento = _value(indicators, "endeudamiento", "endeudamiento_total", year)
+    z_score = _value(indicators, "quiebra", "z_score", year)
+    roe = _value(indicators, "rentabilidad", "roe", year)
+
+    if isinstance(razon_corriente, (int, float)) and 0 < razon_corriente < 1.0:
+        flags.append("liquidez crítica (razón corriente < 1)")
+    if isinstance(endeudamiento, (int, float)) and endeudamiento > 0.6:
+        flags.append("endeudamiento alto (> 60%)")
+    if isinstance(z_score, (int, float)) and 0 < z_score < 1.81:
+        flags.append("Z-Score en zona de peligro")
+    if isinstance(roe, (int, float)) and roe < 0:
+        flags.append("pérdidas (ROE negativo)")
+    return flags
+
+
+def _years(analysis: Optional[Dict]) -> Tuple[Optional[str], Optional[str]]:
+    """(último año, año anterior) del análisis; (None, None) si no hay indicadores"""
+    if not analysis or not analysis.get("indicators"):
+        return None, None
+    years = sorted(str(year) for year in analysis.get("available_years", []))
+    if not years:
+        return None, None
+    return years[-1], (years[-2] if len(years) > 1 else None)
+
+
+def context_values(analysis: Optional[Dict]) -> Dict[str, str]:
+    """
+    Valores del último año ya formateados (con tendencia), por nombre de indicador
+    Incluye year, las clasificaciones y alertas si hay alguna
+    """
+    latest, previous = _years(analysis)
+    if latest is None:
+        return {}
+
+    indicators = analysis["indicators"]
+    values = {"year": latest}
+    flags = _flags(indicators, latest)
+    if flags:
+        values["alertas"] = "; ".join(flags)
+    for category, name, _label in CLASSIFICATIONS:
+        classification = _value(indicators, category, name, latest)
+        if isinstance(classification, str):
+            values[name] = classification
+    for category, name, _label, kind in KEY_INDICATORS:
+        current = _value(indicators, category, name, latest)
+        if not isinstance(current, (int, float)):
+            continue
+        prior = _value(indicators, category, name, previous) if previous else None
+        values[name] = f"{_format(current, kind)}{_trend(current, prior, kind)}"
+    return values
+
+
+def build_compact_context(analysis: Optional[Dict], token_budget: int = CHAT_CONTEXT_TOKEN_BUDGET) -> str:
+    """
+    Texto de contexto para el modelo, dentro de token_budget tokens aproximados
+    Las líneas se agregan por prioridad: año, alertas, clasificaciones e indicadores
+    """
+    latest, _previous = _years(analysis)
+    if latest is None:
+        return ""
+
+    years = sorted(str(year) for year in analysis.get("available_years", []))
+    values = context_values(analysis)
+    lines = [f"Datos financieros (último año {latest}; años {', '.join(years)})"]
+
+    if "alertas" in values:
+        lines.append("Alertas: " + values["alertas"])
+
+    classifications = [
+        f"{label} {values[name]}"
+        for _category, name, label in CLASSIFICATIONS
+        if name in values
+    ]
+    if classifications:
+        lines.append("Clasificación: " + ", ".join(classifications))
+
+    for _category, name, label, _kind in KEY_INDICATORS:
+        if name in values:
+            lines.append(f"- {label}: {values[name]}")
+
+    max_chars = token_budget * CHARS_PER_TOKEN
+    context, used = [], 0
+    for line in lines:
+        if used + len(line) + 1 > max_chars:
+            break
+        context.append(line)
+        used += len(line) + 1
+    return "\n".join(context)
+
+
+def compact_context(analysis: Optional[Dict]) -> Dict:
+    """Contexto para el modelo (text) y valores para las respuestas locales (values)"""
+    return {"text": build_compact_context(analysis), "values": context_values(analysis)}
+
+
+def attach_chat_context(analysis: Dict) -> Dict:
+    """Guardar el contexto precalculado dentro del análisis (se persiste con él)"""
+    analysis["chat_context"] = {"version": CHAT_CONTEXT_VERSION, **compact_context(analysis)}
+    return analysis
+
+
+def without_chat_context(analysis: Dict) -> Dict:
+    """Copia del análisis sin el contexto interno del chat (para respuestas y exportaciones)"""
+    return {key: value for key, value in analysis.items() if key != "chat_context"}
+
+
+def stored_chat_context(analysis: Optional[Dict]) -> Dict:
+    """Contexto precalculado del análisis; se recalcula si falta o es de otra versión"""
+    if not analysis:
+        return {"text": "", "values": {}}
+    stored = analysis.get("chat_context")
+    if isinstance(stored, dict) and stored.get("version") == CHAT_CONTEXT_VERSION:
+        return {"text": stored.get("text", ""), "values": stored.get("values", {})}
+    return compact_context(analysis)
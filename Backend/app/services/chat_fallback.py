@@ -0,0 +1,243 @@
+"""
+Respuestas locales del chat (sin red)
+Un autómata Aho–Corasick precompilado encuentra todas las palabras clave del corpus
+de preguntas frecuentes en una sola pasada; la respuesta se arma con una plantilla
+que cita los valores del análisis del usuario (ver chat_context.context_values).
+El corpus se amplía con CHAT_FAQ_PATH (JSON con una lista de entradas).
+"""
+import json
+import os
+import string
+import unicodedata
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Configuración
+CHAT_FAQ_PATH = os.getenv("CHAT_FAQ_PATH")
+
+DEFAULT_FALLBACK_RESPONSE = "Puedo ayudarte con conceptos financieros. ¿Preguntas sobre indicadores?"
+
+# Corpus base. Cada entrada: id, keywords, answer (genérica), templates y weight opcionales;
+# se usa la primera plantilla cuyos campos existan en los valores del usuario
+FAQ_ENTRIES = [
+    {
+        "id": "liquidez",
+        "keywords": ["liquidez", "razon corriente", "prueba acida", "capital de trabajo"],
+        "templates": [
+            "Tu razón corriente {year} es {razon_corriente} (clasificación {clasificacion_liquidez}). Lo adecuado es 1.5-2.0; menos de 1 indica riesgo.",
+            "Tu razón corriente {year} es {razon_corriente}. Lo adecuado es 1.5-2.0; menos de 1 indica riesgo.",
+        ],
+        "answer": "Tu liquidez es adecuada si la razón corriente está entre 1.5-2.0. Valores menores indican riesgo.",
+    },
+    {
+        "id": "rentabilidad",
+        "keywords": ["rentabilidad", "roe", "roa", "margen neto", "margen bruto", "utilidad", "ganancia"],
+        "templates": [
+            "Tu ROE {year} es {roe} y tu ROA {roa}. ROE mide rentabilidad sobre capital; ROA sobre activos totales.",
+            "Tu margen neto {year} es {margen_neto}. Mayores valores indican mejor rentabilidad.",
+        ],
+        "answer": "ROE mide rentabilidad sobre capital; ROA sobre activos totales. Mayores valores son mejores.",
+    },
+    {
+        "id": "endeudamiento",
+        "keywords": ["endeudamiento", "deuda", "apalancamiento", "pasivo"],
+        "templates": [
+            "Tu endeudamiento {year} es {endeudamiento_total} (riesgo {clasificacion_riesgo}). Sobre 60% se considera alto.",
+            "Tu endeudamiento {year} es {endeudamiento_total}. Sobre 60% se considera alto.",
+        ],
+        "answer": "Endeudamiento sobre 60% se considera alto. Indica mayor riesgo financiero.",
+    },
+    {
+        "id": "cobertura",
+        "keywords": ["cobertura de intereses", "intereses"],
+        "templates": [
+            "Tu cobertura de intereses {year} es {cobertura_intereses}. Menos de 1.5 indica dificultad para pagar intereses.",
+        ],
+        "answer": "La cobertura de intereses compara utilidad operativa con gastos financieros. Menos de 1.5 es riesgoso.",
+    },
+    {
+        "id": "rotacion",
+        "keywords": ["rotacion", "cartera", "inventario", "eficiencia"],
+        "templates": [
+            "En {year} cobras en {dias_cartera} y rotas inventario en {dias_inventario}. Menos días indican mejor gestión operativa.",
+            "En {year} cobras en {dias_cartera}. Menos días indican mejor gestión de cartera.",
+        ],
+        "answer": "Mayor rotación indica mejor gestión operativa. Mide eficiencia en uso de activos.",
+    },
+    {
+        "id": "quiebra",
+        "keywords": ["quiebra", "z-score", "z score", "zscore", "altman", "insolvencia"],
+        "templates": [
+            "Tu Z-Score {year} es {z_score} ({clasificacion_z}). >2.99 es seguro, 1.81-2.99 zona gris, <1.81 peligro.",
+            "Tu Z-Score {year} es {z_score}. >2.99 es seguro, 1.81-2.99 zona gris, <1.81 peligro.",
+        ],
+        "answer": "Z-Score >2.99 es seguro, 1.81-2.99 es zona gris, <1.81 es peligro.",
+    },
+    {
+        "id": "resumen",
+        "keywords": ["resumen", "alertas", "salud financiera", "como estoy", "como esta mi empresa"],
+        "templates": [
+            "Alertas {year}: {alertas}. Revisa esos indicadores primero.",
+            "Sin alertas en {year}: liquidez {clasificacion_liquidez}, riesgo {clasificacion_riesgo}, {clasificacion_z}.",
+        ],
+        "answer": "Carga tus estados financieros para ver un resumen con alertas de liquidez, deuda y quiebra.",
+    },
+    {
+        "id": "exportar",
+        "keywords": ["exportar", "excel", "descargar"],
+        "answer": "Usa el botón de exportación para descargar el análisis completo en Excel.",
+    },
+    {
+        "id": "horizontal",
+        "keywords": ["horizontal"],
+        "answer": "Análisis horizontal compara estados financieros entre períodos, muestra variaciones.",
+    },
+    {
+        "id": "vertical",
+        "keywords": ["vertical"],
+        "answer": "Análisis vertical muestra estructura porcentual sobre el total para comparar.",
+    },
+    {
+        "id": "saludo",
+        "keywords": ["hola", "buenos dias", "buenas tardes", "buenas noches", "saludos"],
+        # Un saludo solo responde si la pregunta no menciona otro tema
+        "weight": 0.1,
+        "answer": "Hola! Soy tu asistente financiero. ¿Qué deseas saber?",
+    },
+]
+
+_FORMATTER = string.Formatter()
+
+
+def fold(text: str) -> str:
+    """Minúsculas y sin tildes: 'Razón Corriente' -> 'razon corriente'"""
+    text = unicodedata.normalize("NFKD", text.lower())
+    return "".join(ch for ch in text if not unicodedata.combining(ch))
+
+
+def valid_entry(entry) -> bool:
+    return isinstance(entry, dict) and all(entry.get(field) for field in ("id", "keywords", "answer"))
+
+
+class KeywordMatcher:
+    """
+    Autómata Aho–Corasick: todas las ocurrencias de todas las palabras clave
+    en O(longitud del texto + coincidencias), sin importar el tamaño del corpus
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[str]] = [[]]
+        for keyword in keywords:
+            self._add(keyword)
+        self._link()
+
+    def _add(self, keyword: str) -> None:
+        state = 0
+        for ch in keyword:
+            next_state = self._goto[state].get(ch)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][ch] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        if keyword not in self._output[state]:
+            self._output[state].append(keyword)
+
+    def _link(self) -> None:
+        """Enlaces de fallo por anchura; cada estado hereda las salidas de su enlace"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(ch, 0)
+                self._output[next_state].extend(self._output[self._fail[next_state]])
+
+    def find(self, text: str) -> List[Tuple[int, str]]:
+        """(posición inicial, palabra clave) de cada ocurrencia como palabra completa"""
+        matches = []
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(ch, 0)
+            for keyword in self._output[state]:
+                start = i - len(keyword) + 1
+                # Solo palabras completas: 'roa' no coincide dentro de 'sobrearoa'
+                if (start == 0 or not text[start - 1].isalnum()) and (i + 1 == len(text) or not text[i + 1].isalnum()):
+                    matches.append((start, keyword))
+        return matches
+
+
+class FallbackResponder:
+    """Elige la entrada del corpus con más texto coincidente y rellena su plantilla"""
+
+    def __init__(self, entries: Iterable[Dict]):
+        self._entries: Dict[str, Dict] = {}
+        self.extend(entries)
+
+    def extend(self, entries: Iterable[Dict]) -> None:
+        """Agregar (o reemplazar por id) entradas y recompilar el autómata"""
+        for entry in entries:
+            if not valid_entry(entry):
+                raise ValueError(f"Entrada de FAQ incompleta: {entry}")
+            self._entries[entry["id"]] = entry
+        self._rank = {entry_id: rank for rank, entry_id in enumerate(self._entries)}
+        self._keyword_entry: Dict[str, str] = {}
+        for entry_id, entry in self._entries.items():
+            for keyword in entry["keywords"]:
+                self._keyword_entry.setdefault(fold(keyword), entry_id)
+        self._matcher = KeywordMatcher(self._keyword_entry)
+
+    def match(self, question: str) -> Optional[Dict]:
+        """
+        Entrada con mayor puntaje (longitud de las palabras clave encontradas por su weight);
+        a igualdad gana la que aparece primero en el corpus
+        """
+        scores: Dict[str, float] = {}
+        for keyword in {keyword for _start, keyword in self._matcher.find(fold(question))}:
+            entry_id = self._keyword_entry[keyword]
+            scores[entry_id] = scores.get(entry_id, 0) + len(keyword) * self._entries[entry_id].get("weight", 1)
+        if not scores:
+            return None
+        best = max(scores, key=lambda entry_id: (scores[entry_id], -self._rank[entry_id]))
+        return self._entries[best]
+
+    def respond(self, question: str, values: Optional[Dict[str, str]] = None) -> str:
+        entry = self.match(question)
+        if entry is None:
+            return DEFAULT_FALLBACK_RESPONSE
+        values = values or {}
+        for template in entry.get("templates", []):
+            fields = {name for _text, name, _spec, _conv in _FORMATTER.parse(template) if name}
+            if fields <= values.keys():
+                return template.format_map(values)
+        return entry["answer"]
+
+
+def load_faq_entries(path: Optional[str] = CHAT_FAQ_PATH) -> List[Dict]:
+    """Corpus base más las entradas del archivo CHAT_FAQ_PATH (si existe)"""
+    entries = list(FAQ_ENTRIES)
+    if path:
+        try:
+            with open(path, encoding="utf-8") as f:
+                extra = json.load(f)
+            if not isinstance(extra, list):
+                raise ValueError("se esperaba una lista de entradas")
+            skipped = [entry for entry in extra if not valid_entry(entry)]
+            entries.extend(entry for entry in extra if valid_entry(entry))
+            print(f"✅ FAQ del chat ampliado desde {path} ({len(extra) - len(skipped)} entradas, {len(skipped)} ignoradas)")
+        except (OSError, ValueError) as e:
+            print(f"⚠️ No se pudo cargar el FAQ del chat ({path}): {e}")
+    return entries
+
+
+# Instancia compartida (el autómata se compila una vez al importar)
+fallback_responder = FallbackResponder(load_faq_entries())
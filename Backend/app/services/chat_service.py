@@ -0,0 +1,262 @@
+"""
+Servicio de chat con IA
+Cliente asíncrono de OpenAI (pool de conexiones compartido, timeout por petición)
+con respuesta completa o por tokens (SSE). El backend es intercambiable:
+CHAT_BACKEND=stub usa un simulador local con latencia configurable para pruebas.
+"""
+import asyncio
+import json
+import os
+from typing import AsyncIterator, Dict, List, Optional
+
+from app.services.chat_cache import ChatCache, chat_cache
+from app.services.chat_fallback import fallback_responder
+
+# Configuración
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+CHAT_BACKEND = os.getenv("CHAT_BACKEND", "openai")  # openai | stub
+CHAT_MODEL = os.getenv("CHAT_MODEL", "gpt-3.5-turbo")
+CHAT_MAX_TOKENS = int(os.getenv("CHAT_MAX_TOKENS", "50"))
+CHAT_TEMPERATURE = float(os.getenv("CHAT_TEMPERATURE", "0.7"))
+CHAT_TIMEOUT_SECONDS = float(os.getenv("CHAT_TIMEOUT_SECONDS", "15"))
+CHAT_MAX_CONNECTIONS = int(os.getenv("CHAT_MAX_CONNECTIONS", "20"))
+CHAT_MAX_RETRIES = int(os.getenv("CHAT_MAX_RETRIES", "1"))
+
+# Simulador local
+CHAT_STUB_LATENCY_SECONDS = float(os.getenv("CHAT_STUB_LATENCY_SECONDS", "0.5"))
+CHAT_STUB_TOKEN_DELAY_SECONDS = float(os.getenv("CHAT_STUB_TOKEN_DELAY_SECONDS", "0.05"))
+
+SYSTEM_PROMPT = "Eres un asistente especializado en análisis financiero. Responde SIEMPRE en máximo 25 palabras de forma concisa, clara y directa."
+
+ERROR_FALLBACK_RESPONSE = "Puedo explicarte conceptos financieros básicos. ¿Tienes preguntas sobre los indicadores?"
+
+
+def error_fallback_result() -> Dict:
+    """Respuesta genérica cuando el backend o la petición fallan"""
+    return {"response": ERROR_FALLBACK_RESPONSE, "status": "success", "source": "error_fallback"}
+
+
+async def result_events(result: Dict) -> AsyncIterator[str]:
+    """Una respuesta ya armada como eventos SSE: un `token` con todo el texto y `done`"""
+    yield f"event: token\ndata: {json.dumps({'token': result['response']}, ensure_ascii=False)}\n\n"
+    yield f"event: done\ndata: {json.dumps(result, ensure_ascii=False)}\n\n"
+
+
+def build_messages(user_message: str, context: str) -> List[Dict]:
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": f"{context}\n\nPregunta: {user_message}"}
+    ]
+
+
+class OpenAIChatBackend:
+    """AsyncOpenAI sobre un httpx.AsyncClient compartido (conexiones keep-alive reutilizadas)"""
+
+    name = "openai"
+
+    def __init__(self, api_key: str):
+        import httpx
+        from openai import AsyncOpenAI
+
+        self._http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=CHAT_MAX_CONNECTIONS,
+                max_keepalive_connections=CHAT_MAX_CONNECTIONS
+            ),
+            timeout=CHAT_TIMEOUT_SECONDS
+        )
+        self._client = AsyncOpenAI(
+            api_key=api_key,
+            http_client=self._http_client,
+            max_retries=CHAT_MAX_RETRIES
+        )
+
+    async def complete(self, messages: List[Dict], timeout: float) -> str:
+        response = await self._client.chat.completions.create(
+            model=CHAT_MODEL,
+            messages=messages,
+            max_tokens=CHAT_MAX_TOKENS,
+            temperature=CHAT_TEMPERATURE,
+            timeout=timeout
+        )
+        return response.choices[0].message.content.strip()
+
+    async def stream(self, messages: List[Dict], timeout: float) -> AsyncIterator[str]:
+        stream = await self._client.chat.completions.create(
+            model=CHAT_MODEL,
+            messages=messages,
+            max_tokens=CHAT_MAX_TOKENS,
+            temperature=CHAT_TEMPERATURE,
+            timeout=timeout,
+            stream=True
+        )
+        try:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            # Devolver la conexión al pool aunque el cliente corte el stream
+            await stream.close()
+
+    async def aclose(self) -> None:
+        await self._http_client.aclose()
+
+
+class StubChatBackend:
+    """Simulador local: latencia inicial y un retardo por token, sin red"""
+
+    name = "stub"
+
+    def __init__(
+        self,
+        latency: float = CHAT_STUB_LATENCY_SECONDS,
+        token_delay: float = CHAT_STUB_TOKEN_DELAY_SECONDS
+    ):
+        self.latency = latency
+        self.token_delay = token_delay
+
+    def _answer(self, messages: List[Dict]) -> str:
+        question = messages[-1]["content"].rsplit("Pregunta:", 1)[-1].strip()
+        return f"[stub] {fallback_responder.respond(question)}"
+
+    async def complete(self, messages: List[Dict], timeout: float) -> str:
+        async for _ in self.stream(messages, timeout):
+            pass
+        return self._answer(messages)
+
+    async def stream(self, messages: List[Dict], timeout: float) -> AsyncIterator[str]:
+        await asyncio.sleep(self.latency)
+        words = self._answer(messages).split(" ")
+        for i, word in enumerate(words):
+            await asyncio.sleep(self.token_delay)
+            yield word if i == 0 else f" {word}"
+
+    async def aclose(self) -> None:
+        pass
+
+
+def create_backend():
+    """Backend según CHAT_BACKEND; None si OpenAI no está configurado (modo fallback)"""
+    if CHAT_BACKEND == "stub":
+        return StubChatBackend()
+    if not OPENAI_API_KEY:
+        print("⚠️ API Key de OpenAI no configurada. Usando respuestas fallback.")
+        return None
+    try:
+        backend = OpenAIChatBackend(OPENAI_API_KEY)
+        print("✅ OpenAI configurado correctamente")
+        return backend
+    except Exception as e:
+        print(f"❌ Error configurando OpenAI: {e}")
+        return None
+
+
+class ChatService:
+    """Chat financiero: modelo remoto con respaldo local por palabras clave (chat_fallback)"""
+
+    def __init__(self, backend=None, timeout: float = CHAT_TIMEOUT_SECONDS, cache: Optional[ChatCache] = None):
+        self.backend = backend
+        self.timeout = timeout
+        self.cache = cache
+
+    @property
+    def available(self) -> bool:
+        return self.backend is not None
+
+    async def answer(self, user_message: str, context: str = "", values: Optional[Dict[str, str]] = None) -> Dict:
+        """
+        Respuesta completa (contrato de POST /chat)
+        `context` es el resumen compacto del análisis y `values` sus valores formateados,
+        que cita la respuesta local cuando no hay modelo (ver chat_context)
+        """
+        if not self.available:
+            return {"response": fallback_responder.respond(user_message, values), "status": "success", "source": "fallback"}
+
+        cache_key = self._cache_key(user_message, context)
+        cached = self.cache.get(cache_key) if self.cache else None
+        if cached is not None:
+            return {**cached, "cached": True}
+
+        messages = build_messages(user_message, context)
+        try:
+            # El timeout cubre también los reintentos del cliente
+            ai_response = await asyncio.wait_for(
+                self.backend.complete(messages, self.timeout),
+                timeout=self.timeout
+            )
+        except Exception as e:
+            print(f"Error en chat: {str(e) or type(e).__name__}")
+            return error_fallback_result()
+
+        result = {"response": ai_response, "status": "success", "source": self.backend.name}
+        if self.cache:
+            self.cache.put(cache_key, result)
+        return result
+
+    async def stream_events(
+        self,
+        user_message: str,
+        context: str = "",
+        values: Optional[Dict[str, str]] = None
+    ) -> AsyncIterator[str]:
+        """
+        Respuesta en formato SSE: un evento `token` por fragmento y un evento `done`
+        con la respuesta completa (mismo contenido que retorna POST /chat)
+        """
+        if not self.available:
+            result = {"response": fallback_responder.respond(user_message, values), "status": "success", "source": "fallback"}
+            async for event in result_events(result):
+                yield event
+            return
+
+        cache_key = self._cache_key(user_message, context)
+        cached = self.cache.get(cache_key) if self.cache else None
+        if cached is not None:
+            async for event in result_events({**cached, "cached": True}):
+                yield event
+            return
+
+        messages = build_messages(user_message, context)
+        tokens: List[str] = []
+        source = self.backend.name
+        completed = False
+        stream = self.backend.stream(messages, self.timeout)
+        try:
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + self.timeout
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    raise asyncio.TimeoutError()
+                try:
+                    token = await asyncio.wait_for(stream.__anext__(), timeout=remaining)
+                except StopAsyncIteration:
+                    completed = True
+                    break
+                tokens.append(token)
+                yield f"event: token\ndata: {json.dumps({'token': token}, ensure_ascii=False)}\n\n"
+        except Exception as e:
+            print(f"Error en chat (streaming): {str(e) or type(e).__name__}")
+            if not tokens:
+                tokens = [ERROR_FALLBACK_RESPONSE]
+                source = "error_fallback"
+                yield f"event: token\ndata: {json.dumps({'token': ERROR_FALLBACK_RESPONSE}, ensure_ascii=False)}\n\n"
+        finally:
+            await stream.aclose()
+
+        result = {"response": "".join(tokens).strip(), "status": "success", "source": source}
+        # Solo respuestas completas: un stream cortado no se reutiliza
+        if completed and self.cache:
+            self.cache.put(cache_key, result)
+        yield f"event: done\ndata: {json.dumps(result, ensure_ascii=False)}\n\n"
+
+    def _cache_key(self, user_message: str, context: str) -> str:
+        return self.cache.make_key(user_message, context, f"{self.backend.name}:{CHAT_MODEL}") if self.cache else ""
+
+    async def aclose(self) -> None:
+        if self.backend is not None:
+            await self.backend.aclose()
+
+
+# Instancia compartida (un solo pool de conexiones para toda la API)
+chat_service = ChatService(create_backend(), cache=chat_cache)
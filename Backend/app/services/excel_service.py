@@ -0,0 +1,219 @@
+"""
+Lectura de archivos Excel en modo streaming (openpyxl read-only)
+Solo carga las filas que el análisis financiero necesita
+"""
+import os
+import tempfile
+from itertools import islice
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+from fastapi import UploadFile
+from openpyxl import load_workbook
+from openpyxl.cell.cell import TYPE_ERROR, TYPE_NUMERIC
+
+from app.services.analysis_service import AnalysisService, CONCEPT_SEARCH_TERMS
+
+# Tamaño de los bloques al copiar el archivo subido a disco
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Filas leídas entre cada verificación de "ya tenemos todo lo necesario"
+STREAM_BLOCK_ROWS = 256
+
+# Filas adicionales (tras detener la lectura) donde se buscan datos de columnas vacías
+EMPTY_COLUMN_SCAN_ROWS = 1024
+
+# Textos que pd.read_excel interpreta como valor faltante (na_values por defecto)
+NA_STRINGS = frozenset({
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+})
+
+
+class ExcelService:
+    """Ingesta de hojas de cálculo para el análisis financiero"""
+
+    def __init__(self, analysis_service: Optional[AnalysisService] = None):
+        self.analysis_service = analysis_service or AnalysisService()
+
+    async def spool_upload(self, file: UploadFile, digest=None) -> str:
+        """
+        Copia el archivo subido a un archivo temporal por bloques
+        Si se pasa `digest` (p. ej. hashlib.sha256()), se actualiza con los mismos bloques
+        Retorna la ruta; quien llama debe eliminarlo con remove_spooled_file
+        """
+        suffix = os.path.splitext(file.filename or "")[1] or ".xlsx"
+        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+            while True:
+                chunk = await file.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                tmp.write(chunk)
+                if digest is not None:
+                    digest.update(chunk)
+            return tmp.name
+
+    @staticmethod
+    def remove_spooled_file(path: str) -> None:
+        """Eliminar archivo temporal creado por spool_upload"""
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def read_financial_sheet(self, path: str, sheet_name: Optional[str] = None) -> pd.DataFrame:
+        """
+        Lee una hoja en modo read-only y deja de leer en cuanto se encontraron
+        la fila de años y todas las filas de conceptos que usa AnalysisService
+
+        El DataFrame resultante equivale a pd.read_excel(..., engine='openpyxl') sobre las
+        filas leídas (primera fila como encabezado), ya sin columnas vacías: se pasa a
+        analyze_financial_data con drop_empty_columns=False. Una columna vacía en las filas
+        leídas se conserva si tiene datos en las EMPTY_COLUMN_SCAN_ROWS filas siguientes
+        """
+        workbook = load_workbook(path, read_only=True, data_only=True, keep_links=False)
+        try:
+            sheet = workbook[sheet_name] if sheet_name else workbook.worksheets[0]
+            sheet.reset_dimensions()
+            rows = iter(sheet.rows)
+            df = self._rows_to_dataframe(self._read_needed_rows(rows))
+
+            # Una columna vacía en las filas leídas puede tener datos más abajo (p. ej. notas al
+            # pie): con la hoja completa pandas la conservaría y las demás no se desplazarían.
+            # La búsqueda es acotada: las columnas separadoras suelen estar vacías en toda la hoja
+            empty_columns = {i for i in range(df.shape[1]) if df.iloc[:, i].isna().all()}
+            if empty_columns:
+                empty_columns -= self._columns_with_data(rows, empty_columns, EMPTY_COLUMN_SCAN_ROWS)
+        finally:
+            workbook.close()
+
+        return df.iloc[:, [i for i in range(df.shape[1]) if i not in empty_columns]]
+
+    def list_sheet_names(self, path: str) -> List[str]:
+        """Nombres de las hojas de un libro sin cargar su contenido"""
+        workbook = load_workbook(path, read_only=True, keep_links=False)
+        try:
+            return list(workbook.sheetnames)
+        finally:
+            workbook.close()
+
+    def _read_needed_rows(self, rows: Iterable) -> List[list]:
+        """Convierte filas de openpyxl hasta tener la fila de años y todos los conceptos"""
+        data = []
+        checked = 1  # La fila 0 es el encabezado del DataFrame
+        year_row_found = False
+        pending_terms = dict(CONCEPT_SEARCH_TERMS)
+
+        for row in rows:
+            data.append(self._convert_row(row))
+
+            if len(data) - checked < STREAM_BLOCK_ROWS:
+                continue
+
+            year_row_found, pending_terms = self._scan_block(data[checked:], year_row_found, pending_terms)
+            checked = len(data)
+            if year_row_found and not pending_terms:
+                print(f"📄 Lectura detenida en la fila {len(data)}: estructura completa encontrada")
+                break
+
+        return data
+
+    def _columns_with_data(self, rows: Iterable, columns: set, max_rows: int) -> set:
+        """
+        Cuáles de `columns` tienen algún valor en las siguientes max_rows filas
+        Solo revisa esas celdas y se detiene en cuanto todas tienen datos
+        """
+        found = set()
+        last_column = max(columns)
+        for row in islice(rows, max_rows):
+            for i, cell in enumerate(row):
+                if i > last_column:
+                    break
+                if i in columns and i not in found and not self._is_na(self._convert_cell(cell)):
+                    found.add(i)
+            if len(found) == len(columns):
+                break
+        return found
+
+    @staticmethod
+    def _is_na(value) -> bool:
+        """Mismo criterio de valor faltante que pd.read_excel"""
+        if isinstance(value, str):
+            return value in NA_STRINGS
+        return isinstance(value, float) and np.isnan(value)
+
+    def _scan_block(self, block_rows: List[list], year_row_found: bool, pending_terms: dict):
+        """Actualiza el estado de búsqueda (fila de años, conceptos pendientes) con un bloque"""
+        width = max((len(row) for row in block_rows), default=0)
+        block = np.full((len(block_rows), width), None, dtype=object)
+        for i, row in enumerate(block_rows):
+            block[i, :len(row)] = [None if cell == "" else cell for cell in row]
+
+        first_label_row = 0
+        if not year_row_found:
+            found = self.analysis_service._find_year_row_in_block(block)
+            if found is None:
+                return False, pending_terms
+            first_label_row = found[0] + 1
+
+        label_index = self.analysis_service._build_label_index(
+            pd.DataFrame(block), first_label_row - 1,
+            [term for terms in pending_terms.values() for term in terms]
+        )
+        pending_terms = {
+            concept: terms for concept, terms in pending_terms.items()
+            if self.analysis_service._find_concept_row(label_index, terms) is None
+        }
+        return True, pending_terms
+
+    @staticmethod
+    def _convert_cell(cell):
+        """Mismas conversiones que el lector openpyxl de pandas"""
+        if cell.value is None:
+            return ""
+        elif cell.data_type == TYPE_ERROR:
+            return np.nan
+        elif cell.data_type == TYPE_NUMERIC:
+            val = int(cell.value)
+            if val == cell.value:
+                return val
+            return float(cell.value)
+        return cell.value
+
+    def _convert_row(self, row) -> list:
+        converted = [self._convert_cell(cell) for cell in row]
+        while converted and converted[-1] == "":
+            converted.pop()
+        return converted
+
+    @staticmethod
+    def _rows_to_dataframe(data: List[list]) -> pd.DataFrame:
+        """Arma el DataFrame igual que pd.read_excel (header=0)"""
+        while data and not data[-1]:
+            data.pop()
+        if not data:
+            return pd.DataFrame()
+
+        max_width = max(len(row) for row in data)
+        header = data[0] + [""] * (max_width - len(data[0]))
+        body = [
+            [np.nan if ExcelService._is_na(value) else value for value in row] + [np.nan] * (max_width - len(row))
+            for row in data[1:]
+        ]
+        return pd.DataFrame(body, columns=ExcelService._column_names(header), dtype=object).infer_objects()
+
+    @staticmethod
+    def _column_names(header: list) -> list:
+        """Nombres de columna como pd.read_excel: 'Unnamed: i' si está vacío, 'X.1' si se repite"""
+        names = []
+        seen: Dict = {}
+        for i, value in enumerate(header):
+            name = f"Unnamed: {i}" if value == "" else value
+            if isinstance(name, str) and name in seen:
+                seen[name] += 1
+                name = f"{name}.{seen[name]}"
+            else:
+                seen.setdefault(name, 0)
+            names.append(name)
+        return names
@@ -0,0 +1,180 @@
+"""
+Motor columnar de indicadores financieros
+Calcula liquidez, rentabilidad, endeudamiento, rotación y Z-Score de Altman
+para todos los años (y todas las empresas) con operaciones de NumPy
+"""
+from typing import Callable, Dict, List
+
+import numpy as np
+
+# Orden de los conceptos (filas) en la matriz concepto × año
+ENGINE_CONCEPTS = [
+    'activo_corriente', 'pasivo_corriente', 'inventario', 'utilidad_neta',
+    'patrimonio', 'activo_total', 'pasivo_total', 'utilidad_bruta',
+    'ingresos', 'ventas', 'costo_ventas', 'cuentas_por_cobrar',
+    'gastos_intereses', 'utilidad_operacional',
+]
+
+# Indicadores por categoría con sus decimales de redondeo (None = texto)
+INDICATOR_LAYOUT = {
+    "liquidez": {
+        "razon_corriente": 4, "prueba_acida": 4, "capital_trabajo": 2,
+        "clasificacion_liquidez": None,
+    },
+    "rentabilidad": {
+        "roe": 4, "roa": 4, "margen_bruto": 4, "margen_neto": 4,
+    },
+    "endeudamiento": {
+        "endeudamiento_total": 4, "deuda_patrimonio": 4, "cobertura_intereses": 4,
+        "clasificacion_riesgo": None,
+    },
+    "rotacion": {
+        "rotacion_inventarios": 4, "rotacion_cartera": 4, "rotacion_activos": 4,
+        "dias_inventario": 2, "dias_cartera": 2,
+    },
+    "quiebra": {
+        "z_score": 4, "clasificacion_z": None, "probabilidad_quiebra": None,
+    },
+}
+
+
+class IndicatorEngine:
+    """Indicadores vectorizados sobre matrices (..., concepto, año)"""
+
+    def build_matrix(self, financial_values: Dict, years: List[int]) -> np.ndarray:
+        """Arma la matriz concepto × año (años ordenados); vacíos y NaN quedan en 0"""
+        matrix = np.array(
+            [[financial_values.get(concept, {}).get(year, 0) for year in years] for concept in ENGINE_CONCEPTS],
+            dtype=np.float64
+        ).reshape(len(ENGINE_CONCEPTS), len(years))
+        return np.where(np.isnan(matrix), 0.0, matrix)
+
+    def compute(self, matrix: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Calcula todos los indicadores sin redondear
+
+        `matrix` tiene forma (..., len(ENGINE_CONCEPTS), años) con los años ordenados;
+        los ejes iniciales (p. ej. empresas de un lote) se procesan a la vez.
+        Retorna un arreglo (..., años) por indicador, más `valid`, que marca los
+        años cuyo cálculo no es posible y deben usar los indicadores por defecto.
+        """
+        c = {concept: matrix[..., i, :] for i, concept in enumerate(ENGINE_CONCEPTS)}
+
+        # ✅ PROMEDIOS CON EL AÑO ANTERIOR (el primer año usa su propio valor)
+        patrimonio_promedio = self._average_with_previous(c['patrimonio'])
+        activo_promedio = self._average_with_previous(c['activo_total'])
+        inventario_promedio = self._average_with_previous(c['inventario'])
+        cxc_promedio = self._average_with_previous(c['cuentas_por_cobrar'])
+
+        ingresos = np.where(c['ingresos'] != 0, c['ingresos'], c['ventas'])
+        capital_trabajo = c['activo_corriente'] - c['pasivo_corriente']
+
+        result = {}
+
+        # Liquidez
+        razon_corriente = self._safe_divide(c['activo_corriente'], c['pasivo_corriente'])
+        result['razon_corriente'] = razon_corriente
+        result['prueba_acida'] = self._safe_divide(c['activo_corriente'] - c['inventario'], c['pasivo_corriente'])
+        result['capital_trabajo'] = capital_trabajo
+        result['clasificacion_liquidez'] = np.select(
+            [razon_corriente >= 1.5, razon_corriente >= 1.0], ["Sano", "Regular"], "Crítico"
+        )
+
+        # Rentabilidad
+        result['roe'] = self._safe_divide(c['utilidad_neta'], patrimonio_promedio)
+        result['roa'] = self._safe_divide(c['utilidad_neta'], activo_promedio)
+        result['margen_bruto'] = self._safe_divide(c['utilidad_bruta'], ingresos)
+        result['margen_neto'] = self._safe_divide(c['utilidad_neta'], ingresos)
+
+        # Endeudamiento
+        endeudamiento_total = self._safe_divide(c['pasivo_total'], c['activo_total'])
+        result['endeudamiento_total'] = endeudamiento_total
+        result['deuda_patrimonio'] = self._safe_divide(c['pasivo_total'], c['patrimonio'])
+        result['cobertura_intereses'] = self._safe_divide(c['utilidad_operacional'], c['gastos_intereses'])
+        result['clasificacion_riesgo'] = np.select(
+            [endeudamiento_total > 0.6, endeudamiento_total > 0.4], ["Alto", "Medio"], "Bajo"
+        )
+
+        # Rotación (solo calculable con promedios > 1 e ingresos/costos positivos)
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            inventario_ok = (inventario_promedio > 1) & (c['costo_ventas'] > 0)
+            rotacion_inventarios = np.where(inventario_ok, c['costo_ventas'] / inventario_promedio, 0.0)
+            dias_inventario = np.where(inventario_ok, 365 / rotacion_inventarios, 0.0)
+
+            cartera_ok = (cxc_promedio > 1) & (ingresos > 0)
+            rotacion_cartera = np.where(cartera_ok, ingresos / cxc_promedio, 0.0)
+            dias_cartera = np.where(cartera_ok, 365 / rotacion_cartera, 0.0)
+
+            activos_ok = (activo_promedio > 1) & (ingresos > 0)
+            rotacion_activos = np.where(activos_ok, ingresos / activo_promedio, 0.0)
+
+        # Una rotación de 0 con datos "calculables" (p. ej. promedio infinito) no
+        # admite 365 / rotación: esos años usan los indicadores por defecto
+        result['valid'] = ~((inventario_ok & (rotacion_inventarios == 0)) | (cartera_ok & (rotacion_cartera == 0)))
+
+        # ✅ VALIDAR QUE LOS VALORES SEAN RAZONABLES (más de 10 años)
+        inventario_anormal = dias_inventario > 3650
+        cartera_anormal = dias_cartera > 3650
+        result['rotacion_inventarios'] = np.where(inventario_anormal, 0.0, rotacion_inventarios)
+        result['dias_inventario'] = np.where(inventario_anormal, 0.0, dias_inventario)
+        result['rotacion_cartera'] = np.where(cartera_anormal, 0.0, rotacion_cartera)
+        result['dias_cartera'] = np.where(cartera_anormal, 0.0, dias_cartera)
+        result['rotacion_activos'] = rotacion_activos
+
+        # ✅ FÓRMULA CORRECTA DEL Z-SCORE DE ALTMAN
+        activo_total = c['activo_total']
+        x1 = self._safe_divide(capital_trabajo, activo_total)
+        x2 = self._safe_divide(c['utilidad_neta'], activo_total)
+        x3 = self._safe_divide(c['utilidad_operacional'], activo_total)  # EBIT
+        x4 = self._safe_divide(c['patrimonio'], c['pasivo_total'])
+        x5 = self._safe_divide(ingresos, activo_total)
+        z_score = (1.2 * x1) + (1.4 * x2) + (3.3 * x3) + (0.6 * x4) + (1.0 * x5)
+
+        sin_datos = activo_total == 0
+        result['z_score'] = np.where(sin_datos, 0.0, z_score)
+        result['clasificacion_z'] = np.select(
+            [sin_datos, z_score > 2.99, z_score >= 1.81],
+            ["Sin datos", "Zona Segura", "Zona Gris"], "Zona de Peligro"
+        )
+        result['probabilidad_quiebra'] = np.select(
+            [sin_datos, z_score > 2.99, z_score >= 1.81],
+            ["Indeterminada", "Baja", "Media"], "Alta"
+        )
+
+        return result
+
+    def to_year_dicts(self, result: Dict[str, np.ndarray], years: List[int], default_factory: Callable[[], Dict]) -> Dict:
+        """
+        Convierte el resultado de compute (una empresa) en {año: {categoría: {indicador: valor}}}
+        con el mismo redondeo que el cálculo escalar
+        """
+        columns = {name: values.tolist() for name, values in result.items()}
+        indicators_by_year = {}
+
+        for i, year in enumerate(years):
+            if not columns['valid'][i]:
+                indicators_by_year[year] = default_factory()
+                continue
+
+            indicators_by_year[year] = {
+                category: {
+                    name: columns[name][i] if digits is None else round(float(columns[name][i]), digits)
+                    for name, digits in layout.items()
+                }
+                for category, layout in INDICATOR_LAYOUT.items()
+            }
+
+        return indicators_by_year
+
+    def _average_with_previous(self, values: np.ndarray) -> np.ndarray:
+        """(actual + anterior) / 2 si el anterior es positivo; si no, el valor actual"""
+        previous = np.concatenate([np.zeros_like(values[..., :1]), values[..., :-1]], axis=-1)
+        return np.where(previous > 0, (values + previous) / 2, values)
+
+    def _safe_divide(self, numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+        """División segura: 0 si el denominador es 0 o el resultado supera 1e10"""
+        # Un numerador -0.0 cuenta como 0 (igual que `float(x) if x else 0.0`)
+        numerator = np.where(numerator == 0, 0.0, numerator)
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            result = np.where(denominator == 0, 0.0, numerator / np.where(denominator == 0, 1.0, denominator))
+        return np.where(np.abs(result) > 1e10, 0.0, result)
@@ -0,0 +1,72 @@
+"""
+Utilidades de paginación por cursor (keyset) y conteo de resultados
+"""
+import json
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Query
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+# Valores aceptados para el parámetro `count` de los listados
+COUNT_MODES = ("exact", "estimated")
+
+
+class ExplainJson(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) de una consulta, con sus parámetros enlazados normalmente"""
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(ExplainJson, "postgresql")
+def _compile_explain_json(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+def escape_like(term: str) -> str:
+    """Escapar comodines de LIKE en un término de búsqueda (usar con escape='\\\\')"""
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def exact_count(query: Query) -> int:
+    """COUNT(*) exacto de la consulta (sin ORDER BY ni LIMIT)"""
+    return query.order_by(None).limit(None).count()
+
+
+def estimated_count(db, query: Query, table_name: str, filtered: bool) -> int:
+    """
+    Conteo aproximado sin recorrer la tabla (solo PostgreSQL):
+    - sin filtros: reltuples de pg_class (estadísticas de ANALYZE)
+    - con filtros: filas estimadas por el planificador (EXPLAIN)
+    En otros motores o sin estadísticas cae al conteo exacto.
+    """
+    if db.bind.dialect.name != "postgresql":
+        return exact_count(query)
+
+    if not filtered:
+        estimate = db.execute(
+            text("SELECT reltuples::BIGINT FROM pg_class WHERE relname = :table"),
+            {"table": table_name}
+        ).scalar()
+    else:
+        plan = db.execute(ExplainJson(query.order_by(None).limit(None).statement)).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        estimate = int(plan[0]["Plan"]["Plan Rows"])
+
+    # reltuples es -1 en tablas que nunca se analizaron
+    if estimate is None or estimate < 0:
+        return exact_count(query)
+    return int(estimate)
+
+
+def count_rows(db, query: Query, mode: Optional[str], table_name: str, filtered: bool) -> Optional[int]:
+    """Total según el modo pedido; None si no se pidió conteo"""
+    if mode == "exact":
+        return exact_count(query)
+    if mode == "estimated":
+        return estimated_count(db, query, table_name, filtered)
+    return None
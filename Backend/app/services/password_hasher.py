@@ -0,0 +1,102 @@
+"""
+Hashing de contraseñas (bcrypt) en un pool de hilos acotado
+bcrypt libera el GIL, así que los hilos no bloquean el event loop
+"""
+import os
+import time
+from typing import Dict, Optional, Tuple
+
+from passlib.context import CryptContext
+from passlib.hash import bcrypt
+
+from app.services.bounded_executor import BoundedExecutor, QueueFull
+
+# Configuración
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "256"))
+# Segundos sugeridos al cliente (Retry-After) cuando el pool está lleno
+PASSWORD_POOL_RETRY_AFTER = 2
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+BCRYPT_AUTO_TUNE = os.getenv("BCRYPT_AUTO_TUNE", "false").lower() == "true"
+BCRYPT_TARGET_MS = int(os.getenv("BCRYPT_TARGET_MS", "250"))
+BCRYPT_MIN_ROUNDS = 10
+BCRYPT_MAX_ROUNDS = 16
+
+# Contexto de hashing de contraseñas; los hashes con otro costo se rehacen al iniciar sesión
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS
+)
+
+
+class PasswordPoolFull(QueueFull):
+    """Demasiadas operaciones de hashing en espera"""
+
+
+def tune_bcrypt_rounds(target_ms: int = BCRYPT_TARGET_MS) -> int:
+    """Menor costo cuyo hash tarda al menos target_ms en esta máquina"""
+    rounds = BCRYPT_MIN_ROUNDS
+    while rounds < BCRYPT_MAX_ROUNDS:
+        start = time.perf_counter()
+        bcrypt.using(rounds=rounds).hash("benchmark-password")
+        if (time.perf_counter() - start) * 1000 >= target_ms:
+            break
+        rounds += 1
+    return rounds
+
+
+def configure_password_hashing() -> int:
+    """
+    Aplicar el costo de bcrypt (BCRYPT_ROUNDS o ajuste automático)
+    Con ajuste automático solo se rehacen hashes más débiles, para que servidores
+    con distinta velocidad no se reescriban los hashes entre sí
+    """
+    if not BCRYPT_AUTO_TUNE:
+        return BCRYPT_ROUNDS
+
+    rounds = tune_bcrypt_rounds()
+    pwd_context.update(
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=BCRYPT_MAX_ROUNDS
+    )
+    print(f"🔐 Costo de bcrypt ajustado a {rounds} (objetivo {BCRYPT_TARGET_MS} ms)")
+    return rounds
+
+
+class PasswordHashPool(BoundedExecutor):
+    """Pool de hilos para hash/verificación con límite de cola y métricas"""
+
+    full_error = PasswordPoolFull
+    thread_name_prefix = "bcrypt"
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_queue: int = PASSWORD_HASH_MAX_QUEUE):
+        super().__init__("thread", workers, max_queue)
+        self.rehashed = 0
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self.run(pwd_context.verify, plain_password, hashed_password)
+
+    async def verify_and_update(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """(válida, nuevo hash si el costo cambió)"""
+        valid, new_hash = await self.run(pwd_context.verify_and_update, plain_password, hashed_password)
+        if new_hash:
+            self.rehashed += 1
+        return valid, new_hash
+
+    async def hash(self, plain_password: str) -> str:
+        return await self.run(pwd_context.hash, plain_password)
+
+    def stats(self) -> Dict:
+        return {
+            **super().stats(),
+            "rehashed": self.rehashed,
+            "bcrypt_rounds": pwd_context.to_dict().get("bcrypt__default_rounds"),
+        }
+
+
+# Instancia compartida por las rutas de autenticación y usuarios
+password_hash_pool = PasswordHashPool()
@@ -0,0 +1,102 @@
+"""
+Caché de reportes generados (Excel de ExportService y ReportService)
+Guarda los bytes por (análisis, tipo de reporte, versión de formato) con LRU por tamaño total
+"""
+import io
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+# Configuración
+REPORT_CACHE_MAX_BYTES = int(os.getenv("REPORT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Versión del formato de los reportes: cambiarla al modificar el diseño de los libros
+REPORT_FORMAT_VERSION = "1"
+
+
+class ReportCache:
+    """LRU de reportes renderizados acotada por bytes totales"""
+
+    def __init__(self, max_bytes: int = REPORT_CACHE_MAX_BYTES, format_version: str = REPORT_FORMAT_VERSION):
+        self.max_bytes = max_bytes
+        self.format_version = format_version
+        # clave -> (user_id, bytes)
+        self._entries: "OrderedDict[Tuple[int, str, str], Tuple[int, bytes]]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_render(
+        self,
+        user_id: int,
+        analysis_data: Dict,
+        report_type: str,
+        render: Callable[[], io.BytesIO]
+    ) -> io.BytesIO:
+        """
+        Retorna el reporte en caché o lo genera con `render` y lo guarda
+        Sin analysis_id (análisis no persistido) se genera siempre
+        """
+        analysis_id = analysis_data.get("analysis_id")
+        if analysis_id is None:
+            return render()
+
+        key = (analysis_id, report_type, self.format_version)
+        content = self._get(key)
+        if content is None:
+            content = render().getvalue()
+            self._put(key, user_id, content)
+
+        return io.BytesIO(content)
+
+    def invalidate_user(self, user_id: int) -> None:
+        """Descartar los reportes de un usuario (p. ej. al cargar un nuevo archivo)"""
+        with self._lock:
+            for key in [k for k, (owner, _) in self._entries.items() if owner == user_id]:
+                self._total_bytes -= len(self._entries.pop(key)[1])
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "total_bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def _get(self, key: Tuple[int, str, str]) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def _put(self, key: Tuple[int, str, str], user_id: int, content: bytes) -> None:
+        if len(content) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._total_bytes -= len(previous[1])
+
+            self._entries[key] = (user_id, content)
+            self._total_bytes += len(content)
+
+            while self._total_bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._total_bytes -= len(evicted)
+
+
+# Instancia compartida por las rutas de exportación y reportes
+report_cache = ReportCache()
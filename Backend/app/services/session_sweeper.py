@@ -0,0 +1,139 @@
+"""
+Mantenimiento de la tabla de sesiones
+Hilo de fondo que desactiva sesiones expiradas y elimina las antiguas por lotes;
+con particionamiento (partitioning.sql) además crea y elimina particiones mensuales
+"""
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import delete, select, text, update
+
+from app.database import SessionLocal
+from app.models import Session as UserSession
+
+# Configuración
+SESSION_SWEEPER_ENABLED = os.getenv("SESSION_SWEEPER_ENABLED", "true").lower() == "true"
+SESSION_SWEEP_INTERVAL_SECONDS = int(os.getenv("SESSION_SWEEP_INTERVAL_SECONDS", "300"))
+SESSION_SWEEP_BATCH_SIZE = int(os.getenv("SESSION_SWEEP_BATCH_SIZE", "1000"))
+SESSION_RETENTION_DAYS = int(os.getenv("SESSION_RETENTION_DAYS", "30"))
+SESSION_PARTITIONING = os.getenv("SESSION_PARTITIONING", "false").lower() == "true"
+AUDIT_LOG_RETENTION_MONTHS = int(os.getenv("AUDIT_LOG_RETENTION_MONTHS", "0"))  # 0 = conservar todo
+
+# Particiones mensuales que se crean por adelantado
+PARTITION_MONTHS_AHEAD = 2
+
+
+class SessionSweeper:
+    """Limpieza periódica de sesiones (y particiones) por lotes"""
+
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        interval: int = SESSION_SWEEP_INTERVAL_SECONDS,
+        batch_size: int = SESSION_SWEEP_BATCH_SIZE,
+        retention_days: int = SESSION_RETENTION_DAYS,
+        partitioning: bool = SESSION_PARTITIONING
+    ):
+        self.session_factory = session_factory
+        self.interval = interval
+        self.batch_size = batch_size
+        self.retention_days = retention_days
+        self.partitioning = partitioning
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        # Métricas
+        self.runs = 0
+        self.expired = 0
+        self.deleted = 0
+        self.last_run: Optional[datetime] = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="session-sweeper", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def sweep(self) -> Dict:
+        """Una pasada completa; retorna cuántas sesiones se expiraron y eliminaron"""
+        now = datetime.utcnow()
+        cutoff = now - timedelta(days=self.retention_days)
+
+        db = self.session_factory()
+        try:
+            if self.partitioning and db.bind.dialect.name == "postgresql":
+                self._maintain_partitions(db)
+
+            expired = self._in_batches(
+                db,
+                lambda ids: update(UserSession).where(UserSession.id.in_(ids)).values(is_active=False),
+                UserSession.is_active == True,
+                UserSession.expires_at < now
+            )
+            deleted = self._in_batches(
+                db,
+                lambda ids: delete(UserSession).where(UserSession.id.in_(ids)),
+                UserSession.expires_at < cutoff
+            )
+        finally:
+            db.close()
+
+        self.runs += 1
+        self.expired += expired
+        self.deleted += deleted
+        self.last_run = now
+        if expired or deleted:
+            print(f"🧹 Sesiones: {expired} expiradas, {deleted} eliminadas")
+        return {"expired": expired, "deleted": deleted}
+
+    def stats(self) -> Dict:
+        return {
+            "runs": self.runs,
+            "expired": self.expired,
+            "deleted": self.deleted,
+            "last_run": self.last_run.isoformat() if self.last_run else None,
+            "partitioning": self.partitioning,
+        }
+
+    def _in_batches(self, db, make_statement, *conditions) -> int:
+        """Aplica la sentencia a lotes de batch_size ids (un commit por lote, bloqueos cortos)"""
+        total = 0
+        while not self._stop.is_set():
+            ids = select(UserSession.id).where(*conditions).limit(self.batch_size).scalar_subquery()
+            result = db.execute(make_statement(ids).execution_options(synchronize_session=False))
+            db.commit()
+            total += result.rowcount
+            if result.rowcount < self.batch_size:
+                break
+        return total
+
+    def _maintain_partitions(self, db) -> None:
+        """Crear particiones futuras y eliminar las que quedaron fuera de la retención"""
+        keep_months = self.retention_days // 30 + 1
+        db.execute(text("SELECT create_monthly_partitions('sessions', :ahead)"), {"ahead": PARTITION_MONTHS_AHEAD})
+        db.execute(text("SELECT create_monthly_partitions('audit_logs', :ahead)"), {"ahead": PARTITION_MONTHS_AHEAD})
+        db.execute(text("SELECT drop_old_partitions('sessions', :keep)"), {"keep": keep_months})
+        if AUDIT_LOG_RETENTION_MONTHS > 0:
+            db.execute(text("SELECT drop_old_partitions('audit_logs', :keep)"), {"keep": AUDIT_LOG_RETENTION_MONTHS})
+        db.commit()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"⚠️ Error limpiando sesiones: {e}")
+            self._stop.wait(self.interval)
+
+
+# Instancia compartida; main.py la inicia y la detiene con la aplicación
+session_sweeper = SessionSweeper()
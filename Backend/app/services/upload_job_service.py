@@ -0,0 +1,248 @@
+"""
+Trabajos de carga asíncronos
+El archivo se analiza en el pool de análisis compartido mientras el cliente
+consulta el estado o se suscribe a los eventos de progreso (SSE).
+Con el pool de procesos las etapas del análisis llegan por una cola de
+multiprocessing.Manager que el event loop vacía mientras el trabajo corre.
+"""
+import asyncio
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from app.database import SessionLocal
+from app.services.analysis_cache import analysis_cache
+from app.services.analysis_executor import (
+    AnalysisExecutor, ExcelReadError, QueueProgress, analysis_executor, drain_progress, read_and_analyze
+)
+from app.models import ActionType
+from app.services.analysis_store import analysis_store
+from app.services.audit_writer import audit_writer
+from app.services.excel_service import ExcelService
+from app.services.report_cache import report_cache
+
+# Configuración
+UPLOAD_JOB_TTL_SECONDS = int(os.getenv("UPLOAD_JOB_TTL_SECONDS", "3600"))
+
+# Intervalo de consulta del stream SSE y de los comentarios keep-alive
+JOB_EVENTS_POLL_SECONDS = 0.25
+JOB_EVENTS_KEEPALIVE_SECONDS = 15
+
+
+class UploadJob:
+    """Estado de un trabajo de carga (modificado desde el worker, leído desde las rutas)"""
+
+    def __init__(self, user_id: int, username: str, filename: str):
+        self.id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.username = username
+        self.filename = filename
+        self.status = "queued"  # queued, running, completed, failed
+        self.events: List[Dict] = []
+        self.analysis_id: Optional[int] = None
+        self.error: Optional[str] = None
+        self.created_at = datetime.now()
+        self.finished_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self.add_event("queued", "Archivo recibido, en cola")
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("completed", "failed")
+
+    def add_event(self, stage: str, message: str) -> None:
+        with self._lock:
+            self.events.append({
+                "stage": stage,
+                "message": message,
+                "timestamp": datetime.now().isoformat()
+            })
+
+    def events_since(self, index: int) -> List[Dict]:
+        with self._lock:
+            return self.events[index:]
+
+    def start(self) -> None:
+        """Un worker del pool tomó el trabajo"""
+        self.status = "running"
+        self.add_event("running", "Analizando archivo")
+
+    def finish(self, status: str, error: Optional[str] = None, analysis_id: Optional[int] = None) -> None:
+        self.analysis_id = analysis_id
+        self.error = error
+        if status == "completed":
+            self.add_event("completed", "Análisis financiero completado exitosamente")
+        else:
+            self.add_event("failed", error or "Error procesando archivo")
+        self.status = status
+        self.finished_at = time.monotonic()
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            events = list(self.events)
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "filename": self.filename,
+            "stage": events[-1]["stage"],
+            "events": events,
+            "analysis_id": self.analysis_id,
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+        }
+
+
+class UploadJobService:
+    """Crea trabajos de carga y los ejecuta en el pool de análisis compartido"""
+
+    def __init__(self, executor: AnalysisExecutor = analysis_executor):
+        self.executor = executor
+        self._jobs: Dict[str, UploadJob] = {}
+        self._tasks = set()
+
+    def submit(self, user_id: int, username: str, filename: str, tmp_path: str, cache_key: str) -> UploadJob:
+        """
+        Reserva un lugar en el pool (AnalysisQueueFull si no hay), registra el trabajo
+        y lo programa en el event loop actual
+        El archivo temporal pasa a ser responsabilidad del trabajo
+        """
+        self.executor.reserve()
+        self._purge_finished()
+
+        job = UploadJob(user_id, username, filename)
+        self._jobs[job.id] = job
+
+        task = asyncio.get_running_loop().create_task(self._run(job, tmp_path, cache_key))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    def get(self, job_id: str, user_id: int) -> Optional[UploadJob]:
+        """Trabajo del usuario (None si no existe, expiró o es de otro usuario)"""
+        job = self._jobs.get(job_id)
+        if job is None or job.user_id != user_id:
+            return None
+        return job
+
+    async def stream_events(self, job: UploadJob) -> AsyncIterator[str]:
+        """Eventos del trabajo en formato SSE hasta que termina"""
+        sent = 0
+        last_write = time.monotonic()
+        while True:
+            finished = job.finished
+            for event in job.events_since(sent):
+                sent += 1
+                last_write = time.monotonic()
+                yield f"event: {event['stage']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+            if finished:
+                yield f"event: result\ndata: {json.dumps(job.to_dict(), ensure_ascii=False)}\n\n"
+                return
+
+            if time.monotonic() - last_write >= JOB_EVENTS_KEEPALIVE_SECONDS:
+                last_write = time.monotonic()
+                yield ": keep-alive\n\n"
+
+            await asyncio.sleep(JOB_EVENTS_POLL_SECONDS)
+
+    async def _run(self, job: UploadJob, tmp_path: str, cache_key: str) -> None:
+        try:
+            # El lugar reservado en submit se libera al terminar el análisis
+            try:
+                analysis_result = analysis_cache.get(cache_key)
+                if analysis_result is not None:
+                    job.status = "running"
+                    job.add_event("cached", "Archivo ya analizado anteriormente")
+                else:
+                    analysis_result = await self._analyze(job, tmp_path)
+                    analysis_cache.put(cache_key, analysis_result)
+            finally:
+                self.executor.release()
+
+            if not analysis_result or not analysis_result.get('available_years'):
+                job.finish("failed", "No se pudieron extraer datos del archivo. Verifica que el formato sea correcto.")
+                return
+
+            analysis_result["filename"] = job.filename
+            analysis_result["upload_date"] = datetime.now().isoformat()
+            analysis_result["uploaded_by"] = job.username
+            analysis_result["message"] = "Análisis financiero completado exitosamente"
+
+            # ✅ Guardar el resultado para exportaciones y reportes (fuera del event loop)
+            analysis_id = await run_in_threadpool(self._save, job, analysis_result)
+            report_cache.invalidate_user(job.user_id)
+            audit_writer.log(job.user_id, ActionType.UPLOAD_FILE, f"Upload: {job.filename} (job {job.id})")
+
+            job.finish("completed", analysis_id=analysis_id)
+            print(f"✅ Trabajo {job.id} completado: análisis {analysis_id} de {job.username}")
+
+        except ExcelReadError as excel_err:
+            job.finish("failed", f"Error al leer el archivo Excel: {str(excel_err)}. Asegúrate de que sea un archivo .xlsx válido.")
+        except Exception as e:
+            print(f"\n❌ ERROR en trabajo de carga {job.id}: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            job.finish("failed", f"Error procesando archivo: {str(e)}")
+        finally:
+            ExcelService.remove_spooled_file(tmp_path)
+
+    async def _analyze(self, job: UploadJob, tmp_path: str) -> Dict:
+        """Ejecuta el análisis en el pool reenviando sus etapas a los eventos del trabajo"""
+        if self.executor.kind == "thread":
+            return await self.executor.run(
+                read_and_analyze, tmp_path, None, job.add_event, reserved=True, on_start=job.start
+            )
+
+        progress_queue = await run_in_threadpool(self.executor.progress_queue)
+        finished = asyncio.Event()
+        forwarder = asyncio.create_task(self._forward_progress(job, progress_queue, finished))
+        try:
+            return await self.executor.run(
+                read_and_analyze, tmp_path, None, QueueProgress(progress_queue), reserved=True, on_start=job.start
+            )
+        finally:
+            # Un último vaciado tras terminar: las etapas quedan antes de completed/failed
+            finished.set()
+            await forwarder
+
+    @staticmethod
+    async def _forward_progress(job: UploadJob, progress_queue, finished: asyncio.Event) -> None:
+        while True:
+            stop = finished.is_set()
+            try:
+                events = await run_in_threadpool(drain_progress, progress_queue)
+            except Exception as e:
+                print(f"⚠️ No se pudo leer el progreso del trabajo {job.id}: {e}")
+                return
+            for stage, message in events:
+                job.add_event(stage, message)
+            if stop:
+                return
+            try:
+                await asyncio.wait_for(finished.wait(), JOB_EVENTS_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    @staticmethod
+    def _save(job: UploadJob, analysis_result: Dict) -> int:
+        db = SessionLocal()
+        try:
+            return analysis_store.save(db, job.user_id, analysis_result, job.filename)
+        finally:
+            db.close()
+
+    def _purge_finished(self) -> None:
+        """Olvidar trabajos terminados hace más de UPLOAD_JOB_TTL_SECONDS"""
+        now = time.monotonic()
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished and now - job.finished_at > UPLOAD_JOB_TTL_SECONDS
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
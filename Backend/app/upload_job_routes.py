@@ -0,0 +1,90 @@
+"""
+Rutas de Carga Asíncrona
+Retorna un job_id de inmediato; el progreso se consulta por polling o SSE
+"""
+import hashlib
+
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi.responses import StreamingResponse
+
+from app.dependencies import get_current_active_user
+from app.model import User
+from app.services.analysis_cache import analysis_cache
+from app.services.analysis_executor import AnalysisQueueFull
+from app.services.excel_service import ExcelService
+from app.services.upload_job_service import UploadJobService
+
+router = APIRouter(prefix="/upload/jobs", tags=["upload-jobs"])
+upload_job_service = UploadJobService()
+excel_service = ExcelService()
+
+
+@router.post("", status_code=202)
+async def create_upload_job(
+    file: UploadFile = File(...),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Subir un archivo Excel para analizarlo en segundo plano - REQUIERE AUTENTICACIÓN
+
+    Retorna el job_id; el estado se consulta en /upload/jobs/{job_id}
+    y los eventos de progreso en /upload/jobs/{job_id}/events (SSE)
+    """
+    if not file.filename.endswith(('.xlsx', '.xls')):
+        raise HTTPException(status_code=400, detail="Solo se permiten archivos Excel")
+
+    digest = hashlib.sha256()
+    tmp_path = await excel_service.spool_upload(file, digest)
+    # El lugar en el pool se reserva después de recibir el archivo, de forma atómica
+    try:
+        job = upload_job_service.submit(
+            current_user.id,
+            current_user.username,
+            file.filename,
+            tmp_path,
+            analysis_cache.make_key(digest.hexdigest())
+        )
+    except AnalysisQueueFull:
+        excel_service.remove_spooled_file(tmp_path)
+        raise HTTPException(
+            status_code=429,
+            detail="El servidor está procesando demasiados archivos. Intenta de nuevo en unos segundos.",
+            headers={"Retry-After": "5"}
+        )
+    print(f"📥 Trabajo {job.id} creado para {file.filename} ({current_user.username})")
+
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"/upload/jobs/{job.id}",
+        "events_url": f"/upload/jobs/{job.id}/events"
+    }
+
+
+@router.get("/{job_id}")
+async def get_upload_job(
+    job_id: str,
+    current_user: User = Depends(get_current_active_user)
+):
+    """Estado y etapas de un trabajo de carga"""
+    job = upload_job_service.get(job_id, current_user.id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    return job.to_dict()
+
+
+@router.get("/{job_id}/events")
+async def stream_upload_job_events(
+    job_id: str,
+    current_user: User = Depends(get_current_active_user)
+):
+    """Eventos de progreso del trabajo (Server-Sent Events)"""
+    job = upload_job_service.get(job_id, current_user.id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+
+    return StreamingResponse(
+        upload_job_service.stream_events(job),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -2,31 +2,80 @@
 Rutas de Gestión de Usuarios
 Solo accesibles por administradores
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response, Query
+from sqlalchemy import func, or_
 from sqlalchemy.orm import Session
-from typing import List
-from app.schemas import UserCreate, UserUpdate, UserResponse, MessageResponse
+from typing import List, Optional
+from app.schemas import UserCreate, UserUpdate, UserResponse, MessageResponse, UserRoleEnum
 from app.dependencies import get_db, get_current_admin_user, get_client_ip, get_user_agent
 from app.auth_service import AuthService
-from app.model import User, ActionType
+from app.model import User, UserRole, ActionType
+from app.services.pagination import count_rows, escape_like
 
 router = APIRouter(prefix="/api/users", tags=["User Management"])
 
+# Tamaño máximo de página del listado de usuarios
+MAX_PAGE_SIZE = 500
+
 @router.get("/", response_model=List[UserResponse], status_code=status.HTTP_200_OK)
 async def get_all_users(
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    after_id: Optional[int] = Query(None, ge=0, description="Cursor: id del último usuario de la página anterior"),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    role: Optional[UserRoleEnum] = None,
+    is_active: Optional[bool] = None,
+    search: Optional[str] = Query(None, min_length=1, max_length=120),
+    count: Optional[str] = Query(None, pattern="^(exact|estimated)$"),
+    skip: int = Query(0, ge=0, deprecated=True),
     current_user: User = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
     """
-    Obtener lista de todos los usuarios
+    Obtener lista de usuarios ordenada por id (paginación por cursor)
     Solo administradores
     
-    - **skip**: Número de registros a saltar (paginación)
+    - **after_id**: Cursor; se toma del encabezado `X-Next-Cursor` de la página anterior
     - **limit**: Número máximo de registros a retornar
+    - **role** / **is_active**: Filtros exactos
+    - **search**: Prefijo de username o email (sin distinguir mayúsculas)
+    - **count**: `exact` o `estimated` para recibir el total en `X-Total-Count`
+    - **skip**: Obsoleto (paginación por offset); usar after_id
     """
-    users = db.query(User).offset(skip).limit(limit).all()
+    query = db.query(User)
+    filtered = False
+    if role is not None:
+        query = query.filter(User.role == UserRole(role.value))
+        filtered = True
+    if is_active is not None:
+        query = query.filter(User.is_active == is_active)
+        filtered = True
+    # Un término solo con espacios no filtra (el patrón quedaría en '%' y coincidiría con todos)
+    search_term = search.strip().lower() if search else ""
+    if search_term:
+        # lower(col) LIKE 'term%' usa los índices idx_users_*_lower_pattern (text_pattern_ops);
+        # % y _ del usuario se escapan y se buscan literalmente
+        pattern = f"{escape_like(search_term)}%"
+        query = query.filter(or_(
+            func.lower(User.username).like(pattern, escape="\\"),
+            func.lower(User.email).like(pattern, escape="\\")
+        ))
+        filtered = True
+
+    total = count_rows(db, query, count, User.__tablename__, filtered)
+
+    page = query.order_by(User.id)
+    if after_id is not None:
+        page = page.filter(User.id > after_id)
+    elif skip:
+        page = page.offset(skip)
+    # Un registro extra indica si hay página siguiente sin otra consulta
+    users = page.limit(limit + 1).all()
+
+    if len(users) > limit:
+        users = users[:limit]
+        response.headers["X-Next-Cursor"] = str(users[-1].id)
+    if total is not None:
+        response.headers["X-Total-Count"] = str(total)
     return [UserResponse.from_orm(user) for user in users]
 
 @router.get("/{user_id}", response_model=UserResponse, status_code=status.HTTP_200_OK)
@@ -87,7 +136,7 @@ async def create_user(
     new_user = User(
         username=user_data.username,
         email=user_data.email,
-        password_hash=AuthService.get_password_hash(user_data.password),
+        password_hash=await AuthService.get_password_hash_async(user_data.password),
         first_name=user_data.first_name,
         last_name=user_data.last_name,
         role=user_data.role,
@@ -149,6 +198,7 @@ async def update_user(
     
     db.commit()
     db.refresh(user)
+    AuthService.invalidate_cached_user(user.id)
     
     # Crear log de auditoría
     AuthService.create_audit_log(
@@ -204,6 +254,7 @@ async def delete_user(
     # Eliminar usuario
     db.delete(user)
     db.commit()
+    AuthService.invalidate_cached_user(user_id)
     
     return MessageResponse(
         message="User deleted successfully",
@@ -0,0 +1,169 @@
+"""
+Benchmark del camino de login (base de datos) antes y después de consolidarlo
+Ejecutar: python benchmark_login.py --concurrency 16 --logins 50
+
+Compara, con varios hilos concurrentes:
+- legacy: create_user_session + update_last_login + create_audit_log (tres commits y una consulta extra)
+- single: AuthService.record_login (una consulta, un commit; auditoría por lotes)
+
+No incluye bcrypt, que cuesta lo mismo en ambos casos (ver PASSWORD_HASH_WORKERS).
+Usa DATABASE_URL (o --database-url) y crea usuarios bench_user_N si no existen.
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+# Agregar el directorio Backend al path para poder importar los módulos
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark del camino de login")
+    parser.add_argument("--database-url", help="URL de base de datos (por defecto DATABASE_URL)")
+    parser.add_argument("--concurrency", type=int, default=16, help="Logins concurrentes")
+    parser.add_argument("--logins", type=int, default=50, help="Logins por hilo")
+    parser.add_argument("--users", type=int, default=50, help="Usuarios de prueba")
+    return parser.parse_args()
+
+
+def legacy_login(db, username, token, models, audit_log, auth_service):
+    """Camino original: buscar usuario, sesión (commit), last_login (consulta + commit), auditoría (commit)"""
+    user = db.query(models.User).filter(models.User.username == username).first()
+
+    session = models.Session(
+        user_id=user.id,
+        token_hash=auth_service.hash_token(token),
+        expires_at=datetime.utcnow() + timedelta(minutes=60),
+        ip_address="127.0.0.1",
+        user_agent="benchmark",
+        is_active=True
+    )
+    db.add(session)
+    db.commit()
+    db.refresh(session)
+
+    same_user = db.query(models.User).filter(models.User.id == user.id).first()
+    same_user.last_login = datetime.utcnow()
+    db.commit()
+
+    entry = audit_log(
+        user_id=user.id,
+        action_type=models.ActionType.LOGIN,
+        description=f"Successful login for user: {user.username}",
+        ip_address="127.0.0.1",
+        user_agent="benchmark"
+    )
+    db.add(entry)
+    db.commit()
+    db.refresh(entry)
+    return user
+
+
+def single_login(db, username, token, models, auth_service):
+    """Camino consolidado"""
+    user = db.query(models.User).filter(models.User.username == username).first()
+    auth_service.record_login(db, user, token, "127.0.0.1", "benchmark")
+    return user
+
+
+def run(label, login_fn, session_factory, usernames, concurrency, logins):
+    latencies = []
+    lock = threading.Lock()
+
+    def worker(worker_id):
+        local = []
+        for i in range(logins):
+            username = usernames[(worker_id * logins + i) % len(usernames)]
+            db = session_factory()
+            start = time.perf_counter()
+            try:
+                login_fn(db, username, uuid.uuid4().hex)
+            finally:
+                db.close()
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(
+        f"{label:<8} logins={len(latencies):<6} "
+        f"media={statistics.mean(latencies) * 1000:8.2f} ms  "
+        f"p50={statistics.median(latencies) * 1000:8.2f} ms  "
+        f"p95={p95 * 1000:8.2f} ms  "
+        f"throughput={len(latencies) / elapsed:8.1f}/s"
+    )
+
+
+def main():
+    args = parse_args()
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from app import models
+    from app.auth_service import AuthService
+    from app.database import SessionLocal, engine
+    from app.services.audit_writer import audit_writer
+
+    if engine.url.get_backend_name() == "sqlite":
+        engine = create_engine(engine.url, connect_args={"check_same_thread": False})
+        SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    models.Base.metadata.create_all(bind=engine)
+    audit_writer.session_factory = SessionLocal
+
+    db = SessionLocal()
+    try:
+        usernames = [f"bench_user_{i}" for i in range(args.users)]
+        existing = {u for (u,) in db.query(models.User.username).filter(models.User.username.in_(usernames))}
+        for username in usernames:
+            if username not in existing:
+                db.add(models.User(
+                    username=username,
+                    email=f"{username}@benchmark.local",
+                    password_hash="not-a-real-hash",
+                    role=models.UserRole.CLIENT,
+                    is_active=True
+                ))
+        db.commit()
+    finally:
+        db.close()
+
+    print("\n" + "=" * 50)
+    print(f"  BENCHMARK DE LOGIN ({args.concurrency} hilos x {args.logins} logins)")
+    print("=" * 50 + "\n")
+
+    run(
+        "legacy",
+        lambda session, username, token: legacy_login(session, username, token, models, models.AuditLog, AuthService),
+        SessionLocal, usernames, args.concurrency, args.logins
+    )
+
+    audit_writer.start()
+    try:
+        run(
+            "single",
+            lambda session, username, token: single_login(session, username, token, models, AuthService),
+            SessionLocal, usernames, args.concurrency, args.logins
+        )
+    finally:
+        audit_writer.stop()
+
+    print("\n✅ Benchmark completado\n")
+
+
+if __name__ == "__main__":
+    main()
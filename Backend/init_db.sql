@@ -29,6 +29,9 @@ CREATE TABLE IF NOT EXISTS users (
 -- Índices para users
 CREATE INDEX IF NOT EXISTS idx_users_username ON users(username);
 CREATE INDEX IF NOT EXISTS idx_users_email ON users(email);
+-- Búsqueda por prefijo sin distinguir mayúsculas (GET /api/users/?search=)
+CREATE INDEX IF NOT EXISTS idx_users_username_lower_pattern ON users (lower(username) text_pattern_ops);
+CREATE INDEX IF NOT EXISTS idx_users_email_lower_pattern ON users (lower(email) text_pattern_ops);
 CREATE INDEX IF NOT EXISTS idx_users_role ON users(role);
 CREATE INDEX IF NOT EXISTS idx_users_is_active ON users(is_active);
 
@@ -38,7 +41,7 @@ CREATE INDEX IF NOT EXISTS idx_users_is_active ON users(is_active);
 CREATE TABLE IF NOT EXISTS sessions (
     id SERIAL PRIMARY KEY,
     user_id INTEGER NOT NULL,
-    session_token VARCHAR(500) UNIQUE NOT NULL,
+    token_hash CHAR(64) UNIQUE NOT NULL,  -- SHA-256 (hex) del JWT
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
     ip_address VARCHAR(45),
@@ -50,7 +53,6 @@ CREATE TABLE IF NOT EXISTS sessions (
 
 -- Índices para sessions
 CREATE INDEX IF NOT EXISTS idx_sessions_user_id ON sessions(user_id);
-CREATE INDEX IF NOT EXISTS idx_sessions_token ON sessions(session_token);
 CREATE INDEX IF NOT EXISTS idx_sessions_is_active ON sessions(is_active);
 CREATE INDEX IF NOT EXISTS idx_sessions_expires_at ON sessions(expires_at);
 
@@ -78,6 +80,53 @@ CREATE TABLE IF NOT EXISTS audit_logs (
 CREATE INDEX IF NOT EXISTS idx_audit_logs_user_id ON audit_logs(user_id);
 CREATE INDEX IF NOT EXISTS idx_audit_logs_action_type ON audit_logs(action_type);
 CREATE INDEX IF NOT EXISTS idx_audit_logs_created_at ON audit_logs(created_at);
+CREATE INDEX IF NOT EXISTS idx_audit_logs_user_id_created_at ON audit_logs(user_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_audit_logs_action_type_created_at ON audit_logs(action_type, created_at);
+
+-- =============================================
+-- TABLA: ANALYSIS_RESULTS
+-- =============================================
+CREATE TABLE IF NOT EXISTS analysis_results (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    filename VARCHAR(255),
+    data JSON NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT fk_analysis_results_user FOREIGN KEY (user_id)
+        REFERENCES users(id) ON DELETE CASCADE
+);
+
+-- Índices para analysis_results (último análisis por usuario)
+CREATE INDEX IF NOT EXISTS idx_analysis_results_user_id_id ON analysis_results(user_id, id);
+
+-- =============================================
+-- TABLA: USER_ACTIVITY_DAILY
+-- Resumen diario por usuario; la API lo actualiza al escribir la auditoría
+-- =============================================
+CREATE TABLE IF NOT EXISTS user_activity_daily (
+    user_id INTEGER NOT NULL,
+    day DATE NOT NULL,  -- día UTC
+    logins INTEGER DEFAULT 0 NOT NULL,
+    uploads INTEGER DEFAULT 0 NOT NULL,
+    exports INTEGER DEFAULT 0 NOT NULL,
+    PRIMARY KEY (user_id, day),
+    CONSTRAINT fk_user_activity_daily_user FOREIGN KEY (user_id)
+        REFERENCES users(id) ON DELETE CASCADE
+);
+
+-- Carga inicial desde la auditoría existente (no toca días ya resumidos)
+INSERT INTO user_activity_daily (user_id, day, logins, uploads, exports)
+SELECT
+    user_id,
+    (created_at AT TIME ZONE 'UTC')::DATE,
+    COUNT(*) FILTER (WHERE lower(action_type::TEXT) = 'login'),
+    COUNT(*) FILTER (WHERE lower(action_type::TEXT) = 'upload_file'),
+    COUNT(*) FILTER (WHERE lower(action_type::TEXT) = 'export_report')
+FROM audit_logs
+WHERE user_id IS NOT NULL
+  AND lower(action_type::TEXT) IN ('login', 'upload_file', 'export_report')
+GROUP BY user_id, (created_at AT TIME ZONE 'UTC')::DATE
+ON CONFLICT (user_id, day) DO NOTHING;
 
 -- =============================================
 -- FUNCIÓN: Actualizar updated_at automáticamente
@@ -99,6 +148,8 @@ CREATE TRIGGER update_users_updated_at
 
 -- =============================================
 -- FUNCIÓN: Limpiar sesiones expiradas
+-- (la API hace esta limpieza por lotes con SessionSweeper;
+--  para particionar sessions/audit_logs ver partitioning.sql)
 -- =============================================
 CREATE OR REPLACE FUNCTION clean_expired_sessions()
 RETURNS void AS $$
@@ -166,7 +217,8 @@ WHERE s.is_active = TRUE
   AND s.expires_at > CURRENT_TIMESTAMP
 ORDER BY s.created_at DESC;
 
--- Vista de actividad de usuarios
+-- Vista de actividad de usuarios (recorre toda la auditoría; para paneles usar
+-- user_activity_daily o GET /admin/audit/activity)
 CREATE OR REPLACE VIEW user_activity AS
 SELECT 
     u.id,
@@ -1,12 +1,11 @@
 from app.export_routes import router as export_router
-from fastapi import FastAPI, UploadFile, File, HTTPException, Depends
+from fastapi import FastAPI, UploadFile, File, HTTPException, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
-import pandas as pd
-from typing import Dict
-import io
+from typing import Dict, Optional
 import os
+import hashlib
 from dotenv import load_dotenv
 from datetime import datetime
 import uvicorn
@@ -15,19 +14,34 @@ load_dotenv()
 
 from app.services.analysis_service import AnalysisService
 from app.services.export_service import ExportService
-from app.model import User, Session, AuditLog, UserRole, ActionType
+from app.services.excel_service import ExcelService
+from app.model import User, AuditLog, UserRole, ActionType
 # Importar sistema de autenticación
 from app.database import init_db, get_db
 from app.auth_routes import router as auth_router
 from app.user_routes import router as user_router
-from app.dependencies import get_current_active_user
+from app.audit_routes import router as audit_router
+from app.dependencies import get_current_active_user, get_current_admin_user, get_current_analysis, record_export, get_client_ip, get_user_agent
+from app.auth_service import AuthService
 from app.model import User
-from app.export_routes import router as export_router, set_last_analysis
-from app.reports_routes import router as reports_router, set_last_analysis as set_reports_analysis
+from app.export_routes import router as export_router
+from app.reports_routes import router as reports_router
+from app.services.analysis_store import analysis_store
+from app.services.analysis_cache import analysis_cache
+from app.services.report_cache import report_cache
+from app.services.analysis_executor import AnalysisQueueFull, ExcelReadError, analysis_executor, read_and_analyze
+from app.batch_routes import router as batch_router
+from app.upload_job_routes import router as upload_job_router
+from app.services.password_hasher import PASSWORD_POOL_RETRY_AFTER, PasswordPoolFull, configure_password_hashing, password_hash_pool
+from app.services.audit_writer import audit_writer
+from app.services.session_sweeper import session_sweeper, SESSION_SWEEPER_ENABLED
+from app.email_service import email_queue
 
 app = FastAPI(title="Financial Analysis API")
 app.include_router(export_router)
 app.include_router(reports_router)
+app.include_router(batch_router)
+app.include_router(upload_job_router)
 # CORS actualizado para incluir tu dominio de Vercel
 app.add_middleware(
     CORSMiddleware,
@@ -47,6 +61,15 @@ app.add_middleware(
     expose_headers=["*"],
 )
 
+@app.exception_handler(PasswordPoolFull)
+async def password_pool_full_handler(request: Request, exc: PasswordPoolFull):
+    """Pool de bcrypt saturado (login, cambio/reset de contraseña, alta de usuarios)"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Too many password operations in progress. Please try again shortly."},
+        headers={"Retry-After": str(PASSWORD_POOL_RETRY_AFTER)}
+    )
+
 # Inicializar base de datos al inicio
 @app.on_event("startup")
 async def startup_event():
@@ -54,10 +77,21 @@ async def startup_event():
     print("🚀 Iniciando Financial Analysis API...")
     init_db()
     print("✅ Base de datos inicializada")
+    configure_password_hashing()
+    audit_writer.start()
+    email_queue.start()
+    if SESSION_SWEEPER_ENABLED:
+        session_sweeper.start()
 
-OPENAI_AVAILABLE = False
-client = None
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Liberar recursos al detener la API"""
+    analysis_executor.shutdown()
+    password_hash_pool.shutdown()
+    session_sweeper.stop()
+    email_queue.stop()
+    audit_writer.stop()
+    await chat_service.aclose()
 
 try:
         from app.models import Base
@@ -69,30 +103,18 @@ except Exception as e:
     
 print("✅ Base de datos inicializada")
 
-try:
-    from openai import OpenAI
-    print("✅ OpenAI importado correctamente")
-    
-    if OPENAI_API_KEY and OPENAI_API_KEY != "":
-        client = OpenAI(api_key=OPENAI_API_KEY)
-        OPENAI_AVAILABLE = True
-        print("✅ OpenAI configurado correctamente")
-    else:
-        print("⚠️ API Key de OpenAI no configurada. Usando respuestas fallback.")
-        
-except Exception as e:
-    print(f"❌ Error configurando OpenAI: {e}")
-    OPENAI_AVAILABLE = False
+# ✅ Chat: cliente asíncrono de OpenAI (o simulador local con CHAT_BACKEND=stub)
+from app.services.chat_service import chat_service, error_fallback_result, result_events
+from app.services.chat_context import compact_context
 
 analysis_service = AnalysisService()
 export_service = ExportService()
-
-# Variable global para almacenar el último análisis
-last_analysis = None
+excel_service = ExcelService(analysis_service)
 
 # ============ INCLUIR ROUTERS DE AUTENTICACIÓN ============
 app.include_router(auth_router)
 app.include_router(user_router)
+app.include_router(audit_router)
 app.include_router(export_router)
 # ============ ENDPOINTS PÚBLICOS ============
 
@@ -101,7 +123,7 @@ def read_root():
     return {
         "message": "🚀 Financial Analysis API is running!", 
         "status": "success",
-        "openai_status": "available" if OPENAI_AVAILABLE else "fallback_mode",
+        "openai_status": "available" if chat_service.available else "fallback_mode",
         "version": "2.1",
         "authentication": "enabled",
         "password_reset": "enabled",
@@ -161,10 +183,11 @@ def get_test_data():
     }
 
 @app.get("/analysis/{analysis_type}")
-def get_analysis(analysis_type: str):
-    """Obtener análisis horizontal o vertical - PÚBLICO"""
-    global last_analysis
-    
+def get_analysis(
+    analysis_type: str,
+    last_analysis: Optional[Dict] = Depends(get_current_analysis)
+):
+    """Obtener análisis horizontal o vertical del usuario - REQUIERE AUTENTICACIÓN"""
     if not last_analysis:
         raise HTTPException(status_code=400, detail="No hay datos disponibles. Carga un archivo primero.")
     
@@ -187,33 +210,49 @@ def get_analysis(analysis_type: str):
 
 @app.post("/upload")
 async def upload_file(
+    request: Request,
     file: UploadFile = File(...),
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
 ):
     """Endpoint para subir archivos Excel y analizarlos - REQUIERE AUTENTICACIÓN"""
-    global last_analysis
-    
     try:
         if not file.filename.endswith(('.xlsx', '.xls')):
             raise HTTPException(status_code=400, detail="Solo se permiten archivos Excel")
         
-        contents = await file.read()
-        try:
-            df = pd.read_excel(io.BytesIO(contents), engine='openpyxl')
-        except Exception as excel_err:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Error al leer el archivo Excel: {str(excel_err)}. Asegúrate de que sea un archivo .xlsx válido."
-            )
-        
-        print(f"\n{'='*60}")
-        print(f"📄 Archivo recibido: {file.filename}")
-        print(f"👤 Usuario: {current_user.username} ({current_user.role})")
-        print(f"📊 Dimensiones del DataFrame: {df.shape}")
-        print(f"📋 Primeras columnas: {df.columns.tolist()[:5]}")
-        print(f"{'='*60}\n")
+        # ✅ Guardar en disco por bloques calculando el hash del contenido
+        digest = hashlib.sha256()
+        tmp_path = await excel_service.spool_upload(file, digest)
+        cache_key = analysis_cache.make_key(digest.hexdigest())
         
-        analysis_result = analysis_service.analyze_financial_data(df)
+        try:
+            # ✅ Mismo archivo ya analizado: no se vuelve a leer el Excel
+            analysis_result = analysis_cache.get(cache_key)
+            if analysis_result is not None:
+                print(f"♻️ Análisis en caché para {file.filename} ({current_user.username})")
+            else:
+                print(f"\n{'='*60}")
+                print(f"📄 Archivo recibido: {file.filename}")
+                print(f"👤 Usuario: {current_user.username} ({current_user.role})")
+                print(f"{'='*60}\n")
+                
+                # ✅ Lectura (modo streaming) y análisis en el pool, sin bloquear el event loop
+                try:
+                    analysis_result = await analysis_executor.run(read_and_analyze, tmp_path)
+                except AnalysisQueueFull:
+                    raise HTTPException(
+                        status_code=429,
+                        detail="El servidor está procesando demasiados archivos. Intenta de nuevo en unos segundos.",
+                        headers={"Retry-After": "5"}
+                    )
+                except ExcelReadError as excel_err:
+                    raise HTTPException(
+                        status_code=400,
+                        detail=f"Error al leer el archivo Excel: {str(excel_err)}. Asegúrate de que sea un archivo .xlsx válido."
+                    )
+                analysis_cache.put(cache_key, analysis_result)
+        finally:
+            excel_service.remove_spooled_file(tmp_path)
         
         if not analysis_result or not analysis_result.get('available_years'):
             raise HTTPException(
@@ -226,9 +265,17 @@ async def upload_file(
         analysis_result["uploaded_by"] = current_user.username
         analysis_result["message"] = "Análisis financiero completado exitosamente"
         
-        last_analysis = analysis_result
-        set_last_analysis(analysis_result)
-        set_reports_analysis(analysis_result)
+        # ✅ Persistir por usuario (exportaciones y reportes lo leen por analysis_id)
+        analysis_result["analysis_id"] = analysis_store.save(db, current_user.id, analysis_result, file.filename)
+        report_cache.invalidate_user(current_user.id)
+        AuthService.create_audit_log(
+            db=db,
+            user_id=current_user.id,
+            action_type=ActionType.UPLOAD_FILE,
+            description=f"Upload: {file.filename}",
+            ip_address=get_client_ip(request),
+            user_agent=get_user_agent(request)
+        )
 
         return analysis_result
         
@@ -240,20 +287,36 @@ async def upload_file(
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Error procesando archivo: {str(e)}")
 
-@app.get("/export/excel")
+@app.get("/upload/cache/stats")
+async def get_upload_cache_stats(
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Estadísticas de la caché de análisis por hash de archivo - SOLO ADMIN"""
+    return analysis_cache.stats()
+
+@app.get("/upload/executor/stats")
+async def get_upload_executor_stats(
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Profundidad de cola y tiempos del pool de análisis - SOLO ADMIN"""
+    return analysis_executor.stats()
+
+@app.get("/export/excel", dependencies=[Depends(record_export)])
 async def export_to_excel(
+    last_analysis: Optional[Dict] = Depends(get_current_analysis),
     current_user: User = Depends(get_current_active_user)
 ):
     """Exportar análisis a Excel - REQUIERE AUTENTICACIÓN"""
-    global last_analysis
-    
     if not last_analysis:
         raise HTTPException(status_code=400, detail="No hay datos para exportar. Primero carga un archivo.")
     
     try:
         print(f"📊 Exportando análisis para usuario: {current_user.username}")
         
-        excel_file = export_service.create_excel_report(last_analysis)
+        excel_file = report_cache.get_or_render(
+            current_user.id, last_analysis, "export:complete",
+            lambda: export_service.create_excel_report(last_analysis)
+        )
         
         filename = f"analisis_financiero_{current_user.username}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
         
@@ -266,110 +329,84 @@ async def export_to_excel(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generando Excel: {str(e)}")
 
+def resolve_chat_context(message: dict, current_user: User, db: Session) -> dict:
+    """
+    Contexto compacto para el chat ({"text", "values"}), en orden de preferencia:
+    analysis_id del mensaje (o de financial_data) -> financial_data enviado -> último análisis
+    """
+    financial_data = message.get("financial_data") or {}
+    analysis_id = message.get("analysis_id") or financial_data.get("analysis_id")
+    if analysis_id is not None:
+        try:
+            return analysis_store.get_chat_context(db, current_user.id, int(analysis_id))
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="analysis_id inválido")
+    if financial_data:
+        return compact_context(financial_data)
+    return analysis_store.get_chat_context(db, current_user.id)
+
+def read_chat_request(message: dict, current_user: User, db: Session):
+    """Mensaje normalizado y contexto del chat (HTTPException 400 si el mensaje está vacío)"""
+    user_message = message.get("message", "").lower()
+    if not user_message:
+        raise HTTPException(status_code=400, detail="El mensaje no puede estar vacío")
+    return user_message, resolve_chat_context(message, current_user, db)
+
 @app.post("/chat")
 async def chat_with_ai(
     message: dict,
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
 ):
-    """Endpoint para chat con IA - REQUIERE AUTENTICACIÓN"""
+    """
+    Endpoint para chat con IA - REQUIERE AUTENTICACIÓN
+    Basta con enviar `message` y `analysis_id`: el contexto se toma del análisis guardado
+    """
     try:
-        user_message = message.get("message", "").lower()
-        financial_data = message.get("financial_data", {})
-        
-        if not user_message:
-            raise HTTPException(status_code=400, detail="El mensaje no puede estar vacío")
-
-        print(f"💬 Chat request from user: {current_user.username}")
-
-        if OPENAI_AVAILABLE and client:
-            context = ""
-            if financial_data and financial_data.get('indicators'):
-                indicators = financial_data['indicators']
-                available_years = financial_data.get('available_years', [])
-                
-                context = f"""
-                Datos financieros actuales:
-                
-                Indicadores de Liquidez:
-                - Razón Corriente: {indicators.get('liquidez', {}).get('razon_corriente', {})}
-                - Prueba Ácida: {indicators.get('liquidez', {}).get('prueba_acida', {})}
-                - Capital de Trabajo: {indicators.get('liquidez', {}).get('capital_trabajo', {})}
-                
-                Indicadores de Rentabilidad:
-                - ROE: {indicators.get('rentabilidad', {}).get('roe', {})}
-                - ROA: {indicators.get('rentabilidad', {}).get('roa', {})}
-                - Margen Bruto: {indicators.get('rentabilidad', {}).get('margen_bruto', {})}
-                
-                Indicadores de Endeudamiento:
-                - Endeudamiento Total: {indicators.get('endeudamiento', {}).get('endeudamiento_total', {})}
-                - Deuda/Patrimonio: {indicators.get('endeudamiento', {}).get('deuda_patrimonio', {})}
-                
-                Indicadores de Rotación:
-                - Rotación de Inventarios: {indicators.get('rotacion', {}).get('rotacion_inventarios', {})}
-                - Rotación de Cartera: {indicators.get('rotacion', {}).get('rotacion_cartera', {})}
-                
-                Análisis de Quiebra:
-                - Z-Score: {indicators.get('quiebra', {}).get('z_score', {})}
-                - Clasificación: {indicators.get('quiebra', {}).get('clasificacion_z', {})}
-                
-                Años disponibles: {available_years}
-                """
-
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {
-                        "role": "system", 
-                        "content": "Eres un asistente especializado en análisis financiero. Responde SIEMPRE en máximo 25 palabras de forma concisa, clara y directa."
-                    },
-                    {"role": "user", "content": f"{context}\n\nPregunta: {user_message}"}
-                ],
-                max_tokens=50,
-                temperature=0.7
-            )
+        user_message, context = read_chat_request(message, current_user, db)
+    except HTTPException:
+        raise
+    except Exception as e:
+        # Cuerpo con tipos inesperados: respuesta genérica en lugar de un 500
+        print(f"Error en chat: {str(e)}")
+        return error_fallback_result()
 
-            ai_response = response.choices[0].message.content.strip()
-            
-            return {
-                "response": ai_response,
-                "status": "success",
-                "source": "openai"
-            }
-        
-        else:
-            responses = {
-                "liquidez": "Tu liquidez es adecuada si la razón corriente está entre 1.5-2.0. Valores menores indican riesgo.",
-                "rentabilidad": "ROE mide rentabilidad sobre capital; ROA sobre activos totales. Mayores valores son mejores.",
-                "endeudamiento": "Endeudamiento sobre 60% se considera alto. Indica mayor riesgo financiero.",
-                "rotacion": "Mayor rotación indica mejor gestión operativa. Mide eficiencia en uso de activos.",
-                "quiebra": "Z-Score >2.99 es seguro, 1.81-2.99 es zona gris, <1.81 es peligro.",
-                "z-score": "Z-Score combina múltiples ratios. Es confiable para evaluar salud financiera.",
-                "exportar": "Usa el botón de exportación para descargar el análisis completo en Excel.",
-                "horizontal": "Análisis horizontal compara estados financieros entre períodos, muestra variaciones.",
-                "vertical": "Análisis vertical muestra estructura porcentual sobre el total para comparar.",
-                "hola": "Hola! Soy tu asistente financiero. ¿Qué deseas saber?",
-            }
+    print(f"💬 Chat request from user: {current_user.username}")
+    return await chat_service.answer(user_message, context["text"], context["values"])
 
-            response = "Puedo ayudarte con conceptos financieros. ¿Preguntas sobre indicadores?"
-            
-            for key, resp in responses.items():
-                if key in user_message:
-                    response = resp
-                    break
+@app.post("/chat/stream")
+async def chat_with_ai_stream(
+    message: dict,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Chat con IA con la respuesta por tokens (SSE) - REQUIERE AUTENTICACIÓN
+    Eventos: `token` ({"token": ...}) y al final `done` (mismo cuerpo que POST /chat)
+    """
+    try:
+        user_message, context = read_chat_request(message, current_user, db)
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error en chat (streaming): {str(e)}")
+        events = result_events(error_fallback_result())
+    else:
+        print(f"💬 Chat (stream) request from user: {current_user.username}")
+        events = chat_service.stream_events(user_message, context["text"], context["values"])
 
-            return {
-                "response": response,
-                "status": "success", 
-                "source": "fallback"
-            }
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
-    except Exception as e:
-        print(f"Error en chat: {str(e)}")
-        return {
-            "response": "Puedo explicarte conceptos financieros básicos. ¿Tienes preguntas sobre los indicadores?",
-            "status": "success",
-            "source": "error_fallback"
-        }
+@app.get("/chat/cache/stats")
+async def get_chat_cache_stats(
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Aciertos y ocupación de la caché de respuestas del chat - SOLO ADMIN"""
+    return chat_service.cache.stats() if chat_service.cache else {}
 
 # Punto de entrada para Render
 if __name__ == "__main__":
@@ -0,0 +1,50 @@
+-- =============================================
+-- MIGRACIÓN: sessions.session_token -> sessions.token_hash
+-- Las sesiones se indexan por el SHA-256 (hex, 64 caracteres) del JWT en lugar
+-- del token completo (VARCHAR(500)): índice más pequeño y búsquedas más rápidas.
+-- PostgreSQL 11+ | Solo para bases creadas antes de este cambio.
+-- =============================================
+
+-- Paso 1: nueva columna, rellenada a partir de los tokens existentes
+-- (ejecutar antes de desplegar la nueva versión de la API; un trigger la
+--  completa para las instancias antiguas que sigan en marcha)
+BEGIN;
+
+ALTER TABLE sessions ADD COLUMN IF NOT EXISTS token_hash CHAR(64);
+
+UPDATE sessions
+SET token_hash = encode(sha256(convert_to(session_token, 'UTF8')), 'hex')
+WHERE token_hash IS NULL;
+
+ALTER TABLE sessions ALTER COLUMN token_hash SET NOT NULL;
+-- La API nueva ya no escribe session_token
+ALTER TABLE sessions ALTER COLUMN session_token DROP NOT NULL;
+
+-- Mientras convivan instancias de la versión anterior (que solo escriben session_token)
+CREATE OR REPLACE FUNCTION fill_session_token_hash()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.token_hash IS NULL AND NEW.session_token IS NOT NULL THEN
+        NEW.token_hash := encode(sha256(convert_to(NEW.session_token, 'UTF8')), 'hex');
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS fill_session_token_hash ON sessions;
+CREATE TRIGGER fill_session_token_hash
+    BEFORE INSERT ON sessions
+    FOR EACH ROW
+    EXECUTE FUNCTION fill_session_token_hash();
+
+COMMIT;
+
+-- Fuera de la transacción para no bloquear escrituras mientras se construye
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS sessions_token_hash_key ON sessions(token_hash);
+
+-- Paso 2: cuando ya no quede ninguna instancia de la versión anterior,
+-- eliminar el trigger, el token completo y sus índices
+-- DROP TRIGGER IF EXISTS fill_session_token_hash ON sessions;
+-- DROP FUNCTION IF EXISTS fill_session_token_hash();
+-- DROP INDEX IF EXISTS idx_sessions_token;
+-- ALTER TABLE sessions DROP COLUMN session_token;
@@ -0,0 +1,194 @@
+-- =============================================
+-- PARTICIONAMIENTO OPCIONAL POR RANGO DE TIEMPO
+-- Tablas: sessions y audit_logs (particiones mensuales por created_at)
+-- PostgreSQL 15+ | Ejecutar una sola vez, en una ventana de mantenimiento,
+-- después de init_db.sql. Luego activar SESSION_PARTITIONING=true para que
+-- la API cree particiones futuras y elimine las antiguas automáticamente.
+-- Requiere sessions.token_hash (migrate_session_tokens.sql en bases anteriores).
+-- =============================================
+
+-- =============================================
+-- FUNCIÓN: Crear particiones mensuales (desde from_month, por defecto el mes
+-- actual, hasta months_ahead meses adelante)
+-- Si la partición DEFAULT ya tiene filas de ese mes, se mueven a la nueva
+-- partición (CREATE ... PARTITION OF fallaría con una violación de restricción)
+-- =============================================
+DROP FUNCTION IF EXISTS create_monthly_partitions(TEXT, INTEGER);
+CREATE OR REPLACE FUNCTION create_monthly_partitions(parent TEXT, months_ahead INTEGER DEFAULT 2, from_month DATE DEFAULT NULL)
+RETURNS void AS $$
+DECLARE
+    month_start DATE := date_trunc('month', COALESCE(from_month, CURRENT_DATE))::DATE;
+    last_month DATE := (date_trunc('month', CURRENT_DATE) + make_interval(months => months_ahead))::DATE;
+    month_end DATE;
+    partition_name TEXT;
+    default_part REGCLASS;
+    has_rows BOOLEAN;
+BEGIN
+    SELECT NULLIF(partdefid, 0)::REGCLASS INTO default_part
+    FROM pg_partitioned_table WHERE partrelid = parent::REGCLASS;
+
+    WHILE month_start <= last_month LOOP
+        month_end := (month_start + INTERVAL '1 month')::DATE;
+        partition_name := format('%s_y%sm%s', parent, to_char(month_start, 'YYYY'), to_char(month_start, 'MM'));
+
+        IF to_regclass(partition_name) IS NULL THEN
+            has_rows := FALSE;
+            IF default_part IS NOT NULL THEN
+                EXECUTE format('SELECT EXISTS (SELECT 1 FROM %s WHERE created_at >= %L AND created_at < %L)',
+                               default_part, month_start, month_end) INTO has_rows;
+            END IF;
+
+            IF has_rows THEN
+                EXECUTE format('CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS INCLUDING CONSTRAINTS)', partition_name, parent);
+                EXECUTE format(
+                    'WITH moved AS (DELETE FROM %s WHERE created_at >= %L AND created_at < %L RETURNING *) INSERT INTO %I SELECT * FROM moved',
+                    default_part, month_start, month_end, partition_name
+                );
+                EXECUTE format('ALTER TABLE %I ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                               parent, partition_name, month_start, month_end);
+            ELSE
+                EXECUTE format('CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                               partition_name, parent, month_start, month_end);
+            END IF;
+        END IF;
+
+        month_start := month_end;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- =============================================
+-- FUNCIÓN: Eliminar particiones mensuales más antiguas que keep_months
+-- (mucho más barato que DELETE + VACUUM sobre millones de filas)
+-- La partición DEFAULT no se elimina: se borran sus filas anteriores al corte
+-- =============================================
+CREATE OR REPLACE FUNCTION drop_old_partitions(parent TEXT, keep_months INTEGER)
+RETURNS INTEGER AS $$
+DECLARE
+    cutoff DATE := (date_trunc('month', CURRENT_DATE) - make_interval(months => keep_months))::DATE;
+    part RECORD;
+    part_month DATE;
+    default_part REGCLASS;
+    dropped INTEGER := 0;
+BEGIN
+    FOR part IN
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        JOIN pg_class parent_table ON parent_table.oid = pg_inherits.inhparent
+        WHERE parent_table.relname = parent
+          AND child.relname ~ '_y[0-9]{4}m[0-9]{2}$'
+    LOOP
+        part_month := make_date(
+            substring(part.relname FROM '_y([0-9]{4})m[0-9]{2}$')::INTEGER,
+            substring(part.relname FROM '_y[0-9]{4}m([0-9]{2})$')::INTEGER,
+            1
+        );
+        IF part_month < cutoff THEN
+            EXECUTE format('DROP TABLE %I', part.relname);
+            dropped := dropped + 1;
+        END IF;
+    END LOOP;
+
+    SELECT NULLIF(partdefid, 0)::REGCLASS INTO default_part
+    FROM pg_partitioned_table WHERE partrelid = parent::REGCLASS;
+    IF default_part IS NOT NULL THEN
+        EXECUTE format('DELETE FROM %s WHERE created_at < %L', default_part, cutoff);
+    END IF;
+    RETURN dropped;
+END;
+$$ LANGUAGE plpgsql;
+
+BEGIN;
+
+-- =============================================
+-- TABLA: SESSIONS (particionada)
+-- La clave primaria y la unicidad deben incluir la columna de partición
+-- =============================================
+CREATE TABLE sessions_partitioned (
+    id INTEGER NOT NULL DEFAULT nextval('sessions_id_seq'),
+    user_id INTEGER NOT NULL,
+    token_hash CHAR(64) NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    ip_address VARCHAR(45),
+    user_agent TEXT,
+    is_active BOOLEAN DEFAULT TRUE NOT NULL,
+    PRIMARY KEY (id, created_at),
+    UNIQUE (token_hash, created_at),
+    CONSTRAINT fk_sessions_partitioned_user FOREIGN KEY (user_id)
+        REFERENCES users(id) ON DELETE CASCADE
+) PARTITION BY RANGE (created_at);
+
+-- Las filas históricas van a particiones mensuales reales (desde el mes de la más
+-- antigua), así drop_old_partitions también las elimina. La partición DEFAULT queda
+-- solo como red de seguridad para filas fuera de rango (p. ej. fechas futuras)
+CREATE TABLE sessions_default PARTITION OF sessions_partitioned DEFAULT;
+SELECT create_monthly_partitions('sessions_partitioned', 2, (SELECT min(created_at) FROM sessions)::DATE);
+
+INSERT INTO sessions_partitioned (id, user_id, token_hash, created_at, expires_at, ip_address, user_agent, is_active)
+SELECT id, user_id, token_hash, COALESCE(created_at, CURRENT_TIMESTAMP), expires_at, ip_address, user_agent, is_active
+FROM sessions;
+
+-- La secuencia pasa a la nueva tabla antes de eliminar la original
+ALTER SEQUENCE sessions_id_seq OWNED BY sessions_partitioned.id;
+DROP VIEW IF EXISTS active_sessions;
+DROP TABLE sessions;
+ALTER TABLE sessions_partitioned RENAME TO sessions;
+DO $$
+DECLARE part RECORD;
+BEGIN
+    FOR part IN SELECT relname FROM pg_class WHERE relname LIKE 'sessions_partitioned_y%' LOOP
+        EXECUTE format('ALTER TABLE %I RENAME TO %I', part.relname, replace(part.relname, 'sessions_partitioned_', 'sessions_'));
+    END LOOP;
+END $$;
+
+CREATE INDEX IF NOT EXISTS idx_sessions_user_id ON sessions(user_id);
+CREATE INDEX IF NOT EXISTS idx_sessions_is_active ON sessions(is_active);
+CREATE INDEX IF NOT EXISTS idx_sessions_expires_at ON sessions(expires_at);
+
+-- =============================================
+-- TABLA: AUDIT_LOGS (particionada)
+-- =============================================
+CREATE TABLE audit_logs_partitioned (
+    id INTEGER NOT NULL DEFAULT nextval('audit_logs_id_seq'),
+    user_id INTEGER,
+    action_type VARCHAR(50) NOT NULL,
+    description TEXT,
+    ip_address VARCHAR(45),
+    user_agent TEXT,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, created_at),
+    CONSTRAINT fk_audit_logs_partitioned_user FOREIGN KEY (user_id)
+        REFERENCES users(id) ON DELETE SET NULL
+) PARTITION BY RANGE (created_at);
+
+CREATE TABLE audit_logs_default PARTITION OF audit_logs_partitioned DEFAULT;
+SELECT create_monthly_partitions('audit_logs_partitioned', 2, (SELECT min(created_at) FROM audit_logs)::DATE);
+
+INSERT INTO audit_logs_partitioned (id, user_id, action_type, description, ip_address, user_agent, created_at)
+SELECT id, user_id, action_type, description, ip_address, user_agent, COALESCE(created_at, CURRENT_TIMESTAMP)
+FROM audit_logs;
+
+ALTER SEQUENCE audit_logs_id_seq OWNED BY audit_logs_partitioned.id;
+DROP VIEW IF EXISTS user_activity;
+DROP TABLE audit_logs;
+ALTER TABLE audit_logs_partitioned RENAME TO audit_logs;
+DO $$
+DECLARE part RECORD;
+BEGIN
+    FOR part IN SELECT relname FROM pg_class WHERE relname LIKE 'audit_logs_partitioned_y%' LOOP
+        EXECUTE format('ALTER TABLE %I RENAME TO %I', part.relname, replace(part.relname, 'audit_logs_partitioned_', 'audit_logs_'));
+    END LOOP;
+END $$;
+
+CREATE INDEX IF NOT EXISTS idx_audit_logs_user_id ON audit_logs(user_id);
+CREATE INDEX IF NOT EXISTS idx_audit_logs_action_type ON audit_logs(action_type);
+CREATE INDEX IF NOT EXISTS idx_audit_logs_created_at ON audit_logs(created_at);
+CREATE INDEX IF NOT EXISTS idx_audit_logs_user_id_created_at ON audit_logs(user_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_audit_logs_action_type_created_at ON audit_logs(action_type, created_at);
+
+COMMIT;
+
+-- Las vistas active_sessions y user_activity se eliminaron junto con las tablas
+-- originales: volver a ejecutar la sección "VISTAS ÚTILES" de init_db.sql
@@ -0,0 +1,91 @@
+"""
+Fixtures compartidas de las pruebas
+PostgreSQL se reemplaza por SQLite en memoria (mismo metadata de app.models)
+"""
+import io
+
+import pytest
+from fastapi.testclient import TestClient
+from openpyxl import Workbook
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+
+import main
+from app.database import SessionLocal
+from app.dependencies import get_current_active_user, get_current_admin_user
+from app.models import Base, User, UserRole
+from app.services.analysis_service import CONCEPT_SEARCH_TERMS
+from app.services.analysis_store import analysis_store
+from app.services.analysis_cache import analysis_cache
+from app.services.chat_cache import chat_cache
+from app.services.report_cache import report_cache
+
+
+@pytest.fixture
+def db_engine():
+    """Base nueva por prueba; las cachés de proceso se limpian porque los ids se repiten"""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    SessionLocal.configure(bind=engine)
+
+    analysis_store._cache.clear()
+    analysis_cache.clear()
+    chat_cache.clear()
+    report_cache.clear()
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def user(db_engine) -> User:
+    db = SessionLocal()
+    try:
+        user = User(email="tester@example.com", username="tester", password_hash="x", role=UserRole.ADMIN)
+        db.add(user)
+        db.commit()
+        db.refresh(user)
+        db.expunge(user)
+        return user
+    finally:
+        db.close()
+
+
+@pytest.fixture
+def client(user):
+    """Cliente autenticado como `user` (administrador)"""
+    main.app.dependency_overrides[get_current_active_user] = lambda: user
+    main.app.dependency_overrides[get_current_admin_user] = lambda: user
+    yield TestClient(main.app)
+    main.app.dependency_overrides.clear()
+
+
+def make_financial_workbook(years=(2022, 2023), extra_rows: int = 0) -> bytes:
+    """Libro mínimo con la fila de años y un valor por concepto que busca AnalysisService"""
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(["Empresa de prueba"])
+    sheet.append([None, "Concepto", *years])
+    for i, terms in enumerate(CONCEPT_SEARCH_TERMS.values()):
+        sheet.append([None, terms[0], *[1000 * (i + 1) + offset for offset in range(len(years))]])
+    for i in range(extra_rows):
+        sheet.append([None, f"Otro concepto {i}", *[1 for _ in years]])
+
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def financial_workbook() -> bytes:
+    return make_financial_workbook()
+
+
+@pytest.fixture
+def uploaded_analysis(client, financial_workbook) -> dict:
+    """Análisis guardado del usuario a partir de una carga por /upload"""
+    response = client.post(
+        "/upload",
+        files={"file": ("estados.xlsx", financial_workbook, "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")}
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
@@ -0,0 +1,36 @@
+"""Almacén de análisis y respuestas de /upload"""
+from app.database import SessionLocal
+from app.services.analysis_store import analysis_store
+
+
+def test_save_does_not_modify_the_callers_dict(user):
+    data = {"available_years": [2023], "indicators": {}}
+    db = SessionLocal()
+    try:
+        analysis_id = analysis_store.save(db, user.id, data, "estados.xlsx")
+        stored = analysis_store.get(db, user.id, analysis_id)
+    finally:
+        db.close()
+
+    assert data == {"available_years": [2023], "indicators": {}}
+    assert stored["analysis_id"] == analysis_id
+    assert "chat_context" in stored
+
+
+def test_cached_analysis_is_returned_as_a_copy(user):
+    db = SessionLocal()
+    try:
+        analysis_id = analysis_store.save(db, user.id, {"available_years": [2023]})
+        analysis_store.get(db, user.id, analysis_id)["available_years"].append(1999)
+        assert analysis_store.get(db, user.id, analysis_id)["available_years"] == [2023]
+    finally:
+        db.close()
+
+
+def test_upload_response_omits_the_internal_chat_context(client, uploaded_analysis):
+    assert uploaded_analysis["analysis_id"] is not None
+    assert "chat_context" not in uploaded_analysis
+
+    exported = client.get("/export/json").json()
+    assert exported["analysis_id"] == uploaded_analysis["analysis_id"]
+    assert "chat_context" not in exported
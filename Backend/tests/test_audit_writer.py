@@ -0,0 +1,84 @@
+"""Escritor de auditoría por lotes"""
+import time
+
+import pytest
+from sqlalchemy import text
+
+from app.database import SessionLocal
+from app.models import ActionType, AuditLog
+from app.services.audit_writer import AuditLogWriter
+
+
+def stored_descriptions():
+    db = SessionLocal()
+    try:
+        return [row.description for row in db.query(AuditLog).order_by(AuditLog.id)]
+    finally:
+        db.close()
+
+
+def wait_until(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "la condición no se cumplió a tiempo"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def writer(db_engine):
+    writer = AuditLogWriter(session_factory=SessionLocal, flush_size=100, flush_interval=60, max_buffer=3)
+    yield writer
+    writer.stop()
+
+
+def test_full_buffer_drops_the_oldest_rows(writer, user):
+    writer.start()
+    for i in range(5):
+        writer.log(user.id, ActionType.LOGIN, f"evento {i}")
+
+    assert writer.stats()["pending"] == 3
+    writer.stop()
+
+    stats = writer.stats()
+    assert stats["dropped"] == 2
+    assert stats["written"] == 3
+    assert stats["pending"] == 0
+    assert stored_descriptions() == ["evento 2", "evento 3", "evento 4"]
+
+
+def test_flushes_in_background_when_the_batch_is_full(writer, user):
+    writer.flush_size = 2
+    writer.start()
+    writer.log(user.id, ActionType.LOGIN, "a")
+    writer.log(user.id, ActionType.LOGOUT, "b")
+
+    wait_until(lambda: writer.stats()["written"] == 2)
+    assert writer.stats()["flushes"] == 1
+    assert stored_descriptions() == ["a", "b"]
+
+
+def test_without_thread_rows_are_written_immediately(writer, user):
+    writer.log(user.id, ActionType.LOGIN, "inmediato")
+
+    assert writer.stats()["written"] == 1
+    assert stored_descriptions() == ["inmediato"]
+
+
+def test_failed_batch_falls_back_to_row_by_row(writer, user, db_engine):
+    # Con claves foráneas activas el bloque falla por el usuario inexistente
+    with db_engine.connect() as connection:
+        connection.execute(text("PRAGMA foreign_keys=ON"))
+    writer.start()
+    writer.log(user.id, ActionType.LOGIN, "usuario existente")
+    writer.log(user.id + 1000, ActionType.LOGIN, "usuario eliminado")
+    writer.stop()
+
+    stats = writer.stats()
+    assert stats["written"] == 2
+    assert stats["dropped"] == 0
+    db = SessionLocal()
+    try:
+        rows = {row.description: row.user_id for row in db.query(AuditLog)}
+    finally:
+        db.close()
+    assert rows == {"usuario existente": user.id, "usuario eliminado": None}
@@ -0,0 +1,139 @@
+"""Pool acotado: admisión, cancelación y recuperación con ambos tipos de pool"""
+import asyncio
+import os
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from app.services.bounded_executor import BoundedExecutor, QueueFull
+
+KINDS = ["thread", "process"]
+
+
+def slow_square(value: int, seconds: float = 0.3) -> int:
+    time.sleep(seconds)
+    return value * value
+
+
+def fail(message: str):
+    raise ValueError(message)
+
+
+def crash_worker():
+    os._exit(1)
+
+
+@pytest.fixture(params=KINDS)
+def executor(request):
+    executor = BoundedExecutor(request.param, max_workers=1, max_queue=1)
+    yield executor
+    executor.shutdown()
+
+
+async def wait_until(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "la condición no se cumplió a tiempo"
+        await asyncio.sleep(0.01)
+
+
+def test_rejects_when_workers_and_queue_are_full(executor):
+    async def scenario():
+        running = asyncio.create_task(executor.run(slow_square, 2))
+        queued = asyncio.create_task(executor.run(slow_square, 3))
+        await wait_until(lambda: executor.in_flight == 2)
+
+        with pytest.raises(QueueFull):
+            await executor.run(slow_square, 4)
+        with pytest.raises(QueueFull):
+            executor.reserve()
+
+        return await asyncio.gather(running, queued)
+
+    assert asyncio.run(scenario()) == [4, 9]
+    stats = executor.stats()
+    assert stats["rejected"] == 2
+    assert stats["completed"] == 2
+    assert stats["in_flight"] == 0
+    assert stats["running"] == 0
+
+
+def test_cancelled_queued_run_frees_its_slot(executor):
+    async def scenario():
+        running = asyncio.create_task(executor.run(slow_square, 2))
+        queued = asyncio.create_task(executor.run(slow_square, 3))
+        await wait_until(lambda: executor.in_flight == 2)
+
+        queued.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await queued
+        assert executor.in_flight == 1
+        return await running
+
+    assert asyncio.run(scenario()) == 4
+    assert executor.stats()["in_flight"] == 0
+
+
+def test_cancelled_running_job_keeps_its_slot_until_it_finishes(executor):
+    async def scenario():
+        started = asyncio.Event()
+        running = asyncio.create_task(executor.run(slow_square, 2, on_start=started.set))
+        await started.wait()
+
+        running.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await running
+        # El worker sigue ocupado: el lugar se libera cuando el pool termina el trabajo
+        assert executor.in_flight == 1
+        await wait_until(lambda: executor.in_flight == 0)
+        return await executor.run(slow_square, 5, 0)
+
+    assert asyncio.run(scenario()) == 25
+    assert executor.stats()["running"] == 0
+
+
+def test_reserved_run_uses_the_callers_slot(executor):
+    async def scenario():
+        executor.reserve(2)
+        try:
+            with pytest.raises(QueueFull):
+                await executor.run(slow_square, 1, 0)
+            return await asyncio.gather(
+                executor.run(slow_square, 2, 0, reserved=True),
+                executor.run(slow_square, 3, 0, reserved=True),
+            )
+        finally:
+            executor.release(2)
+
+    assert asyncio.run(scenario()) == [4, 9]
+    assert executor.stats()["in_flight"] == 0
+
+
+def test_failed_job_is_counted_and_pool_keeps_working(executor):
+    async def scenario():
+        with pytest.raises(ValueError):
+            await executor.run(fail, "error")
+        return await executor.run(slow_square, 3, 0)
+
+    assert asyncio.run(scenario()) == 9
+    stats = executor.stats()
+    assert stats["failed"] == 1
+    assert stats["completed"] == 1
+    assert stats["in_flight"] == 0
+
+
+def test_process_pool_is_recreated_after_a_worker_crash():
+    executor = BoundedExecutor("process", max_workers=1, max_queue=1)
+
+    async def scenario():
+        with pytest.raises(BrokenProcessPool):
+            await executor.run(crash_worker)
+        await wait_until(lambda: executor.stats()["running"] == 0)
+        return await executor.run(slow_square, 4, 0)
+
+    try:
+        assert asyncio.run(scenario()) == 16
+    finally:
+        executor.shutdown()
+    assert executor.stats()["in_flight"] == 0
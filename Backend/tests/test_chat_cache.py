@@ -0,0 +1,27 @@
+"""Clave de la caché del chat"""
+import pytest
+
+from app.services.chat_cache import ChatCache, normalize_question
+
+
+@pytest.mark.parametrize("first, second", [
+    ("¿Qué es el Z-Score?", "explica z-score"),
+    ("¿Qué significa la liquidez?", "qué es liquidez"),
+])
+def test_equivalent_questions_share_a_key(first, second):
+    assert normalize_question(first) == normalize_question(second)
+
+
+def test_value_and_definition_questions_have_different_keys():
+    cache = ChatCache()
+
+    value_key = cache.make_key("¿Cuál es mi liquidez?", "contexto")
+    definition_key = cache.make_key("¿Qué es la liquidez?", "contexto")
+
+    assert value_key != definition_key
+    assert normalize_question("¿Cuál es mi liquidez?") == "cual mi liquidez"
+    assert normalize_question("¿Cómo está mi endeudamiento?") != normalize_question("endeudamiento")
+
+
+def test_word_order_is_kept():
+    assert normalize_question("ROE mayor que ROA") != normalize_question("ROA mayor que ROE")
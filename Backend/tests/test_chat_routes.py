@@ -0,0 +1,44 @@
+"""Rutas del chat: un cuerpo malformado recibe la respuesta genérica, no un 500"""
+import json
+
+import pytest
+
+from app.services.chat_service import ERROR_FALLBACK_RESPONSE
+
+MALFORMED_BODIES = [
+    {"message": 123},
+    {"message": ["hola"]},
+    {"message": "liquidez", "financial_data": ["no", "es", "un", "dict"]},
+    {"message": "liquidez", "financial_data": "texto"},
+]
+
+
+def sse_events(body: str):
+    events = []
+    for frame in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in frame.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+@pytest.mark.parametrize("body", MALFORMED_BODIES)
+def test_chat_with_malformed_body_returns_fallback(client, body):
+    response = client.post("/chat", json=body)
+
+    assert response.status_code == 200
+    assert response.json() == {"response": ERROR_FALLBACK_RESPONSE, "status": "success", "source": "error_fallback"}
+
+
+@pytest.mark.parametrize("body", MALFORMED_BODIES)
+def test_chat_stream_with_malformed_body_returns_fallback(client, body):
+    response = client.post("/chat/stream", json=body)
+
+    assert response.status_code == 200
+    events = sse_events(response.text)
+    assert [event for event, _ in events] == ["token", "done"]
+    assert events[-1][1]["source"] == "error_fallback"
+
+
+@pytest.mark.parametrize("path", ["/chat", "/chat/stream"])
+def test_chat_with_empty_message_is_rejected(client, path):
+    assert client.post(path, json={"message": ""}).status_code == 400
@@ -0,0 +1,55 @@
+"""Lectura en streaming de hojas Excel"""
+import io
+import json
+
+import pandas as pd
+from openpyxl import load_workbook
+
+from app.services.analysis_service import AnalysisService
+from app.services.excel_service import EMPTY_COLUMN_SCAN_ROWS, STREAM_BLOCK_ROWS, ExcelService
+from conftest import make_financial_workbook
+
+
+def write(tmp_path, content: bytes):
+    path = tmp_path / "estados.xlsx"
+    path.write_bytes(content)
+    return str(path)
+
+
+def analyze(df, **kwargs):
+    result = AnalysisService().analyze_financial_data(df, **kwargs)
+    return json.dumps(result, sort_keys=True, default=str)
+
+
+def test_spacer_column_does_not_prevent_early_stop(tmp_path):
+    # La columna A está vacía en toda la hoja (separador)
+    path = write(tmp_path, make_financial_workbook(extra_rows=STREAM_BLOCK_ROWS + EMPTY_COLUMN_SCAN_ROWS + 500))
+
+    part = ExcelService().read_financial_sheet(path)
+    full = pd.read_excel(path, engine="openpyxl")
+
+    assert len(part) == STREAM_BLOCK_ROWS
+    assert list(part.columns) == list(full.dropna(axis=1, how="all").columns)
+    assert analyze(part, drop_empty_columns=False) == analyze(full)
+
+
+def test_column_with_data_below_the_read_rows_is_kept(tmp_path):
+    # Nota al pie en la columna A, vacía en las filas que se alcanzan a leer
+    workbook = load_workbook(io.BytesIO(make_financial_workbook(extra_rows=STREAM_BLOCK_ROWS)))
+    workbook.active.append(["Nota al pie"])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    path = write(tmp_path, buffer.getvalue())
+
+    part = ExcelService().read_financial_sheet(path)
+    full = pd.read_excel(path, engine="openpyxl")
+
+    assert len(part) < len(full)
+    assert list(part.columns) == list(full.dropna(axis=1, how="all").columns)
+    assert analyze(part, drop_empty_columns=False) == analyze(full)
+
+
+def test_column_names_follow_read_excel():
+    assert ExcelService._column_names(["", "Concepto", "Concepto", 2022, ""]) == [
+        "Unnamed: 0", "Concepto", "Concepto.1", 2022, "Unnamed: 4",
+    ]
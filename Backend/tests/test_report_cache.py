@@ -0,0 +1,34 @@
+"""Caché de reportes: cada endpoint tiene su propia entrada"""
+import io
+
+from app import reports_routes
+from app.services.report_cache import report_cache
+
+
+def test_complete_report_and_complete_export_are_cached_separately(client, uploaded_analysis, monkeypatch):
+    # ReportService.create_complete_report hoy delega en ExportService: con contenidos
+    # distintos se comprueba que ningún endpoint sirve la entrada del otro
+    monkeypatch.setattr(
+        reports_routes.report_service, "create_complete_report",
+        lambda data: io.BytesIO(b"reporte completo")
+    )
+    analysis_id = uploaded_analysis["analysis_id"]
+
+    report = client.get(f"/reports/completo?analysis_id={analysis_id}")
+    export = client.get(f"/export/excel/complete?analysis_id={analysis_id}")
+    report_again = client.get(f"/reports/completo?analysis_id={analysis_id}")
+
+    assert report.status_code == export.status_code == 200
+    assert report.content == report_again.content == b"reporte completo"
+    assert export.content != report.content
+    assert export.content.startswith(b"PK")
+    assert report_cache.stats()["entries"] == 2
+
+
+def test_cached_report_is_served_again(client, uploaded_analysis):
+    hits = report_cache.stats()["hits"]
+    first = client.get("/reports/completo")
+    second = client.get("/reports/completo")
+
+    assert first.content == second.content
+    assert report_cache.stats()["hits"] == hits + 1
@@ -0,0 +1,35 @@
+"""Caché de tokens validados"""
+from app.auth_service import TokenCache
+from app.models import User, UserRole
+
+
+def make_user(user_id: int = 1) -> User:
+    return User(id=user_id, email="cache@example.com", username="cache", password_hash="x",
+                role=UserRole.CLIENT, is_active=True)
+
+
+def test_each_hit_returns_a_fresh_user():
+    cache = TokenCache(ttl_seconds=30)
+    cache.put("token", make_user())
+
+    first = cache.get("token")
+    first.is_active = False
+    first.role = UserRole.ADMIN
+    second = cache.get("token")
+
+    assert second is not first
+    assert second.is_active is True
+    assert second.role == UserRole.CLIENT
+
+
+def test_invalidate_user_drops_all_of_its_tokens():
+    cache = TokenCache(ttl_seconds=30)
+    cache.put("a", make_user(1))
+    cache.put("b", make_user(1))
+    cache.put("c", make_user(2))
+
+    cache.invalidate_user(1)
+
+    assert cache.get("a") is None
+    assert cache.get("b") is None
+    assert cache.get("c").id == 2
@@ -0,0 +1,34 @@
+"""Trabajos de carga asíncronos: etapas de progreso con ambos tipos de pool"""
+import asyncio
+
+import pytest
+
+from app.services.analysis_executor import AnalysisExecutor
+from app.services.upload_job_service import UploadJobService
+from conftest import make_financial_workbook
+
+
+@pytest.mark.parametrize("kind", ["thread", "process"])
+def test_upload_job_reports_analysis_stages(kind, user, tmp_path):
+    executor = AnalysisExecutor(kind, max_workers=1, max_queue=1)
+    service = UploadJobService(executor)
+    path = tmp_path / "estados.xlsx"
+    path.write_bytes(make_financial_workbook())
+
+    async def scenario():
+        job = service.submit(user.id, user.username, "estados.xlsx", str(path), f"jobs-{kind}")
+        await asyncio.gather(*service._tasks)
+        return job
+
+    try:
+        job = asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+
+    assert job.status == "completed", job.error
+    assert job.analysis_id is not None
+    assert [event["stage"] for event in job.events] == [
+        "queued", "running", "file_read", "year_row_found",
+        "values_extracted", "indicators_computed", "completed",
+    ]
+    assert not path.exists()
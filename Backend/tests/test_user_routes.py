@@ -0,0 +1,42 @@
+"""Búsqueda de usuarios por prefijo"""
+import pytest
+
+from app.database import SessionLocal
+from app.models import User
+
+
+@pytest.fixture
+def users(user):
+    db = SessionLocal()
+    try:
+        for username in ("ana_maria", "anabel", "Bruno", "100%real"):
+            db.add(User(email=f"{username.lower()}@example.com", username=username, password_hash="x"))
+        db.commit()
+    finally:
+        db.close()
+
+
+def usernames(client, **params):
+    response = client.get("/api/users/", params={"count": "exact", **params})
+    assert response.status_code == 200, response.text
+    return sorted(item["username"] for item in response.json()), response.headers["X-Total-Count"]
+
+
+def test_whitespace_search_does_not_filter(client, users):
+    assert usernames(client, search="   ") == usernames(client)
+    assert usernames(client)[1] == "5"
+
+
+def test_search_is_a_case_insensitive_prefix(client, users):
+    assert usernames(client, search=" ANA ")[0] == ["ana_maria", "anabel"]
+    assert usernames(client, search="bru")[0] == ["Bruno"]
+
+
+@pytest.mark.parametrize("term, expected", [
+    ("ana_", ["ana_maria"]),
+    ("_", []),
+    ("%", []),
+    ("100%", ["100%real"]),
+])
+def test_wildcards_in_the_search_are_literal(client, users, term, expected):
+    assert usernames(client, search=term)[0] == expected
@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { BrowserRouter, Routes, Route, Navigate } from 'react-router-dom';
-import { AuthProvider, useAuth } from './context/AuthContext';
+import { AuthProvider, useAuth, API_URL, handleUnauthorized } from './context/AuthContext';
 import ProtectedRoute from './components/ProtectedRoute';
 import Login from './pages/Login';
 import AdminPanel from './pages/AdminPanel';
@@ -16,8 +16,6 @@ import ReportsView from './components/ReportsView';
 import ForgotPassword from './pages/ForgotPassword';
 import ResetPassword from './pages/ResetPassword';
 
-const API_BASE = 'https://financial-analysis-system-qhnz.onrender.com';
-
 // Iconos SVG
 const Icons = {
   Menu: () => (
@@ -158,7 +156,7 @@ function MainApp() {
   const fetchTestData = async () => {
     try {
       setLoading(true);
-      const response = await fetch(`${API_BASE}/test-data`);
+      const response = await fetch(`${API_URL}/test-data`);
       if (!response.ok) throw new Error('Error cargando datos');
       const result = await response.json();
       setFinancialData(result);
@@ -225,21 +223,81 @@ function MainApp() {
     const currentInput = userInput;
     setUserInput('');
     
+    // El mensaje del bot se agrega vacío y se completa a medida que llegan los tokens
+    addChatMessage('bot', '');
+    let received = '';
+
     try {
-      const response = await api.post('/chat', {
-        message: currentInput,
-        financial_data: financialData
+      // EventSource no permite POST: se lee el stream SSE con fetch
+      // Con analysis_id el servidor usa el contexto ya calculado del análisis guardado
+      const response = await fetch(`${API_URL}/chat/stream`, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+          Authorization: `Bearer ${localStorage.getItem('token')}`,
+        },
+        body: JSON.stringify(financialData?.analysis_id
+          ? { message: currentInput, analysis_id: financialData.analysis_id }
+          : { message: currentInput, financial_data: financialData }
+        ),
       });
+      if (response.status === 401) {
+        // Mismo manejo que el interceptor de axios: sesión expirada
+        handleUnauthorized();
+        return;
+      }
+      if (!response.ok || !response.body) throw new Error(`HTTP ${response.status}`);
 
-      const data = response.data;
-      addChatMessage('bot', data.response);
-      
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+
+      while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        // Cada evento SSE termina con una línea en blanco
+        const frames = buffer.split('\n\n');
+        buffer = frames.pop();
+        for (const frame of frames) {
+          const { event, data } = parseSseFrame(frame);
+          if (event === 'token') {
+            received += data.token;
+          } else if (event === 'done') {
+            received = data.response;
+          } else {
+            continue;
+          }
+          updateLastBotMessage(received);
+        }
+      }
+
+      if (!received) throw new Error('Respuesta vacía');
     } catch (error) {
       console.error('Error:', error);
-      addChatMessage('bot', 'Lo siento, hubo un error al procesar tu mensaje.');
+      if (!received) updateLastBotMessage('Lo siento, hubo un error al procesar tu mensaje.');
     }
   };
 
+  const parseSseFrame = (frame) => {
+    let event = 'message';
+    let data = '';
+    for (const line of frame.split('\n')) {
+      if (line.startsWith('event:')) event = line.slice(6).trim();
+      else if (line.startsWith('data:')) data += line.slice(5).trim();
+    }
+    return { event, data: data ? JSON.parse(data) : {} };
+  };
+
+  const updateLastBotMessage = (text) => {
+    setChatMessages(prev => {
+      const last = prev.length - 1;
+      if (last < 0 || prev[last].type !== 'bot') return [...prev, { type: 'bot', text }];
+      return [...prev.slice(0, last), { ...prev[last], text }];
+    });
+  };
+
   const handleExport = async () => {
     if (!isAuthenticated) {
       setError('Debes iniciar sesión para exportar');
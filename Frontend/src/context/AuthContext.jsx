@@ -9,7 +9,14 @@ import axios from 'axios';
 const AuthContext = createContext(null);
 
 // URL del backend (Render)
-const API_URL = import.meta.env.VITE_API_URL || 'https://financial-analysis-system-qhnz.onrender.com';
+export const API_URL = import.meta.env.VITE_API_URL || 'https://financial-analysis-system-qhnz.onrender.com';
+
+// Sesión inválida o expirada: limpiar y volver al login
+export const handleUnauthorized = () => {
+  localStorage.removeItem('token');
+  localStorage.removeItem('user');
+  window.location.href = '/login';
+};
 
 // Configurar axios con interceptores
 const api = axios.create({
@@ -39,9 +46,7 @@ api.interceptors.response.use(
   (error) => {
     if (error.response?.status === 401) {
       // Token inválido o expirado
-      localStorage.removeItem('token');
-      localStorage.removeItem('user');
-      window.location.href = '/login';
+      handleUnauthorized();
     }
     return Promise.reject(error);
   }